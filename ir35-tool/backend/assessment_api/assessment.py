@@ -0,0 +1,197 @@
+import json
+import time
+import logging
+from datetime import datetime
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple, Callable, Optional, Iterator, Iterable, Union
+
+from models import AssessmentRequest, AssessmentResponse, RagReference
+from streaming import PartialAssessmentParser
+
+logger = logging.getLogger(__name__)
+
+class RetrievalFailed(Exception):
+    """A batch item was not assessed because its context could not be retrieved."""
+
+def build_prompt_scaffold(request_data: AssessmentRequest) -> Tuple[str, str]:
+    """
+    Builds the Gemini prompt around the (not yet retrieved) context, returned
+    as the text before and after it.
+    """
+    before = """
+        You are an expert IR35 Compliance Officer.
+        Assess the following engagement based on the provided details and the relevant case law/guidelines (Context).
+
+        Context:
+        """
+    after = f"""
+
+        Engagement Details:
+        Role: {request_data.role_details}
+        Contract Type: {request_data.contract_type}
+        Answers: {request_data.answers}
+
+        Provide a JSON response with the following fields:
+        - determination: "Inside IR35" or "Outside IR35"
+        - confidence_score: float between 0.0 and 1.0
+        - reasoning: Detailed explanation citing the context where applicable.
+        """
+    return before, after
+
+def complete_prompt(scaffold: Tuple[str, str], references: List[RagReference]) -> str:
+    """Inserts the retrieved context into a prompt scaffold."""
+    context = "\n".join([f"- {r.id}: {r.content_snippet}" for r in references])
+    before, after = scaffold
+    return before + context + after
+
+def parse_assessment(text: str) -> Dict[str, Any]:
+    """Parses Gemini's JSON output, falling back to an undetermined result."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        logger.error(f"Failed to parse Gemini response: {text}")
+        # Fallback
+        return {
+            "determination": "Undetermined",
+            "confidence_score": 0.0,
+            "reasoning": "Failed to parse AI response."
+        }
+
+def build_response(request_data: AssessmentRequest, ai_result: Dict[str, Any], references: List[RagReference], retrieval_latency: Optional[Dict[str, float]]) -> AssessmentResponse:
+    return AssessmentResponse(
+        assessment_id=f"{request_data.engagement_id}-{int(time.time())}",
+        status="Completed",
+        determination=ai_result.get("determination", "Undetermined"),
+        confidence_score=ai_result.get("confidence_score", 0.0),
+        reasoning=ai_result.get("reasoning", ""),
+        rag_references=references,
+        retrieval_latency_ms=retrieval_latency,
+        timestamp=datetime.utcnow().isoformat()
+    )
+
+def run_assessment(
+    request_data: AssessmentRequest,
+    retrieve: Callable[[str, Optional[Dict[str, List[str]]]], Tuple[List[RagReference], Dict[str, float]]],
+    load_model: Callable[[], Any],
+    generate: Callable[[Any, str], Dict[str, Any]],
+    record_audit: Callable[[AssessmentRequest, AssessmentResponse], Future],
+    executor: Executor
+) -> Tuple[AssessmentResponse, Future]:
+    """
+    Runs one assessment with the independent steps overlapped.
+
+    Retrieval and model loading run on `executor` while the prompt scaffold
+    is built; generation starts as soon as both are ready. The audit record
+    holds the generated response, so `record_audit` starts its write last.
+    Its future is returned with the response: the caller serialises the
+    response while the record is written, then waits for it.
+    """
+    retrieval = executor.submit(retrieve, request_data.role_details, request_data.restricts)
+    model = executor.submit(load_model)
+
+    scaffold = build_prompt_scaffold(request_data)
+    references, retrieval_latency = retrieval.result()
+    prompt = complete_prompt(scaffold, references)
+
+    ai_result = generate(model.result(), prompt)
+
+    response = build_response(request_data, ai_result, references, retrieval_latency)
+    return response, record_audit(request_data, response)
+
+def stream_assessment(
+    request_data: AssessmentRequest,
+    retrieve: Callable[[str, Optional[Dict[str, List[str]]]], Tuple[List[RagReference], Dict[str, float]]],
+    load_model: Callable[[], Any],
+    generate_stream: Callable[[Any, str], Iterable[str]],
+    record_audit: Callable[[AssessmentRequest, AssessmentResponse], Future],
+    wait_for_audits: Callable[[List[Future]], None],
+    executor: Executor
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Streaming variant of run_assessment, yielding (event, data) pairs.
+
+    An `accepted` event is yielded before any backend call so the client gets
+    its first byte immediately, then `references` once retrieval is done,
+    `determination`, `confidence_score` and `reasoning` deltas as Gemini
+    writes them, and finally `result` with the full AssessmentResponse. The
+    audit record is only written once the complete response has validated;
+    its write starts before `result` is sent, and `wait_for_audits` is
+    called after it, before the stream ends.
+    """
+    yield "accepted", {"engagement_id": request_data.engagement_id}
+
+    retrieval = executor.submit(retrieve, request_data.role_details, request_data.restricts)
+    model = executor.submit(load_model)
+
+    scaffold = build_prompt_scaffold(request_data)
+    references, retrieval_latency = retrieval.result()
+    yield "references", [r.model_dump() for r in references]
+
+    parser = PartialAssessmentParser()
+    for chunk in generate_stream(model.result(), complete_prompt(scaffold, references)):
+        yield from parser.feed(chunk)
+
+    response = build_response(request_data, parse_assessment(parser.text), references, retrieval_latency)
+    written = record_audit(request_data, response)
+    try:
+        yield "result", response.model_dump()
+    finally:
+        wait_for_audits([written])
+
+def run_batch_assessment(
+    requests: List[AssessmentRequest],
+    retrieve_many: Callable[[List[str], List[Optional[Dict[str, List[str]]]]], Tuple[List[Optional[List[RagReference]]], Dict[str, float]]],
+    load_model: Callable[[], Any],
+    generate: Callable[[Any, str], Dict[str, Any]],
+    record_audits: Callable[[List[Tuple[AssessmentRequest, AssessmentResponse]]], None],
+    concurrency: int,
+    audit_batch_size: int = 50
+) -> List[Union[AssessmentResponse, Exception]]:
+    """
+    Assesses several engagements, returning a response or the exception
+    raised for each request, in order.
+
+    Retrieval runs once for the whole batch (see query_vector_search_batch)
+    and generations run `concurrency` at a time. Requests whose retrieval
+    failed (None references) are not assessed without context; their
+    outcome is a RetrievalFailed. As assessments finish, their audit records
+    are handed to `record_audits` in groups of `audit_batch_size` on a
+    writer thread, so the writes overlap the remaining generations; all of
+    them are done before this returns.
+    """
+    reference_lists, retrieval_latency = retrieve_many([r.role_details for r in requests], [r.restricts for r in requests])
+    model = load_model()
+
+    def assess(request_data: AssessmentRequest, references: List[RagReference]) -> AssessmentResponse:
+        prompt = complete_prompt(build_prompt_scaffold(request_data), references)
+        return build_response(request_data, generate(model, prompt), references, retrieval_latency)
+
+    outcomes: List[Union[AssessmentResponse, Exception]] = [None] * len(requests)
+    assessed: List[Tuple[AssessmentRequest, AssessmentResponse]] = []
+    writes = []
+    # One writer thread: audit writes overlap generation but not each other
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {}
+            for position, (request_data, references) in enumerate(zip(requests, reference_lists)):
+                if references is None:
+                    outcomes[position] = RetrievalFailed(f"No context retrieved for {request_data.engagement_id}")
+                    continue
+                futures[pool.submit(assess, request_data, references)] = position
+            for future in as_completed(futures):
+                position = futures[future]
+                try:
+                    outcomes[position] = future.result()
+                except Exception as e:
+                    logger.error(f"Error assessing {requests[position].engagement_id}: {e}")
+                    outcomes[position] = e
+                    continue
+                assessed.append((requests[position], outcomes[position]))
+                if len(assessed) >= audit_batch_size:
+                    writes.append(writer.submit(record_audits, assessed))
+                    assessed = []
+        if assessed:
+            writes.append(writer.submit(record_audits, assessed))
+        for write in writes:
+            write.result()
+    return outcomes
@@ -0,0 +1,81 @@
+import json
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class AuditQueue:
+    """
+    Writes audit records on a background thread, retrying each with
+    exponential backoff; a record that still fails is logged in full so it
+    can be recovered from Cloud Logging. When the queue is full, `submit`
+    writes inline rather than dropping a record.
+
+    `submit` returns a future resolved once the record is written (True) or
+    given up on (False). Callers on Cloud Functions wait for it before
+    returning their response: CPU is throttled once the response is sent and
+    the instance can be reclaimed without running atexit handlers, so a
+    record still queued at that point can stall or be lost.
+    """
+
+    def __init__(self, write_fn: Callable[[str, Dict[str, Any]], None], max_retries: int, max_size: int = 1000):
+        self.write_fn = write_fn
+        self.max_retries = max_retries
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_size)
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._worker.start()
+
+    def submit(self, doc_id: str, record: Dict[str, Any]) -> "Future[bool]":
+        written: "Future[bool]" = Future()
+        with self._idle:
+            self._pending += 1
+        try:
+            self._queue.put_nowait((doc_id, record, written))
+        except queue.Full:
+            logger.warning(f"Audit queue full, writing {doc_id} inline")
+            self._write(doc_id, record, written)
+        return written
+
+    def flush(self, timeout: float) -> bool:
+        """Waits up to `timeout` seconds for queued records; True if none are left."""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            doc_id, record, written = self._queue.get()
+            self._write(doc_id, record, written)
+
+    def _write(self, doc_id: str, record: Dict[str, Any], written: "Future[bool]"):
+        ok = False
+        try:
+            retry_count = 0
+            while True:
+                try:
+                    self.write_fn(doc_id, record)
+                    ok = True
+                    return
+                except Exception as e:
+                    retry_count += 1
+                    if retry_count >= self.max_retries:
+                        logger.error(f"Failed to write audit record {doc_id}: {e}; record: {json.dumps(record, default=str)}")
+                        return
+                    logger.warning(f"Error writing audit record {doc_id} (attempt {retry_count}): {e}")
+                    time.sleep(2 ** retry_count) # Exponential backoff
+        finally:
+            written.set_result(ok)
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
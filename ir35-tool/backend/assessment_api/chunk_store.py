@@ -0,0 +1,66 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Iterable
+
+logger = logging.getLogger(__name__)
+
+CHUNK_FIELDS = ["content", "document_url", "chunk_index"]
+
+class ChunkStore:
+    """
+    Read-through LRU cache over the Firestore chunk collection written by rag_indexer.
+
+    Cache misses for a query are fetched with one batched `get_all` call, so the
+    number of round trips stays at one no matter how many neighbours are returned.
+    """
+
+    def __init__(self, db, collection: str, cache_size: int):
+        self.db = db
+        self.collection = collection
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, chunk_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the stored chunk for each id that exists, keyed by id.
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for chunk_id in dict.fromkeys(chunk_ids):
+                chunk = self._cache.get(chunk_id)
+                if chunk is None:
+                    missing.append(chunk_id)
+                else:
+                    self._cache.move_to_end(chunk_id)
+                    found[chunk_id] = chunk
+
+        if missing:
+            fetched = self._fetch(missing)
+            found.update(fetched)
+            self._remember(fetched)
+
+        return found
+
+    def _fetch(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        collection = self.db.collection(self.collection)
+        refs = [collection.document(chunk_id) for chunk_id in chunk_ids]
+
+        fetched = {}
+        for snapshot in self.db.get_all(refs, field_paths=CHUNK_FIELDS):
+            if snapshot.exists:
+                fetched[snapshot.id] = snapshot.to_dict()
+
+        if len(fetched) < len(chunk_ids):
+            logger.warning(f"{len(chunk_ids) - len(fetched)} of {len(chunk_ids)} chunks not found in {self.collection}")
+        return fetched
+
+    def _remember(self, chunks: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            for chunk_id, chunk in chunks.items():
+                self._cache[chunk_id] = chunk
+                self._cache.move_to_end(chunk_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
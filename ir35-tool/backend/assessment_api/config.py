@@ -1,4 +1,5 @@
 import os
+import json
 
 # Project Configuration
 PROJECT_ID = os.environ.get("PROJECT_ID")
@@ -9,12 +10,68 @@ VERTEX_AI_ENDPOINT = os.environ.get("VERTEX_AI_ENDPOINT") # Endpoint Name
 VERTEX_AI_INDEX_NAME = os.environ.get("VERTEX_AI_INDEX_NAME") # Index Resource Name
 DEPLOYED_INDEX_ID = "ir35_cest_deployed"
 
+# Embedding Configuration
+EMBEDDING_MAX_INSTANCES_PER_REQUEST = 250 if REGION == "us-central1" else 5
+EMBEDDING_MAX_TOKENS_PER_REQUEST = 20000
+
 # Gemini Configuration
 # Using Gemini 1.5 Pro as requested
 GEMINI_MODEL_NAME = "gemini-1.5-pro-preview-0409" 
 
 # Firestore Configuration
 FIRESTORE_COLLECTION = "ir35_assessments"
+AUDIT_MAX_RETRIES = 3
+AUDIT_QUEUE_SIZE = 1000
+AUDIT_FLUSH_SECONDS = 8 # Drain time at shutdown, within Cloud Run's 10s grace period
+AUDIT_WAIT_SECONDS = 10 # Longest a response waits for its audit records (covers the retry backoff)
+AUDIT_BATCH_SIZE = 50 # Batch audit records written together while the rest of the batch generates
+FIRESTORE_BATCH_SIZE = 500 # Firestore limit per batched write
+
+# Request Concurrency Configuration
+# Threads shared by all in-flight requests for retrieval and model loading;
+# size for max_instance_request_concurrency x 2.
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", "16"))
 
 # RAG Configuration
 MAX_NEIGHBORS = 5
+# Default namespace filter applied when a request sets no `restricts`,
+# e.g. '{"jurisdiction": ["uk"]}'
+RAG_RESTRICTS = json.loads(os.environ.get("RAG_RESTRICTS", "{}"))
+
+# Local Vector Index Configuration
+# "off": remote Matching Engine only.
+# "fallback": query the local index when the remote query fails.
+# "primary": query the local index, using the remote index only when no snapshot is loaded.
+LOCAL_INDEX_MODE = os.environ.get("LOCAL_INDEX_MODE", "fallback")
+LOCAL_INDEX_SNAPSHOT_URI = os.environ.get("LOCAL_INDEX_SNAPSHOT_URI") # gs:// prefix written by rag_indexer
+LOCAL_INDEX_QUANTIZE = os.environ.get("LOCAL_INDEX_QUANTIZE", "false").lower() == "true"
+LOCAL_INDEX_REFRESH_SECONDS = int(os.environ.get("LOCAL_INDEX_REFRESH_SECONDS", "600"))
+
+# Batch Assessment Configuration
+BATCH_MAX_ITEMS = 500
+BATCH_GENERATION_CONCURRENCY = int(os.environ.get("BATCH_GENERATION_CONCURRENCY", "8")) # Concurrent Gemini calls per batch
+
+# Hybrid Retrieval Configuration
+# BM25 over the snapshot's chunk term statistics is fused with vector results
+# by reciprocal rank fusion, then reranked locally down to RERANK_TOP_K chunks.
+HYBRID_RETRIEVAL = os.environ.get("HYBRID_RETRIEVAL", "true").lower() == "true"
+HYBRID_CANDIDATES = 20 # Candidates taken from each retriever
+RRF_K = 60
+RERANK_TOP_K = int(os.environ.get("RERANK_TOP_K", "4"))
+RERANK_FUSION_WEIGHT = 0.5
+RERANK_COVERAGE_WEIGHT = 0.3
+RERANK_PHRASE_WEIGHT = 0.2
+RETRIEVAL_BUDGET_MS = int(os.environ.get("RETRIEVAL_BUDGET_MS", "1500")) # Slower requests are logged
+
+# Chunk Store Configuration
+CHUNK_COLLECTION = "ir35_chunks" # Written by rag_indexer, keyed by datapoint ID
+CHUNK_CACHE_SIZE = int(os.environ.get("CHUNK_CACHE_SIZE", "2048"))
+
+# Secret Cache Configuration
+# Secrets are cached per instance and refreshed in the background before the
+# TTL runs out; a value up to SECRET_MAX_STALE_SECONDS past its TTL is served
+# while a refresh is in flight.
+SECRET_TTL_SECONDS = int(os.environ.get("SECRET_TTL_SECONDS", "300"))
+SECRET_REFRESH_AHEAD_SECONDS = 60
+SECRET_MAX_STALE_SECONDS = int(os.environ.get("SECRET_MAX_STALE_SECONDS", "3600"))
+PRELOAD_SECRETS = [name for name in os.environ.get("PRELOAD_SECRETS", "").split(",") if name] # Loaded in the background on the first secret read
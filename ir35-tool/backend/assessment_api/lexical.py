@@ -0,0 +1,117 @@
+import io
+import re
+import math
+from typing import List, Dict, Tuple, Optional, Iterable
+
+import numpy as np
+
+# Must stay in step with rag_indexer/lexical.py, which writes the chunk term
+# statistics this module scores queries against.
+_TERM_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have he her his i if in into is it its
+not of on or our she such that the their them then there these they this to was we were
+which will with would you your
+""".split())
+
+def analyze(text: str) -> List[str]:
+    """
+    Lower-cases a text and splits it into BM25 terms, dropping stopwords.
+    """
+    return [term for term in _TERM_RE.findall(text.lower()) if term not in _STOPWORDS]
+
+class BM25Index:
+    """
+    In-process Okapi BM25 index over chunk term frequencies.
+
+    Postings are held as flat arrays grouped by term, with each posting's BM25
+    weight precomputed, so a query is a gather and a bincount over the
+    postings of its terms.
+    """
+
+    def __init__(self, ids: List[str], terms: List[str], rows: np.ndarray, term_ids: np.ndarray, counts: np.ndarray, lengths: np.ndarray, k1: float = 1.2, b: float = 0.75):
+        self.ids = np.asarray(ids, dtype=np.str_)
+        self.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+
+        rows = np.asarray(rows, dtype=np.int32)
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        counts = np.asarray(counts, dtype=np.float32)
+        lengths = np.asarray(lengths, dtype=np.float32)
+
+        # Group postings by term: postings of term t are [offsets[t], offsets[t + 1])
+        order = np.argsort(term_ids, kind="stable")
+        self.rows = rows[order]
+        document_frequency = np.bincount(term_ids, minlength=len(terms))
+        self.offsets = np.concatenate([[0], np.cumsum(document_frequency)])
+
+        n = len(self.ids)
+        self.idf = np.log(1 + (n - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+        average_length = lengths.mean() if n and lengths.mean() > 0 else 1.0
+        tf = counts[order]
+        norm = k1 * (1 - b + b * lengths[self.rows] / average_length)
+        self.weights = (self.idf[term_ids[order]] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_shards(cls, shards: Iterable[bytes], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """
+        Builds an index from the lexical_* arrays of rag_indexer snapshot
+        shards. Shards written without term statistics contribute rows that
+        never match.
+        """
+        ids: List[str] = []
+        vocabulary: Dict[str, int] = {}
+        rows, term_ids, counts, lengths = [], [], [], []
+        for payload in shards:
+            with np.load(io.BytesIO(payload), allow_pickle=False) as shard:
+                offset = len(ids)
+                shard_ids = shard["ids"].tolist()
+                ids.extend(shard_ids)
+                if "lexical_terms" not in shard.files:
+                    lengths.append(np.zeros(len(shard_ids), dtype=np.int32))
+                    continue
+                # Map shard-local term ids onto the corpus vocabulary
+                local_to_global = np.array([vocabulary.setdefault(term, len(vocabulary)) for term in shard["lexical_terms"].tolist()], dtype=np.int32)
+                rows.append(shard["lexical_rows"] + offset)
+                term_ids.append(local_to_global[shard["lexical_term_ids"]] if len(local_to_global) else shard["lexical_term_ids"])
+                counts.append(shard["lexical_counts"])
+                lengths.append(shard["lexical_lengths"])
+
+        def concat(arrays):
+            return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int32)
+
+        return cls(ids, list(vocabulary), concat(rows), concat(term_ids), concat(counts), concat(lengths), k1=k1, b=b)
+
+    def term_idf(self, term: str) -> float:
+        """IDF of a term, or the IDF of an unseen term if it is not indexed."""
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return math.log(1 + (len(self) + 0.5) / 0.5)
+        return float(self.idf[term_id])
+
+    def query(self, query_terms: List[str], num_results: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """
+        Returns up to `num_results` (id, score) pairs with a positive BM25
+        score, best first. `allowed` is an optional boolean row mask.
+        """
+        term_ids = {self.vocabulary[term] for term in query_terms if term in self.vocabulary}
+        if not term_ids or not len(self) or num_results <= 0:
+            return []
+
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        scores = np.bincount(
+            np.concatenate([self.rows[s] for s in slices]),
+            weights=np.concatenate([self.weights[s] for s in slices]),
+            minlength=len(self)
+        )
+        if allowed is not None:
+            scores[~allowed] = 0.0
+
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > num_results:
+            matched = matched[np.argpartition(-scores[matched], num_results - 1)[:num_results]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [(str(self.ids[i]), float(scores[i])) for i in matched]
@@ -0,0 +1,252 @@
+import io
+import json
+import time
+import logging
+import threading
+from typing import List, Dict, Tuple, Optional, Iterable, Sequence
+
+import numpy as np
+
+from lexical import BM25Index
+
+logger = logging.getLogger(__name__)
+
+SHARD_SUFFIX = ".npz"
+
+# Rows scored per block when the matrix is int8 quantised, bounding the
+# temporary float32 copy needed for the matrix product.
+QUANTIZED_BLOCK_ROWS = 4096
+
+class LocalVectorIndex:
+    """
+    In-process exact nearest neighbour index over L2-normalised embeddings.
+
+    Scores are dot products, matching the DOT_PRODUCT_DISTANCE measure of the
+    deployed Matching Engine index, so local and remote scores are comparable.
+    """
+
+    def __init__(self, ids: Sequence[str], embeddings: np.ndarray, sources: Optional[Sequence[str]] = None, quantize: bool = False, restricts: Optional[Sequence[Dict[str, List[str]]]] = None):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError("embeddings must be a 2-D matrix with one row per id")
+
+        self.ids = np.asarray(ids, dtype=np.str_)
+        self.sources = np.asarray(sources if sources is not None else [""] * len(ids), dtype=np.str_)
+
+        # Rows share a handful of distinct restrict sets (one per document), so
+        # store each set once and map rows to it
+        groups: Dict[str, int] = {}
+        self.group_restricts: List[Dict[str, set]] = []
+        row_groups = []
+        for row_restricts in (restricts if restricts is not None else [{}] * len(ids)):
+            key = json.dumps(row_restricts, sort_keys=True)
+            if key not in groups:
+                groups[key] = len(self.group_restricts)
+                self.group_restricts.append({namespace: set(tokens) for namespace, tokens in row_restricts.items()})
+            row_groups.append(groups[key])
+        self.row_groups = np.asarray(row_groups, dtype=np.int32)
+        self.dimensions = matrix.shape[1]
+        self.quantized = quantize
+
+        matrix = _normalize(matrix)
+        if quantize:
+            # Symmetric per-row quantisation: row ~= int8_row * scale
+            scales = np.abs(matrix).max(axis=1)
+            scales[scales == 0] = 1.0
+            scales = scales / 127.0
+            self.matrix = np.round(matrix / scales[:, None]).astype(np.int8)
+            self.scales = scales.astype(np.float32)
+        else:
+            self.matrix = matrix
+            self.scales = None
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the vector matrix (and quantisation scales)."""
+        return self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @classmethod
+    def from_shards(cls, shards: Iterable[bytes], quantize: bool = False) -> "LocalVectorIndex":
+        """
+        Builds an index from .npz snapshot shards written by rag_indexer.
+        """
+        ids, matrices, sources, restricts = [], [], [], []
+        for payload in shards:
+            with np.load(io.BytesIO(payload), allow_pickle=False) as shard:
+                shard_ids = shard["ids"]
+                shard_restricts = json.loads(str(shard["restricts"])) if "restricts" in shard.files else {}
+                ids.extend(shard_ids.tolist())
+                matrices.append(shard["embeddings"].astype(np.float32, copy=False))
+                sources.extend([str(shard["source"])] * len(shard_ids))
+                restricts.extend([shard_restricts] * len(shard_ids))
+
+        if not matrices:
+            raise ValueError("No snapshot shards to load")
+
+        return cls(ids, np.vstack(matrices), sources=sources, quantize=quantize, restricts=restricts)
+
+    def query(self, queries: Sequence[Sequence[float]], num_neighbors: int, restricts: Optional[Dict[str, List[str]]] = None) -> List[List[Tuple[str, float, str]]]:
+        """
+        Returns the top-k (id, score, source) tuples for each query vector.
+
+        All queries are scored with a single matrix product, then the top-k of
+        each row is selected with argpartition so only k items are sorted.
+        `restricts` filters like Matching Engine namespaces: a row matches if,
+        for every namespace, it has at least one of the allowed tokens.
+        """
+        query_matrix = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if query_matrix.shape[1] != self.dimensions:
+            raise ValueError(f"Query has {query_matrix.shape[1]} dimensions, index has {self.dimensions}")
+
+        scores = self._score(query_matrix)
+        k = min(num_neighbors, len(self))
+        if restricts:
+            allowed = self.allowed_rows(restricts)
+            scores[:, ~allowed] = -np.inf
+            k = min(k, int(allowed.sum()))
+        if k <= 0:
+            return [[] for _ in range(query_matrix.shape[0])]
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [(str(self.ids[i]), float(score), str(self.sources[i])) for i, score in zip(row, row_scores)]
+            for row, row_scores in zip(top, top_scores)
+        ]
+
+    def allowed_rows(self, restricts: Dict[str, List[str]]) -> np.ndarray:
+        """Boolean mask of the rows matching namespace `restricts` (see query)."""
+        allowed_groups = np.array([
+            all(group.get(namespace, set()) & set(tokens) for namespace, tokens in restricts.items())
+            for group in self.group_restricts
+        ], dtype=bool)
+        return allowed_groups[self.row_groups]
+
+    def _score(self, query_matrix: np.ndarray) -> np.ndarray:
+        if self.scales is None:
+            return query_matrix @ self.matrix.T
+
+        scores = np.empty((query_matrix.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), QUANTIZED_BLOCK_ROWS):
+            end = start + QUANTIZED_BLOCK_ROWS
+            block = self.matrix[start:end].astype(np.float32)
+            scores[:, start:end] = (query_matrix @ block.T) * self.scales[start:end]
+        return scores
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class LocalSnapshot:
+    """
+    The vector and BM25 indexes built from one set of snapshot shards.
+
+    Both are built from the shards in the same order, so row i is the same
+    chunk in each and a restricts mask from `vectors` applies to `lexical`.
+    """
+
+    def __init__(self, vectors: LocalVectorIndex, lexical: BM25Index):
+        if len(vectors) != len(lexical):
+            raise ValueError("vector and lexical indexes must have the same rows")
+        self.vectors = vectors
+        self.lexical = lexical
+
+    @classmethod
+    def from_shards(cls, shards: List[bytes], quantize: bool = False) -> "LocalSnapshot":
+        return cls(LocalVectorIndex.from_shards(shards, quantize=quantize), BM25Index.from_shards(shards))
+
+def list_snapshot_shards(snapshot_uri: str) -> list:
+    """Lists the shard blobs under a gs:// snapshot prefix."""
+    from google.cloud import storage
+
+    if not snapshot_uri.startswith("gs://"):
+        raise ValueError("Invalid snapshot URI. Must start with gs://")
+
+    bucket_name, _, prefix = snapshot_uri[5:].partition("/")
+    storage_client = storage.Client()
+    return [b for b in storage_client.list_blobs(bucket_name, prefix=prefix) if b.name.endswith(SHARD_SUFFIX)]
+
+def snapshot_version(blobs: list) -> Tuple[Tuple[str, int], ...]:
+    """Identifies a set of shards by name and generation; changes when any shard is rewritten."""
+    return tuple(sorted((b.name, b.generation) for b in blobs))
+
+def load_snapshot(snapshot_uri: str, quantize: bool = False, blobs: Optional[list] = None) -> LocalSnapshot:
+    """
+    Downloads every shard under a gs:// snapshot prefix (or the given shard
+    blobs) and builds the indexes.
+    """
+    if blobs is None:
+        blobs = list_snapshot_shards(snapshot_uri)
+
+    snapshot = LocalSnapshot.from_shards([b.download_as_bytes() for b in blobs], quantize=quantize)
+    logger.info(f"Loaded local index snapshot: {len(snapshot.vectors)} vectors ({snapshot.vectors.nbytes} bytes), {len(snapshot.lexical.vocabulary)} terms from {len(blobs)} shards")
+    return snapshot
+
+class LocalIndexCache:
+    """
+    Process-wide holder for the local index snapshot, refreshed after
+    `refresh_seconds`.
+
+    Only the first load blocks. A refresh runs on a background thread: it
+    lists the shards, downloads them only when a shard was added or
+    rewritten, and swaps the new snapshot in once it is built. Requests keep
+    getting the previous snapshot meanwhile, and after a failed refresh.
+    """
+
+    def __init__(self, snapshot_uri: Optional[str], quantize: bool, refresh_seconds: int):
+        self.snapshot_uri = snapshot_uri
+        self.quantize = quantize
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[LocalSnapshot] = None
+        self._version: Optional[Tuple[Tuple[str, int], ...]] = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[LocalSnapshot]:
+        if not self.snapshot_uri:
+            return None
+
+        if self._snapshot is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return self._snapshot
+
+        if self._snapshot is not None:
+            with self._lock:
+                if self._refreshing or time.monotonic() - self._loaded_at < self.refresh_seconds:
+                    return self._snapshot
+                self._refreshing = True
+            threading.Thread(target=self._refresh, name="local-index-refresh", daemon=True).start()
+            return self._snapshot
+
+        # Nothing to serve yet, so the first load blocks
+        with self._lock:
+            if self._snapshot is None and time.monotonic() - self._loaded_at >= self.refresh_seconds:
+                self._load()
+        return self._snapshot
+
+    def _refresh(self):
+        try:
+            self._load()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _load(self):
+        try:
+            blobs = list_snapshot_shards(self.snapshot_uri)
+            version = snapshot_version(blobs)
+            if version != self._version:
+                self._snapshot = load_snapshot(self.snapshot_uri, quantize=self.quantize, blobs=blobs)
+                self._version = version
+        except Exception as e:
+            logger.error(f"Failed to load local index snapshot: {e}")
+        # Back off until the next refresh window even when loading failed
+        self._loaded_at = time.monotonic()
@@ -1,21 +1,32 @@
 import functions_framework
 import os
+import re
 import json
-import time
+import atexit
 import logging
-from typing import List, Dict, Any
-from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 
 from google.cloud import firestore
 from google.cloud import aiplatform
-from google.cloud import secretmanager
 from google.cloud import logging as cloud_logging
+from google.cloud.aiplatform.matching_engine.matching_engine_index_endpoint import Namespace
+from flask import Response
 import vertexai
 from vertexai.preview.generative_models import GenerativeModel, GenerationConfig
 from vertexai.preview.language_models import TextEmbeddingModel
 
 import config
-from models import AssessmentRequest, AssessmentResponse, RagReference
+from models import AssessmentRequest, AssessmentResponse, RagReference, BatchAssessmentRequest, BatchAssessmentResponse, BatchItemFailure
+from local_index import LocalVectorIndex, LocalSnapshot, LocalIndexCache
+from lexical import analyze
+from retrieval import reciprocal_rank_fusion, rerank, RetrievalTimer
+from chunk_store import ChunkStore
+from audit import AuditQueue
+from assessment import run_assessment, stream_assessment, run_batch_assessment, parse_assessment, RetrievalFailed
+from streaming import format_sse
+from refreshing_cache import RefreshingCache, secret_manager_loader
 
 # Configure logging
 log_client = cloud_logging.Client()
@@ -25,102 +36,431 @@ logger = logging.getLogger(__name__)
 # Initialize Firestore
 db = firestore.Client()
 
+# Chunk text written by rag_indexer, with an in-process LRU of hot chunks
+chunk_store = ChunkStore(db, config.CHUNK_COLLECTION, cache_size=config.CHUNK_CACHE_SIZE)
+
+# In-process vector index, loaded lazily from the rag_indexer snapshot
+local_index_cache = LocalIndexCache(
+    config.LOCAL_INDEX_SNAPSHOT_URI,
+    quantize=config.LOCAL_INDEX_QUANTIZE,
+    refresh_seconds=config.LOCAL_INDEX_REFRESH_SECONDS
+)
+
+# Audit records are written to Firestore by a background writer with retries;
+# requests wait for their records before their response ends (see wait_for_audits)
+def write_audit_record(doc_id: str, record: Dict[str, Any]):
+    db.collection(config.FIRESTORE_COLLECTION).document(doc_id).set({**record, "timestamp": firestore.SERVER_TIMESTAMP})
+
+audit_queue = AuditQueue(write_audit_record, max_retries=config.AUDIT_MAX_RETRIES, max_size=config.AUDIT_QUEUE_SIZE)
+atexit.register(audit_queue.flush, config.AUDIT_FLUSH_SECONDS)
+
+# Secret Manager values, cached per instance with background refresh; the
+# client and refresh thread are created by the first fetch_secret
+secret_cache = RefreshingCache(
+    secret_manager_loader(config.PROJECT_ID),
+    ttl_seconds=config.SECRET_TTL_SECONDS,
+    refresh_ahead_seconds=config.SECRET_REFRESH_AHEAD_SECONDS,
+    max_stale_seconds=config.SECRET_MAX_STALE_SECONDS,
+    preload=config.PRELOAD_SECRETS
+)
+
+def fetch_secret(secret_name: str) -> str:
+    """
+    Fetches a secret from Google Secret Manager (latest version), via the
+    process-wide cache.
+    """
+    try:
+        return secret_cache.get(secret_name)
+    except Exception as e:
+        logger.error(f"Failed to fetch secret {secret_name}: {e}")
+        raise
+
+# Shared by concurrent requests for the steps each request overlaps
+executor = ThreadPoolExecutor(max_workers=config.PIPELINE_WORKERS)
+
+@lru_cache(maxsize=1)
+def embedding_model() -> TextEmbeddingModel:
+    """The query embedding model, loaded once per instance."""
+    vertexai.init(project=config.PROJECT_ID, location=config.REGION)
+    return TextEmbeddingModel.from_pretrained("textembedding-gecko@003")
+
+@lru_cache(maxsize=1)
+def generative_model() -> GenerativeModel:
+    """The Gemini model, created once per instance."""
+    vertexai.init(project=config.PROJECT_ID, location=config.REGION)
+    return GenerativeModel(config.GEMINI_MODEL_NAME)
+
+# Same approximation as rag_indexer's tokenizer: words are counted in pieces of
+# up to four characters, which overestimates the model's token count
+_APPROX_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+def plan_embedding_batches(texts: List[str]) -> List[Tuple[int, int]]:
+    """
+    Groups consecutive texts into (start, end) batches within the embedding
+    model's per-request instance and token limits, as rag_indexer's
+    plan_batches does. A text over the token limit gets a batch of its own.
+    """
+    batches = []
+    start = 0
+    batch_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = len(_APPROX_TOKEN_RE.findall(text))
+        if i > start and (i - start >= config.EMBEDDING_MAX_INSTANCES_PER_REQUEST or batch_tokens + tokens > config.EMBEDDING_MAX_TOKENS_PER_REQUEST):
+            batches.append((start, i))
+            start = i
+            batch_tokens = 0
+        batch_tokens += tokens
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
 def get_embeddings(text: str) -> List[float]:
     """Generates embeddings for the query text."""
+    vector = get_embeddings_batch([text])[0]
+    if vector is None:
+        raise RuntimeError("Embedding request failed")
+    return vector
+
+def get_embeddings_batch(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    Generates embeddings for several query texts, one request per batch from
+    plan_embedding_batches. The texts of a failed request get None, so the
+    other batches are still used.
+    """
+    model = embedding_model()
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    for start, end in plan_embedding_batches(texts):
+        try:
+            embeddings = model.get_embeddings(texts[start:end])
+        except Exception as e:
+            logger.error(f"Error generating embeddings for queries {start}-{end - 1}: {e}")
+            continue
+        vectors[start:end] = [embedding.values for embedding in embeddings]
+    return vectors
+
+def query_remote_index(embeddings: List[List[float]], num_neighbors: int, restricts: Optional[Dict[str, List[str]]] = None) -> List[List[RagReference]]:
+    """Queries the deployed Vertex AI Vector Search index, one result list per query."""
+    # Get Index Endpoint
+    # Vertex AI SDK requires the ID, not full name sometimes, but resource name is safer
+    # config.VERTEX_AI_ENDPOINT should be the full resource name
+    endpoint_id = config.VERTEX_AI_ENDPOINT.split('/')[-1]
+    index_endpoint = aiplatform.MatchingEngineIndexEndpoint(index_endpoint_name=endpoint_id)
+    
+    # Query
+    response = index_endpoint.find_neighbors(
+        deployed_index_id=config.DEPLOYED_INDEX_ID,
+        queries=embeddings,
+        num_neighbors=num_neighbors,
+        filter=[Namespace(name, tokens, []) for name, tokens in (restricts or {}).items()]
+    )
+    
+    results = []
+    for neighbors in (response or [[] for _ in embeddings]):
+        # Content is filled in afterwards from the chunk store (see hydrate_references)
+        results.append([
+            RagReference(id=neighbor.id, content_snippet="", score=neighbor.distance)
+            for neighbor in neighbors
+        ])
+    return results
+
+def query_local_index(index: LocalVectorIndex, embeddings: List[List[float]], num_neighbors: int, restricts: Optional[Dict[str, List[str]]] = None) -> List[List[RagReference]]:
+    """Queries the in-process vector index loaded from the rag_indexer snapshot."""
+    return [
+        [
+            RagReference(
+                id=datapoint_id,
+                content_snippet="",
+                score=score,
+                source=source or None
+            )
+            for datapoint_id, score, source in neighbors
+        ]
+        for neighbors in index.query(embeddings, num_neighbors=num_neighbors, restricts=restricts)
+    ]
+
+def query_lexical_index(snapshot: LocalSnapshot, query_terms: List[str], num_results: int, restricts: Optional[Dict[str, List[str]]] = None) -> List[RagReference]:
+    """Queries the in-process BM25 index loaded from the rag_indexer snapshot."""
+    allowed = snapshot.vectors.allowed_rows(restricts) if restricts else None
+    return [
+        RagReference(id=datapoint_id, content_snippet="", score=score)
+        for datapoint_id, score in snapshot.lexical.query(query_terms, num_results, allowed=allowed)
+    ]
+
+def hydrate_references(references: List[RagReference]) -> List[RagReference]:
+    """
+    Fills in chunk text and source for retrieved neighbours from the chunk store.
+
+    References whose chunk is missing from the store are dropped, since they
+    would only add an empty entry to the Gemini context.
+    """
+    return hydrate_references_batch([references])[0]
+
+def hydrate_references_batch(reference_lists: List[List[RagReference]]) -> List[List[RagReference]]:
+    """hydrate_references for several queries with a single chunk store read."""
+    if not any(reference_lists):
+        return reference_lists
+
     try:
-        model = TextEmbeddingModel.from_pretrained("textembedding-gecko@003")
-        embeddings = model.get_embeddings([text])
-        return embeddings[0].values
+        chunks = chunk_store.get_many(r.id for references in reference_lists for r in references)
     except Exception as e:
-        logger.error(f"Error generating embeddings: {e}")
-        raise
+        logger.error(f"Error fetching chunk content: {e}")
+        return [[] for _ in reference_lists]
+
+    hydrated_lists = []
+    for references in reference_lists:
+        hydrated = []
+        for reference in references:
+            chunk = chunks.get(reference.id)
+            if chunk is None:
+                continue
+            hydrated.append(reference.model_copy(update={
+                "content_snippet": chunk.get("content", ""),
+                "source": reference.source or chunk.get("document_url")
+            }))
+        hydrated_lists.append(hydrated)
+    return hydrated_lists
+
+def vector_neighbors(embeddings: List[List[float]], num_neighbors: int, restricts: Optional[Dict[str, List[str]]]) -> List[List[RagReference]]:
+    """
+    Nearest chunks for each embedding, not yet hydrated.
+
+    Depending on LOCAL_INDEX_MODE the in-process index is used as the primary
+    retriever or as a fallback when the remote Matching Engine query fails.
+    """
+    if config.LOCAL_INDEX_MODE == "primary":
+        snapshot = local_index_cache.get()
+        if snapshot is not None:
+            try:
+                return query_local_index(snapshot.vectors, embeddings, num_neighbors, restricts)
+            except Exception as e:
+                logger.error(f"Error querying local vector index, using remote index: {e}")
 
-def query_vector_search(query_text: str) -> List[RagReference]:
-    """Queries the Vertex AI Vector Search index."""
     try:
-        embedding = get_embeddings(query_text)
-        
-        # Get Index Endpoint
-        # Vertex AI SDK requires the ID, not full name sometimes, but resource name is safer
-        # config.VERTEX_AI_ENDPOINT should be the full resource name
-        endpoint_id = config.VERTEX_AI_ENDPOINT.split('/')[-1]
-        index_endpoint = aiplatform.MatchingEngineIndexEndpoint(index_endpoint_name=endpoint_id)
-        
-        # Query
-        response = index_endpoint.find_neighbors(
-            deployed_index_id=config.DEPLOYED_INDEX_ID,
-            queries=[embedding],
-            num_neighbors=config.MAX_NEIGHBORS
-        )
-        
-        references = []
-        if response:
-            for neighbor in response[0]:
-                # In a real system, we would fetch the actual text content from a Datastore/DB using the ID
-                # Since we don't have a separate doc store set up in this task scope, 
-                # we will use the ID or look up if we had a mapping.
-                # For now, we assume the ID helps identifying the source.
-                references.append(RagReference(
-                    id=neighbor.id,
-                    content_snippet=f"Content for {neighbor.id} (Placeholder for actual content retrieval)", 
-                    score=neighbor.distance
-                ))
-        return references
+        return query_remote_index(embeddings, num_neighbors, restricts)
     except Exception as e:
         logger.error(f"Error querying vector search: {e}")
-        # Fail gracefully for RAG, return empty list
-        return []
 
-def generate_assessment(request_data: AssessmentRequest, references: List[RagReference]) -> Dict[str, Any]:
-    """Generates the assessment using Gemini 1.5 Pro."""
+    if config.LOCAL_INDEX_MODE == "fallback":
+        snapshot = local_index_cache.get()
+        if snapshot is not None:
+            logger.warning("Falling back to local vector index")
+            try:
+                return query_local_index(snapshot.vectors, embeddings, num_neighbors, restricts)
+            except Exception as e:
+                logger.error(f"Error querying local vector index: {e}")
+
+    return [[] for _ in embeddings]
+
+def retrieve_context(query_texts: List[str], embeddings: List[List[float]], restricts_list: List[Dict[str, List[str]]], timer: RetrievalTimer) -> List[List[RagReference]]:
+    """
+    Retrieves context chunks for several queries, recording stage timings.
+
+    With HYBRID_RETRIEVAL and a loaded snapshot, vector neighbours and BM25
+    matches are fused by reciprocal rank and reranked locally, so exact-term
+    matches (case names, statutory phrases) are not lost and fewer, better
+    chunks reach the prompt. Queries sharing the same restricts go to the
+    vector index in one call, and all candidates are hydrated in one read.
+    """
+    # Hybrid retrieval needs the snapshot's BM25 index (loaded once, then cached)
+    snapshot = None
+    if config.HYBRID_RETRIEVAL:
+        with timer.stage("snapshot"):
+            snapshot = local_index_cache.get()
+
+    hybrid = snapshot is not None
+    num_neighbors = config.HYBRID_CANDIDATES if hybrid else config.MAX_NEIGHBORS
+
+    # A vector query applies one filter to all its queries, so group them by restricts
+    groups: Dict[str, List[int]] = {}
+    for position, restricts in enumerate(restricts_list):
+        groups.setdefault(json.dumps(restricts, sort_keys=True), []).append(position)
+
+    vector_refs: List[List[RagReference]] = [[] for _ in query_texts]
+    with timer.stage("vector"):
+        for positions in groups.values():
+            results = vector_neighbors([embeddings[p] for p in positions], num_neighbors, restricts_list[positions[0]])
+            for position, references in zip(positions, results):
+                vector_refs[position] = references
+
+    if not hybrid:
+        with timer.stage("hydrate"):
+            return hydrate_references_batch(vector_refs)
+
+    query_terms = [analyze(query_text) for query_text in query_texts]
+    lexical_refs = []
+    with timer.stage("lexical"):
+        for terms, restricts in zip(query_terms, restricts_list):
+            try:
+                lexical_refs.append(query_lexical_index(snapshot, terms, config.HYBRID_CANDIDATES, restricts))
+            except Exception as e:
+                logger.error(f"Error querying lexical index: {e}")
+                lexical_refs.append([])
+
+    fused_refs = []
+    with timer.stage("fusion"):
+        for vector, lexical in zip(vector_refs, lexical_refs):
+            fused = reciprocal_rank_fusion([[r.id for r in vector], [r.id for r in lexical]], k=config.RRF_K)
+            sources = {r.id: r.source for r in vector if r.source}
+            fused_refs.append([
+                RagReference(id=datapoint_id, content_snippet="", score=score, source=sources.get(datapoint_id))
+                for datapoint_id, score in fused[:config.HYBRID_CANDIDATES]
+            ])
+
+    with timer.stage("hydrate"):
+        candidate_lists = hydrate_references_batch(fused_refs)
+
+    results = []
+    with timer.stage("rerank"):
+        for terms, candidates in zip(query_terms, candidate_lists):
+            by_id = {r.id: r for r in candidates}
+            ranked = rerank(
+                terms,
+                [(r.id, r.content_snippet, r.score) for r in candidates],
+                snapshot.lexical.term_idf,
+                top_k=config.RERANK_TOP_K,
+                fusion_weight=config.RERANK_FUSION_WEIGHT,
+                coverage_weight=config.RERANK_COVERAGE_WEIGHT,
+                phrase_weight=config.RERANK_PHRASE_WEIGHT
+            )
+            results.append([by_id[datapoint_id].model_copy(update={"score": score}) for datapoint_id, score in ranked])
+
+    logger.info(f"Hybrid retrieval: {len(query_texts)} queries, {sum(map(len, vector_refs))} vector + {sum(map(len, lexical_refs))} lexical candidates -> {sum(map(len, results))} chunks")
+    return results
+
+def query_vector_search(query_text: str, restricts: Optional[Dict[str, List[str]]] = None) -> Tuple[List[RagReference], Dict[str, float]]:
+    """
+    Retrieves context chunks for the query text, returning them with the
+    per-stage retrieval latency in milliseconds.
+
+    `restricts` limits the search to chunks indexed with matching namespace
+    tokens; it defaults to RAG_RESTRICTS.
+    """
+    references, timings = query_vector_search_batch([query_text], [restricts])
+    # Fail gracefully for RAG: a single assessment goes ahead without context
+    return references[0] or [], timings
+
+def query_vector_search_batch(query_texts: List[str], restricts_list: List[Optional[Dict[str, List[str]]]]) -> Tuple[List[Optional[List[RagReference]]], Dict[str, float]]:
+    """
+    query_vector_search for several queries, with batched embedding calls.
+    Queries whose embedding failed get None instead of a reference list. The
+    latency report covers the whole batch.
+    """
+    restricts_list = [config.RAG_RESTRICTS if restricts is None else restricts for restricts in restricts_list]
+
+    timer = RetrievalTimer()
     try:
-        vertexai.init(project=config.PROJECT_ID, location=config.REGION)
-        model = GenerativeModel(config.GEMINI_MODEL_NAME)
-        
-        context = "\n".join([f"- {r.id}: {r.content_snippet}" for r in references])
-        
-        prompt = f"""
-        You are an expert IR35 Compliance Officer. 
-        Assess the following engagement based on the provided details and the relevant case law/guidelines (Context).
-        
-        Context:
-        {context}
-        
-        Engagement Details:
-        Role: {request_data.role_details}
-        Contract Type: {request_data.contract_type}
-        Answers: {request_data.answers}
-        
-        Provide a JSON response with the following fields:
-        - determination: "Inside IR35" or "Outside IR35"
-        - confidence_score: float between 0.0 and 1.0
-        - reasoning: Detailed explanation citing the context where applicable.
-        """
-        
-        generation_config = GenerationConfig(
-            temperature=0.2,
-            top_p=0.8,
-            top_k=40,
-            response_mime_type="application/json"
+        with timer.stage("embedding"):
+            embeddings = get_embeddings_batch(query_texts)
+    except Exception as e:
+        logger.error(f"Error querying vector search: {e}")
+        return [None for _ in query_texts], timer.report()
+
+    embedded = [position for position, embedding in enumerate(embeddings) if embedding is not None]
+    references: List[Optional[List[RagReference]]] = [None] * len(query_texts)
+    if embedded:
+        results = retrieve_context(
+            [query_texts[p] for p in embedded],
+            [embeddings[p] for p in embedded],
+            [restricts_list[p] for p in embedded],
+            timer
         )
-        
-        response = model.generate_content(prompt, generation_config=generation_config)
-        
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse Gemini response: {response.text}")
-            # Fallback
-            return {
-                "determination": "Undetermined",
-                "confidence_score": 0.0,
-                "reasoning": "Failed to parse AI response."
-            }
+        for position, result in zip(embedded, results):
+            references[position] = result
+    return references, log_retrieval_latency(timer)
+
+def log_retrieval_latency(timer: RetrievalTimer) -> Dict[str, float]:
+    """Returns the timer's report, warning when retrieval exceeded its budget."""
+    timings = timer.report()
+    if timings["total"] > config.RETRIEVAL_BUDGET_MS:
+        logger.warning(f"Retrieval took {timings['total']} ms (budget {config.RETRIEVAL_BUDGET_MS} ms): {timings}")
+    return timings
+
+GENERATION_CONFIG = GenerationConfig(
+    temperature=0.2,
+    top_p=0.8,
+    top_k=40,
+    response_mime_type="application/json"
+)
+
+def generate_assessment(model: GenerativeModel, prompt: str) -> Dict[str, Any]:
+    """Generates the assessment using Gemini 1.5 Pro."""
+    try:
+        response = model.generate_content(prompt, generation_config=GENERATION_CONFIG)
+        return parse_assessment(response.text)
             
     except Exception as e:
         logger.error(f"Error generating assessment: {e}")
         raise
 
+def generate_assessment_stream(model: GenerativeModel, prompt: str) -> Iterator[str]:
+    """Streams the assessment JSON text from Gemini as it is generated."""
+    try:
+        for chunk in model.generate_content(prompt, generation_config=GENERATION_CONFIG, stream=True):
+            yield chunk.text
+    except Exception as e:
+        logger.error(f"Error generating assessment: {e}")
+        raise
+
+def wait_for_audits(written: List[Future]):
+    """
+    Waits up to AUDIT_WAIT_SECONDS for queued audit records. Called before a
+    response is complete, while the instance still has CPU allocated.
+    """
+    _, not_done = wait(written, timeout=config.AUDIT_WAIT_SECONDS)
+    if not_done:
+        logger.warning(f"{len(not_done)} audit records still queued after {config.AUDIT_WAIT_SECONDS}s")
+
+def record_audits(assessments: List[Tuple[AssessmentRequest, AssessmentResponse]]):
+    """
+    Writes the audit records of a batch with Firestore batched writes. Records
+    of a failed write are retried through the audit queue, and waited for.
+    """
+    retried = []
+    for start in range(0, len(assessments), config.FIRESTORE_BATCH_SIZE):
+        records = [
+            (request_data.engagement_id, {"request": request_data.model_dump(), "response": response.model_dump()})
+            for request_data, response in assessments[start:start + config.FIRESTORE_BATCH_SIZE]
+        ]
+        batch = db.batch()
+        for doc_id, record in records:
+            batch.set(db.collection(config.FIRESTORE_COLLECTION).document(doc_id), {**record, "timestamp": firestore.SERVER_TIMESTAMP})
+        try:
+            batch.commit()
+        except Exception as e:
+            logger.error(f"Error writing {len(records)} audit records, queueing for retry: {e}")
+            for doc_id, record in records:
+                retried.append(audit_queue.submit(doc_id, record))
+    if retried:
+        wait_for_audits(retried)
+
+def assessment_events(data: AssessmentRequest) -> Iterator[str]:
+    """Server-sent events for a streamed assessment, ending in `result` or `error`."""
+    try:
+        for event, payload in stream_assessment(
+            data,
+            retrieve=query_vector_search,
+            load_model=generative_model,
+            generate_stream=generate_assessment_stream,
+            record_audit=record_audit,
+            wait_for_audits=wait_for_audits,
+            executor=executor
+        ):
+            yield format_sse(event, payload)
+    except Exception as e:
+        # Headers are already sent, so report the failure in the stream
+        logger.error(f"Internal Error: {e}", exc_info=True)
+        yield format_sse("error", {"error": "Internal Server Error"})
+
+def record_audit(request_data: AssessmentRequest, response: AssessmentResponse) -> Future:
+    """
+    Queues the Firestore audit record for an assessment, returning the
+    future to pass to wait_for_audits.
+    """
+    return audit_queue.submit(request_data.engagement_id, {
+        "request": request_data.model_dump(),
+        "response": response.model_dump()
+    })
+
 @functions_framework.http
 def assess_engagement(request):
     """HTTP Cloud Function entry point."""
@@ -130,7 +470,7 @@ def assess_engagement(request):
         headers = {
             'Access-Control-Allow-Origin': '*',
             'Access-Control-Allow-Methods': 'POST',
-            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Headers': 'Content-Type, Accept',
             'Access-Control-Max-Age': '3600'
         }
         return ('', 204, headers)
@@ -149,34 +489,102 @@ def assess_engagement(request):
             data = AssessmentRequest(**request_json)
         except Exception as e:
             return (json.dumps({"error": f"Validation Error: {str(e)}"}), 400, headers)
+
+        # Streaming mode: ?stream=true or Accept: text/event-stream
+        if request.args.get('stream') == 'true' or 'text/event-stream' in request.headers.get('Accept', ''):
+            headers.update({'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+            return Response(assessment_events(data), status=200, headers=headers, mimetype='text/event-stream')
             
-        # RAG
-        references = query_vector_search(data.role_details)
-        
-        # Gemini
-        ai_result = generate_assessment(data, references)
-        
-        # Construct Response
-        response = AssessmentResponse(
-            assessment_id=f"{data.engagement_id}-{int(time.time())}",
-            status="Completed",
-            determination=ai_result.get("determination", "Undetermined"),
-            confidence_score=ai_result.get("confidence_score", 0.0),
-            reasoning=ai_result.get("reasoning", ""),
-            rag_references=references,
-            timestamp=datetime.utcnow().isoformat()
+        # RAG and model loading overlap
+        response, written = run_assessment(
+            data,
+            retrieve=query_vector_search,
+            load_model=generative_model,
+            generate=generate_assessment,
+            record_audit=record_audit,
+            executor=executor
         )
+
+        # The audit record is written while the response is serialised
+        body = response.model_dump_json()
+        wait_for_audits([written])
+        return (body, 200, headers)
         
-        # Audit Log (Firestore)
-        doc_ref = db.collection(config.FIRESTORE_COLLECTION).document(data.engagement_id)
-        doc_ref.set({
-            "request": data.model_dump(),
-            "response": response.model_dump(),
-            "timestamp": firestore.SERVER_TIMESTAMP
-        })
-        
+    except Exception as e:
+        logger.error(f"Internal Error: {e}", exc_info=True)
+        return (json.dumps({"error": "Internal Server Error"}), 500, headers)
+
+@functions_framework.http
+def assess_engagements_batch(request):
+    """
+    HTTP Cloud Function entry point for bulk reassessment.
+
+    Accepts {"requests": [AssessmentRequest, ...]} and returns every
+    successful assessment plus per-item failures (by index), so one invalid
+    or failed engagement does not fail the batch.
+    """
+    
+    # CORS headers
+    if request.method == 'OPTIONS':
+        headers = {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'POST',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Max-Age': '3600'
+        }
+        return ('', 204, headers)
+
+    headers = {
+        'Access-Control-Allow-Origin': '*'
+    }
+
+    try:
+        request_json = request.get_json(silent=True)
+        if not request_json:
+             return (json.dumps({"error": "Invalid JSON"}), 400, headers)
+
+        # Validation
+        try:
+            batch = BatchAssessmentRequest(**request_json)
+        except Exception as e:
+            return (json.dumps({"error": f"Validation Error: {str(e)}"}), 400, headers)
+        if not batch.requests or len(batch.requests) > config.BATCH_MAX_ITEMS:
+            return (json.dumps({"error": f"Batch must contain 1 to {config.BATCH_MAX_ITEMS} requests"}), 400, headers)
+
+        failures = []
+        valid = []
+        for index, item in enumerate(batch.requests):
+            try:
+                valid.append((index, AssessmentRequest(**item)))
+            except Exception as e:
+                failures.append(BatchItemFailure(index=index, engagement_id=item.get("engagement_id"), error=f"Validation Error: {str(e)}"))
+
+        results = []
+        if valid:
+            outcomes = run_batch_assessment(
+                [data for _, data in valid],
+                retrieve_many=query_vector_search_batch,
+                load_model=generative_model,
+                generate=generate_assessment,
+                record_audits=record_audits,
+                concurrency=config.BATCH_GENERATION_CONCURRENCY,
+                audit_batch_size=config.AUDIT_BATCH_SIZE
+            )
+            for (index, data), outcome in zip(valid, outcomes):
+                if isinstance(outcome, AssessmentResponse):
+                    results.append(outcome)
+                elif isinstance(outcome, RetrievalFailed):
+                    failures.append(BatchItemFailure(index=index, engagement_id=data.engagement_id, error="Retrieval failed"))
+                else:
+                    failures.append(BatchItemFailure(index=index, engagement_id=data.engagement_id, error="Assessment failed"))
+
+        failures.sort(key=lambda failure: failure.index)
+        status = "Completed" if not failures else ("Partial" if results else "Failed")
+        logger.info(f"Batch assessment: {len(results)} completed, {len(failures)} failed")
+
+        response = BatchAssessmentResponse(status=status, results=results, failures=failures)
         return (response.model_dump_json(), 200, headers)
-        
+
     except Exception as e:
         logger.error(f"Internal Error: {e}", exc_info=True)
         return (json.dumps({"error": "Internal Server Error"}), 500, headers)
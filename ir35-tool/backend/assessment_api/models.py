@@ -6,6 +6,7 @@ class AssessmentRequest(BaseModel):
     role_details: str = Field(..., description="Description of the role and responsibilities")
     contract_type: Optional[str] = Field(None, description="Type of contract (e.g., 'Ltd', 'PAYE')")
     answers: Dict[str, Any] = Field(..., description="Key-value pairs of CEST questionnaire answers")
+    restricts: Optional[Dict[str, List[str]]] = Field(None, description="Limits RAG context to chunks tagged with these namespace tokens (e.g. {'doc_type': ['case_law']})")
 
 class RagReference(BaseModel):
     id: str
@@ -20,4 +21,18 @@ class AssessmentResponse(BaseModel):
     confidence_score: float
     reasoning: str
     rag_references: List[RagReference]
+    retrieval_latency_ms: Optional[Dict[str, float]] = None
     timestamp: str
+
+class BatchAssessmentRequest(BaseModel):
+    requests: List[Dict[str, Any]] = Field(..., description="AssessmentRequest payloads, validated individually")
+
+class BatchItemFailure(BaseModel):
+    index: int
+    engagement_id: Optional[str] = None
+    error: str
+
+class BatchAssessmentResponse(BaseModel):
+    status: str
+    results: List[AssessmentResponse]
+    failures: List[BatchItemFailure]
@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Callable, Iterator
+
+from lexical import analyze
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuses ranked ID lists with reciprocal rank fusion: each ID scores
+    sum(1 / (k + rank)) over the lists it appears in.
+
+    Only ranks are used, so vector distances and BM25 scores need no
+    normalisation against each other.
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, datapoint_id in enumerate(ranking, start=1):
+            fused[datapoint_id] = fused.get(datapoint_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+def rerank(
+    query_terms: List[str],
+    candidates: List[Tuple[str, str, float]],
+    term_idf: Callable[[str], float],
+    top_k: int,
+    fusion_weight: float,
+    coverage_weight: float,
+    phrase_weight: float
+) -> List[Tuple[str, float]]:
+    """
+    Re-scores fused (id, text, fused score) candidates and returns the top_k
+    (id, score) pairs.
+
+    The score blends the fused rank score (scaled to the best candidate) with
+    the IDF-weighted share of distinct query terms in the chunk and the share
+    of query bigrams it contains, which favours chunks quoting exact phrases
+    such as case names or "mutuality of obligation".
+    """
+    if not candidates:
+        return []
+
+    distinct_terms = set(query_terms)
+    term_weights = {term: term_idf(term) for term in distinct_terms}
+    total_weight = sum(term_weights.values()) or 1.0
+    query_bigrams = set(zip(query_terms, query_terms[1:]))
+    best_fused = max(score for _, _, score in candidates) or 1.0
+
+    scored = []
+    for datapoint_id, text, fused_score in candidates:
+        terms = analyze(text)
+        term_set = set(terms)
+        coverage = sum(weight for term, weight in term_weights.items() if term in term_set) / total_weight
+        phrases = len(query_bigrams & set(zip(terms, terms[1:]))) / len(query_bigrams) if query_bigrams else 0.0
+        score = fusion_weight * fused_score / best_fused + coverage_weight * coverage + phrase_weight * phrases
+        scored.append((datapoint_id, score))
+
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:top_k]
+
+class RetrievalTimer:
+    """
+    Records wall-clock milliseconds per retrieval stage for one request.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+    def report(self) -> Dict[str, float]:
+        """Stage timings plus `total`, the time since the timer was created."""
+        return {**self.timings, "total": round((time.perf_counter() - self._start) * 1000, 1)}
@@ -0,0 +1,106 @@
+import re
+import json
+from typing import List, Dict, Any, Tuple, Optional
+
+_DETERMINATION_RE = re.compile(r'"determination"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_CONFIDENCE_RE = re.compile(r'"confidence_score"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*[,}\s]')
+_REASONING_START_RE = re.compile(r'"reasoning"\s*:\s*"')
+
+def format_sse(event: str, data: Any) -> str:
+    """Formats one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _escape_end(text: str, i: int) -> Optional[int]:
+    """
+    End of the JSON escape sequence starting at text[i], or None if the text
+    does not contain all of it yet. A high surrogate escape ends after the
+    low surrogate escape that follows it, so the pair is decoded together.
+    """
+    if i + 1 >= len(text):
+        return None
+    if text[i + 1] != "u":
+        return i + 2
+    end = i + 6
+    if end > len(text):
+        return None
+    if "d800" <= text[i + 2:end].lower() <= "dbff":
+        if end + 2 > len(text):
+            return None
+        if text[end:end + 2] == "\\u":
+            return end + 6 if end + 6 <= len(text) else None
+    return end
+
+class PartialAssessmentParser:
+    """
+    Extracts assessment fields from Gemini's JSON output while it streams.
+
+    `feed` takes the next text chunk and returns the events it completes:
+    ("determination", str) and ("confidence_score", float) once each, and
+    ("reasoning", delta) for each new piece of the reasoning string.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._sent: Dict[str, Any] = {}
+        # Start of the reasoning string body, and how far into it has been emitted
+        self._reasoning_start: Optional[int] = None
+        self._reasoning_scan = 0
+        self._reasoning_done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.text += chunk
+        events = []
+
+        if "determination" not in self._sent:
+            match = _DETERMINATION_RE.search(self.text)
+            if match:
+                self._sent["determination"] = json.loads(f'"{match.group(1)}"')
+                events.append(("determination", self._sent["determination"]))
+
+        if "confidence_score" not in self._sent:
+            match = _CONFIDENCE_RE.search(self.text)
+            if match:
+                self._sent["confidence_score"] = float(match.group(1))
+                events.append(("confidence_score", self._sent["confidence_score"]))
+
+        if not self._reasoning_done:
+            delta = self._reasoning_delta()
+            if delta:
+                events.append(("reasoning", delta))
+        return events
+
+    def _reasoning_delta(self) -> Optional[str]:
+        """
+        Decodes the reasoning text added since the last call. Scanning
+        resumes where it stopped, before any escape sequence that is not
+        complete yet, so each character is scanned and decoded once.
+        """
+        if self._reasoning_start is None:
+            start = _REASONING_START_RE.search(self.text)
+            if not start:
+                return None
+            self._reasoning_start = self._reasoning_scan = start.end()
+
+        # Scan to the closing quote, skipping escaped characters
+        i = self._reasoning_scan
+        while i < len(self.text):
+            if self.text[i] == "\\":
+                end = _escape_end(self.text, i)
+                if end is None:
+                    break
+                i = end
+                continue
+            if self.text[i] == '"':
+                self._reasoning_done = True
+                break
+            i += 1
+
+        raw = self.text[self._reasoning_scan:i]
+        self._reasoning_scan = i
+        if not raw:
+            return None
+        try:
+            return json.loads(f'"{raw}"', strict=False)
+        except json.JSONDecodeError:
+            # Malformed escape; the full parse at the end reports it
+            return None
@@ -0,0 +1,122 @@
+import io
+import re
+from typing import List, Dict, Any, Iterator, Tuple
+
+import pypdf
+
+import config
+from tokenizer import count_tokens, split_tokens, tail_tokens
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+
+# Words whose trailing full stop does not end a sentence
+_ABBREVIATIONS = {"v", "vs", "no", "nos", "para", "paras", "s", "ss", "reg", "art", "e.g", "i.e", "etc", "cf", "ltd", "co", "mr", "mrs", "ms", "dr", "st", "j", "lj", "sch"}
+
+def extract_text(pdf_content: bytes) -> str:
+    """
+    Extracts the text of a PDF, separating pages with blank lines.
+    """
+    pdf_file = io.BytesIO(pdf_content)
+    reader = pypdf.PdfReader(pdf_file)
+    
+    text = ""
+    # We'll rely on double newlines for paragraphs. 
+    # pypdf sometimes extracts text cleanly, sometimes not.
+    for page in reader.pages:
+        page_text = page.extract_text()
+        if page_text:
+            page_text = page_text.replace('\x00', '')
+            text += page_text + "\n\n"
+    return text
+
+def split_sentences(paragraph: str) -> List[str]:
+    """
+    Splits a paragraph at sentence boundaries, ignoring full stops after
+    common abbreviations (e.g. "v." in case names).
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY_RE.finditer(paragraph):
+        word_start = max(start, paragraph.rfind(" ", start, match.start()) + 1)
+        if paragraph[word_start:match.start()].rstrip(".!?").lower() in _ABBREVIATIONS:
+            continue
+        sentences.append(paragraph[start:match.start()])
+        start = match.end()
+    sentences.append(paragraph[start:])
+    return [sentence for sentence in sentences if sentence]
+
+def _units(paragraph: str, max_tokens: int) -> Iterator[Tuple[str, int]]:
+    """
+    Yields (text, token_count) units of at most `max_tokens` tokens: the whole
+    paragraph if it fits, otherwise its sentences, splitting any sentence that
+    is still too long on token boundaries.
+    """
+    tokens = count_tokens(paragraph)
+    if tokens <= max_tokens:
+        yield paragraph, tokens
+        return
+
+    for sentence in split_sentences(paragraph):
+        sentence_tokens = count_tokens(sentence)
+        if sentence_tokens <= max_tokens:
+            yield sentence, sentence_tokens
+        else:
+            for piece in split_tokens(sentence, max_tokens):
+                yield piece, count_tokens(piece)
+
+def _overlap(units: List[Tuple[str, int]], overlap_tokens: int) -> str:
+    """Returns the last `overlap_tokens` tokens of a chunk's units."""
+    tail = []
+    tail_tokens_count = 0
+    for text, tokens in reversed(units):
+        if tail_tokens_count >= overlap_tokens:
+            break
+        tail.append(text)
+        tail_tokens_count += tokens
+    return tail_tokens(" ".join(reversed(tail)), overlap_tokens)
+
+def chunk_text(text: str) -> List[Dict[str, Any]]:
+    """
+    Chunks extracted text into segments of at most CHUNK_SIZE tokens.
+
+    Paragraphs are kept whole when they fit; oversized paragraphs are split at
+    sentence boundaries. Each chunk after the first starts with the last
+    CHUNK_OVERLAP tokens of the previous one. Every paragraph is tokenized a
+    bounded number of times, so the whole pass is linear in the document size.
+    """
+    # Units leave room for the overlap so no chunk exceeds CHUNK_SIZE
+    max_unit_tokens = config.CHUNK_SIZE - config.CHUNK_OVERLAP
+
+    chunks = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+
+    def finalize():
+        content = " ".join(unit for unit, _ in current)
+        # Recounted: token boundaries can shift across the joining spaces
+        chunks.append({
+            "content": content,
+            "metadata": {"chunk_index": len(chunks), "source_type": "pdf", "token_count": count_tokens(content)}
+        })
+
+    for paragraph in _PARAGRAPH_RE.split(text):
+        # pypdf breaks lines mid-paragraph; normalise whitespace
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+
+        for unit, tokens in _units(paragraph, max_unit_tokens):
+            if current and current_tokens + tokens > config.CHUNK_SIZE:
+                finalize()
+                overlap = _overlap(current, config.CHUNK_OVERLAP)
+                current = [(overlap, count_tokens(overlap))] if overlap else []
+                current_tokens = current[0][1] if current else 0
+
+            current.append((unit, tokens))
+            current_tokens += tokens
+
+    if current:
+        finalize()
+
+    return chunks
@@ -7,14 +7,54 @@ VERTEX_AI_ENDPOINT = os.environ.get("VERTEX_AI_ENDPOINT")
 VERTEX_AI_INDEX_NAME = os.environ.get("VERTEX_AI_INDEX_NAME") # Resource Name for the Index
 
 # Chunking Configuration
-CHUNK_SIZE = 512  # Target tokens
+CHUNK_SIZE = 512  # Maximum tokens per chunk
 CHUNK_OVERLAP = 50 # Tokens overlap
+TOKENIZER_ENCODING = "cl100k_base" # tiktoken encoding used to count tokens
+# The encoding's BPE file ships with the function (written by vendor_tokenizer.py),
+# so a cold start never downloads it
+TOKENIZER_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiktoken_cache")
+# Offline development only: approximate token counts with a regex. Chunk
+# boundaries, and so datapoint ids, differ from tiktoken's; never index with it
+TOKENIZER_APPROXIMATE = os.environ.get("TOKENIZER_APPROXIMATE") == "1"
 
 # Embedding Configuration
 EMBEDDING_MODEL = "textembedding-gecko@003"
 EMBEDDING_DIMENSIONS = 768
-BATCH_SIZE = 5
+# Per-request limits: 250 texts in us-central1 (5 elsewhere), 20k input tokens
+EMBEDDING_MAX_INSTANCES_PER_REQUEST = 250 if REGION == "us-central1" else 5
+EMBEDDING_MAX_TOKENS_PER_REQUEST = 20000
+EMBEDDING_CONCURRENCY = int(os.environ.get("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_REQUESTS_PER_MINUTE = int(os.environ.get("EMBEDDING_REQUESTS_PER_MINUTE", "300"))
 MAX_RETRIES = 3
 
 # Index Configuration
 DEPLOYED_INDEX_ID = "ir35_cest_deployed"
+UPSERT_MAX_DATAPOINTS_PER_REQUEST = 500
+UPSERT_MAX_REQUEST_BYTES = 4 * 1024 * 1024 # Well under the 10 MB request limit
+UPSERT_CONCURRENCY = int(os.environ.get("UPSERT_CONCURRENCY", "4"))
+RESTRICT_NAMESPACES = ("doc_type", "jurisdiction", "year") # Allowed datapoint restrict namespaces
+
+# Firestore Configuration
+CHUNK_COLLECTION = "ir35_chunks" # Read by assessment_api to hydrate neighbours
+MANIFEST_COLLECTION = "ir35_index_manifests" # Per-document chunk hash -> datapoint ID manifests
+JOB_COLLECTION = "ir35_index_jobs" # Bulk indexing checkpoints
+FIRESTORE_BATCH_SIZE = 500 # Firestore limit on writes per batch
+
+# Local Index Snapshot Configuration
+# gs:// prefix for per-document embedding shards loaded by the assessment API's
+# in-process vector index. Snapshots are not written when unset.
+LOCAL_INDEX_SNAPSHOT_URI = os.environ.get("LOCAL_INDEX_SNAPSHOT_URI")
+
+# Bulk Indexing Configuration
+BULK_WORKERS = {"download": 4, "extract": 2, "chunk": 1, "embed": 2, "upsert": 2}
+BULK_QUEUE_SIZE = 4 # Documents buffered between pipeline stages
+BULK_TIME_BUDGET_SECONDS = int(os.environ.get("BULK_TIME_BUDGET_SECONDS", "420")) # Function timeout is 540s
+
+# Secret Cache Configuration
+# Secrets are cached per instance and refreshed in the background before the
+# TTL runs out; a value up to SECRET_MAX_STALE_SECONDS past its TTL is served
+# while a refresh is in flight.
+SECRET_TTL_SECONDS = int(os.environ.get("SECRET_TTL_SECONDS", "300"))
+SECRET_REFRESH_AHEAD_SECONDS = 60
+SECRET_MAX_STALE_SECONDS = int(os.environ.get("SECRET_MAX_STALE_SECONDS", "3600"))
+PRELOAD_SECRETS = [name for name in os.environ.get("PRELOAD_SECRETS", "").split(",") if name] # Loaded in the background on the first secret read
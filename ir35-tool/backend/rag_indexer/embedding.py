@@ -0,0 +1,132 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Callable, Sequence, Optional
+
+import numpy as np
+
+from tokenizer import count_tokens
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+def plan_batches(texts: Sequence[str], max_instances: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """
+    Groups consecutive texts into (start, end) batches that respect the model's
+    per-request instance and token limits.
+
+    A single text larger than `max_tokens` gets a batch of its own; the model
+    truncates it rather than rejecting the request.
+    """
+    batches = []
+    start = 0
+    batch_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if i > start and (i - start >= max_instances or batch_tokens + tokens > max_tokens):
+            batches.append((start, i))
+            start = i
+            batch_tokens = 0
+        batch_tokens += tokens
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for quota errors (google.api_core ResourceExhausted / HTTP 429)."""
+    return getattr(error, "code", None) == 429
+
+class RateLimiter:
+    """
+    Spaces requests evenly to stay under a requests-per-minute quota.
+
+    On a 429 the rate is halved and all workers pause for the backoff delay;
+    each success then recovers the rate by 10% up to the configured maximum.
+    """
+
+    def __init__(self, requests_per_minute: float):
+        self.max_rate = requests_per_minute / 60.0
+        self.rate = self.max_rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def backoff(self, delay: float):
+        with self._lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self._next_slot = max(self._next_slot, time.monotonic() + delay)
+
+    def recover(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate * 1.1)
+
+def embed_texts(
+    embed_fn: EmbedFn,
+    texts: Sequence[str],
+    max_instances: int,
+    max_tokens: int,
+    concurrency: int,
+    requests_per_minute: float,
+    max_retries: int,
+    limiter: Optional[RateLimiter] = None
+) -> np.ndarray:
+    """
+    Embeds texts with concurrent, rate-limited batch requests.
+
+    Returns a float32 matrix with one row per text (4 bytes per value rather
+    than a Python float object per value). Batches are submitted to a bounded
+    thread pool and results are written back by batch offset, so the row
+    order always matches the input order. Pass a shared `limiter` when
+    several documents are embedded at once so they stay under one quota
+    together.
+    """
+    batches = plan_batches(texts, max_instances, max_tokens)
+    limiter = limiter or RateLimiter(requests_per_minute)
+    results: List[Optional[np.ndarray]] = [None] * len(batches)
+
+    def run_batch(batch_index: int):
+        start, end = batches[batch_index]
+        batch_texts = list(texts[start:end])
+        retry_count = 0
+        while True:
+            limiter.acquire()
+            try:
+                vectors = embed_fn(batch_texts)
+                if len(vectors) != len(batch_texts):
+                    raise ValueError(f"Expected {len(batch_texts)} embeddings, got {len(vectors)}")
+                results[batch_index] = np.asarray(vectors, dtype=np.float32)
+                limiter.recover()
+                return
+            except Exception as e:
+                retry_count += 1
+                logger.warning(f"Error generating embeddings for chunks {start}-{end} (attempt {retry_count}): {e}")
+                if retry_count == max_retries:
+                    raise
+                delay = 2 ** retry_count # Exponential backoff
+                if is_rate_limited(e):
+                    limiter.backoff(delay)
+                else:
+                    time.sleep(delay)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(run_batch, batch_index) for batch_index in range(len(batches))]
+        try:
+            for future in futures:
+                future.result()
+        except Exception:
+            # Don't start queued batches once one has exhausted its retries
+            for future in futures:
+                future.cancel()
+            raise
+
+    logger.info(f"Embedded {len(texts)} chunks in {len(batches)} requests")
+    return np.vstack(results) if results else np.empty((0, 0), dtype=np.float32)
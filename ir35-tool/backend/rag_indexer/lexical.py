@@ -0,0 +1,50 @@
+import re
+from typing import List, Dict
+
+import numpy as np
+
+# Must stay in step with assessment_api/lexical.py, which analyses queries
+# against the term statistics written here.
+_TERM_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have he her his i if in into is it its
+not of on or our she such that the their them then there these they this to was we were
+which will with would you your
+""".split())
+
+def analyze(text: str) -> List[str]:
+    """
+    Lower-cases a text and splits it into BM25 terms, dropping stopwords.
+    """
+    return [term for term in _TERM_RE.findall(text.lower()) if term not in _STOPWORDS]
+
+def term_statistics(texts: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Builds per-chunk term frequencies for a document's chunks in COO form.
+
+    Returns the document vocabulary (`terms`), one (row, term_id, count)
+    triple per distinct term in each chunk, and each chunk's term count
+    (`lengths`), ready to be stored in the snapshot shard.
+    """
+    vocabulary: Dict[str, int] = {}
+    rows, term_ids, counts, lengths = [], [], [], []
+    for row, text in enumerate(texts):
+        terms = analyze(text)
+        lengths.append(len(terms))
+        frequencies: Dict[int, int] = {}
+        for term in terms:
+            term_id = vocabulary.setdefault(term, len(vocabulary))
+            frequencies[term_id] = frequencies.get(term_id, 0) + 1
+        for term_id, count in frequencies.items():
+            rows.append(row)
+            term_ids.append(term_id)
+            counts.append(count)
+
+    return {
+        "terms": np.array(list(vocabulary), dtype=np.str_),
+        "rows": np.array(rows, dtype=np.int32),
+        "term_ids": np.array(term_ids, dtype=np.int32),
+        "counts": np.array(counts, dtype=np.int32),
+        "lengths": np.array(lengths, dtype=np.int32)
+    }
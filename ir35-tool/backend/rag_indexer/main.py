@@ -3,34 +3,56 @@ import os
 import json
 import time
 import logging
-import io
 import hashlib
-from typing import List, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
 
 from google.cloud import storage
-from google.cloud import secretmanager
+from google.cloud import firestore
 from google.cloud import aiplatform
 from google.cloud import logging as cloud_logging
 from google.protobuf import json_format
 from google.api_core import exceptions as google_exceptions
-import pypdf
+from google.cloud.aiplatform_v1.types import IndexDatapoint
 
 import config
+from snapshot import write_snapshot_shard, read_snapshot_shard, delete_snapshot_shard
+from manifest import build_manifest, diff_manifests, load_manifest, save_manifest, manifest_doc_id
+from embedding import embed_texts, RateLimiter
+from pipeline import run_bulk_index
+from chunking import extract_text, chunk_text
+from refreshing_cache import RefreshingCache, secret_manager_loader
 
 # Configure logging
 log_client = cloud_logging.Client()
 log_client.setup_logging()
 logger = logging.getLogger(__name__)
 
+# Initialize Firestore (chunk content store)
+db = firestore.Client()
+
+# Shared across concurrent documents so bulk runs stay within the embedding quota
+embedding_limiter = RateLimiter(config.EMBEDDING_REQUESTS_PER_MINUTE)
+
+# Secret Manager values, cached per instance with background refresh; the
+# client and refresh thread are created by the first fetch_secret
+secret_cache = RefreshingCache(
+    secret_manager_loader(config.PROJECT_ID),
+    ttl_seconds=config.SECRET_TTL_SECONDS,
+    refresh_ahead_seconds=config.SECRET_REFRESH_AHEAD_SECONDS,
+    max_stale_seconds=config.SECRET_MAX_STALE_SECONDS,
+    preload=config.PRELOAD_SECRETS
+)
+
 def fetch_secret(secret_name: str) -> str:
     """
-    Fetches a secret from Google Secret Manager.
+    Fetches a secret from Google Secret Manager (latest version), via the
+    process-wide cache.
     """
     try:
-        client = secretmanager.SecretManagerServiceClient()
-        name = f"projects/{config.PROJECT_ID}/secrets/{secret_name}/versions/latest"
-        response = client.access_secret_version(request={"name": name})
-        return response.payload.data.decode("UTF-8")
+        return secret_cache.get(secret_name)
     except Exception as e:
         logger.error(f"Failed to fetch secret {secret_name}: {e}")
         raise
@@ -63,64 +85,8 @@ def chunk_document(pdf_content: bytes) -> List[Dict[str, Any]]:
     """
     Chunks a PDF document into text segments preserving paragraph boundaries.
     """
-    chunks = []
     try:
-        pdf_file = io.BytesIO(pdf_content)
-        reader = pypdf.PdfReader(pdf_file)
-        
-        text = ""
-        # We'll rely on double newlines for paragraphs. 
-        # pypdf sometimes extracts text cleanly, sometimes not.
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                page_text = page_text.replace('\x00', '')
-                text += page_text + "\n\n"
-
-        # Split by paragraphs
-        paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-        
-        current_chunk_words = []
-        current_chunk_word_count = 0
-        
-        # Target: 512 tokens ~ 400 words
-        # We use a simpler word count target for MVP
-        target_word_count = int(config.CHUNK_SIZE / 1.3)
-        overlap_word_count = int(config.CHUNK_OVERLAP / 1.3)
-        
-        for paragraph in paragraphs:
-            words = paragraph.split()
-            
-            # If adding this paragraph exceeds chunk size, finalize current chunk
-            if current_chunk_word_count + len(words) > target_word_count and current_chunk_words:
-                # Finalize chunk
-                chunk_text = " ".join(current_chunk_words)
-                chunks.append({
-                    "content": chunk_text,
-                    "metadata": {"chunk_index": len(chunks), "source_type": "pdf"}
-                })
-                
-                # Start new chunk with overlap (last N words of previous chunk)
-                # Note: Paragraph boundaries are preserved by always adding full paragraphs
-                # unless a single paragraph is huge.
-                # For overlap, we take the last 'overlap_word_count' words from the previous chunk
-                overlap = current_chunk_words[-overlap_word_count:] if len(current_chunk_words) > overlap_word_count else current_chunk_words
-                current_chunk_words = overlap + words
-                current_chunk_word_count = len(current_chunk_words)
-                
-            else:
-                # Add paragraph to current chunk
-                current_chunk_words.extend(words)
-                current_chunk_word_count += len(words)
-        
-        # Add the last chunk if not empty
-        if current_chunk_words:
-             chunk_text = " ".join(current_chunk_words)
-             chunks.append({
-                "content": chunk_text,
-                "metadata": {"chunk_index": len(chunks), "source_type": "pdf"}
-            })
-            
+        chunks = chunk_text(extract_text(pdf_content))
         logger.info(f"Generated {len(chunks)} chunks.")
         return chunks
         
@@ -128,53 +94,117 @@ def chunk_document(pdf_content: bytes) -> List[Dict[str, Any]]:
         logger.error(f"Failed to chunk document: {e}")
         raise
 
-def generate_embeddings(text_chunks: List[Dict[str, Any]]) -> List[List[float]]:
+def generate_embeddings(text_chunks: List[Dict[str, Any]]) -> np.ndarray:
     """
     Generates embeddings for text chunks using Vertex AI.
+
+    Batches are sized by the model's per-request limits and sent concurrently
+    (see embedding.embed_texts); the float32 rows match the order of `text_chunks`.
     """
-    embeddings = []
     aiplatform.init(project=config.PROJECT_ID, location=config.REGION)
     
     from vertexai.preview.language_models import TextEmbeddingModel
     
     try:
         model = TextEmbeddingModel.from_pretrained(config.EMBEDDING_MODEL)
-        
-        # Batch processing
-        for i in range(0, len(text_chunks), config.BATCH_SIZE):
-            batch = text_chunks[i : i + config.BATCH_SIZE]
-            batch_texts = [chunk["content"] for chunk in batch]
-            
-            retry_count = 0
-            while retry_count < config.MAX_RETRIES:
-                try:
-                    batch_embeddings = model.get_embeddings(batch_texts)
-                    embeddings.extend([e.values for e in batch_embeddings])
-                    break
-                except Exception as e:
-                    retry_count += 1
-                    logger.warning(f"Error generating embeddings (attempt {retry_count}): {e}")
-                    if retry_count == config.MAX_RETRIES:
-                        raise
-                    time.sleep(2 ** retry_count) # Exponential backoff
-            
-            # Rate limit pause
-            time.sleep(0.1) 
-            
-        return embeddings
+
+        return embed_texts(
+            lambda batch_texts: [e.values for e in model.get_embeddings(batch_texts)],
+            [chunk["content"] for chunk in text_chunks],
+            max_instances=config.EMBEDDING_MAX_INSTANCES_PER_REQUEST,
+            max_tokens=config.EMBEDDING_MAX_TOKENS_PER_REQUEST,
+            concurrency=config.EMBEDDING_CONCURRENCY,
+            requests_per_minute=config.EMBEDDING_REQUESTS_PER_MINUTE,
+            max_retries=config.MAX_RETRIES,
+            limiter=embedding_limiter
+        )
     except Exception as e:
         logger.error(f"Failed to generate embeddings: {e}")
         raise
 
-def upsert_to_index(embeddings: List[List[float]], chunks: List[Dict[str, Any]], index_resource_name: str, document_url: str):
+def store_chunks(datapoint_ids: List[str], chunks: List[Dict[str, Any]], document_url: str, restricts: Dict[str, List[str]]):
+    """
+    Writes chunk text and metadata to the chunk store, keyed by datapoint ID.
+
+    The assessment API hydrates retrieved neighbours from this collection.
+    """
+    try:
+        collection = db.collection(config.CHUNK_COLLECTION)
+        for start in range(0, len(datapoint_ids), config.FIRESTORE_BATCH_SIZE):
+            batch = db.batch()
+            for datapoint_id, chunk in zip(datapoint_ids[start:start + config.FIRESTORE_BATCH_SIZE], chunks[start:start + config.FIRESTORE_BATCH_SIZE]):
+                batch.set(collection.document(datapoint_id), {
+                    "content": chunk["content"],
+                    "document_url": document_url,
+                    **chunk["metadata"],
+                    "restricts": restricts,
+                    "indexed_at": firestore.SERVER_TIMESTAMP
+                })
+            batch.commit()
+
+        logger.info(f"Stored {len(datapoint_ids)} chunks in {config.CHUNK_COLLECTION}")
+    except Exception as e:
+        logger.error(f"Failed to store chunks: {e}")
+        raise
+
+def normalize_restricts(restricts: Optional[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    Validates namespace restricts, e.g. {"doc_type": ["case_law"], "year": [2019]},
+    into sorted string allow lists.
+    """
+    normalized = {}
+    for namespace, tokens in (restricts or {}).items():
+        if namespace not in config.RESTRICT_NAMESPACES:
+            raise ValueError(f"Unsupported restrict namespace: {namespace}")
+        if not isinstance(tokens, list):
+            tokens = [tokens]
+        normalized[namespace] = sorted({str(token) for token in tokens})
+    return normalized
+
+def upsert_batches(upsert_fn, datapoint_count: int, batch_size: int) -> int:
+    """
+    Sends datapoints [0, datapoint_count) in batches of `batch_size`,
+    UPSERT_CONCURRENCY at a time, retrying each batch with exponential backoff.
+
+    Returns the number of batches sent.
+    """
+    batches = [(start, min(start + batch_size, datapoint_count)) for start in range(0, datapoint_count, batch_size)]
+
+    def run_batch(batch: Tuple[int, int]):
+        retry_count = 0
+        while True:
+            try:
+                upsert_fn(*batch)
+                return
+            except Exception as e:
+                retry_count += 1
+                logger.warning(f"Error upserting datapoints {batch[0]}-{batch[1]} (attempt {retry_count}): {e}")
+                if retry_count == config.MAX_RETRIES:
+                    raise
+                time.sleep(2 ** retry_count) # Exponential backoff
+
+    with ThreadPoolExecutor(max_workers=config.UPSERT_CONCURRENCY) as executor:
+        futures = [executor.submit(run_batch, batch) for batch in batches]
+        try:
+            for future in futures:
+                future.result()
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+    return len(batches)
+
+def upsert_to_index(embeddings: np.ndarray, chunks: List[Dict[str, Any]], datapoint_ids: List[str], index_resource_name: str, document_url: str, restricts: Dict[str, List[str]]):
     """
     Upserts embeddings to the Vertex AI Index.
     
     Args:
-        embeddings: List of embeddings.
+        embeddings: float32 matrix, one row per datapoint.
         chunks: List of chunk metadata.
+        datapoint_ids: Content-derived datapoint IDs (see manifest.build_manifest).
         index_resource_name: The full resource name of the Index (not Endpoint).
-        document_url: The source document URL for ID generation.
+        document_url: The source document URL, stored with each chunk.
+        restricts: Namespace allow lists attached to every datapoint for query-time filtering.
     """
     try:
         # Use the Index resource name to instantiate MatchingEngineIndex
@@ -183,32 +213,206 @@ def upsert_to_index(embeddings: List[List[float]], chunks: List[Dict[str, Any]],
         
         # Note: We must use MatchingEngineIndex for data management
         my_index = aiplatform.MatchingEngineIndex(index_name=index_id)
-        
-        datapoints = []
-        for i, embedding in enumerate(embeddings):
-            chunk = chunks[i]
-            
-            # Deterministic ID generation for idempotency
-            # Hash(document_url + chunk_index)
-            unique_string = f"{document_url}_{i}"
-            datapoint_id = hashlib.sha256(unique_string.encode('utf-8')).hexdigest()
-            
-            datapoints.append({
-                "id": datapoint_id,
-                "embedding": embedding,
-                "restricts": [] # Add filtering restrictions if needed
-            })
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        restrictions = [
+            IndexDatapoint.Restriction(namespace=namespace, allow_list=tokens)
+            for namespace, tokens in restricts.items()
+        ]
+
+        # Size batches so each request stays under the API's request size limit
+        datapoint_bytes = matrix.shape[1] * 4 + 64 + sum(len(n) + sum(len(t) for t in tokens) + 8 for n, tokens in restricts.items())
+        batch_size = max(1, min(config.UPSERT_MAX_DATAPOINTS_PER_REQUEST, config.UPSERT_MAX_REQUEST_BYTES // datapoint_bytes))
+
+        def upsert_batch(start: int, end: int):
+            # Datapoint protos are built per batch, so only one batch of
+            # vectors is expanded out of the float32 matrix at a time
+            my_index.upsert_datapoints(datapoints=[
+                IndexDatapoint(datapoint_id=datapoint_ids[i], feature_vector=matrix[i].tolist(), restricts=restrictions)
+                for i in range(start, end)
+            ])
             
+        # Store chunk text first so every searchable datapoint can be hydrated
+        store_chunks(datapoint_ids, chunks, document_url, restricts)
+
         # Upsert data points to the Index
         # Note: STREAM_UPDATE indices allow upserting directly
-        my_index.upsert_datapoints(datapoints=datapoints)
+        batch_count = upsert_batches(upsert_batch, len(datapoint_ids), batch_size)
         
-        logger.info(f"Upserted {len(datapoints)} datapoints to index: {index_id}")
+        logger.info(f"Upserted {len(datapoint_ids)} datapoints in {batch_count} batches to index: {index_id}")
         
     except Exception as e:
         logger.error(f"Failed to upsert to index: {e}")
         raise
 
+def remove_from_index(datapoint_ids: List[str], index_resource_name: str):
+    """
+    Removes datapoints from the Vertex AI Index and their chunks from the chunk store.
+    """
+    try:
+        index_id = index_resource_name.split('/')[-1]
+        my_index = aiplatform.MatchingEngineIndex(index_name=index_id)
+        my_index.remove_datapoints(datapoint_ids=datapoint_ids)
+
+        collection = db.collection(config.CHUNK_COLLECTION)
+        for start in range(0, len(datapoint_ids), config.FIRESTORE_BATCH_SIZE):
+            batch = db.batch()
+            for datapoint_id in datapoint_ids[start:start + config.FIRESTORE_BATCH_SIZE]:
+                batch.delete(collection.document(datapoint_id))
+            batch.commit()
+
+        logger.info(f"Removed {len(datapoint_ids)} datapoints from index: {index_id}")
+    except Exception as e:
+        logger.error(f"Failed to remove from index: {e}")
+        raise
+
+def prepare_document(document_url: str, chunks: List[Dict[str, Any]], restricts: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+    """
+    Diffs a chunked document against its stored manifest and embeds the chunks
+    that need it.
+
+    The returned plan is applied by commit_document; splitting the two lets
+    the bulk pipeline embed one document while another is being upserted.
+    When the document's restricts change, every chunk is re-upserted.
+    """
+    restricts = restricts or {}
+    previous = load_manifest(db, config.MANIFEST_COLLECTION, document_url)
+    current = build_manifest(document_url, chunks)
+    added, unchanged, removed = diff_manifests(previous["chunks"], current)
+
+    datapoint_ids = list(current)
+    chunk_by_id = dict(zip(datapoint_ids, chunks))
+    to_upsert = added if restricts == previous["restricts"] else datapoint_ids
+
+    # The snapshot shard holds every vector of the document, so reuse the
+    # stored vectors of unchanged chunks and embed any the shard lacks.
+    stored_vectors = {}
+    to_embed = to_upsert
+    if config.LOCAL_INDEX_SNAPSHOT_URI and unchanged:
+        stored_vectors = read_snapshot_shard(storage.Client(), config.LOCAL_INDEX_SNAPSHOT_URI, document_url)
+        to_upsert = [datapoint_id for datapoint_id in datapoint_ids if datapoint_id not in stored_vectors or datapoint_id in to_upsert]
+        to_embed = [datapoint_id for datapoint_id in to_upsert if datapoint_id not in stored_vectors or datapoint_id in added]
+
+    logger.info(f"{document_url}: {len(added)} new, {len(unchanged)} unchanged, {len(removed)} removed chunks")
+
+    embed_chunks = [chunk_by_id[datapoint_id] for datapoint_id in to_embed]
+    if embed_chunks:
+        stored_vectors.update(zip(to_embed, generate_embeddings(embed_chunks)))
+
+    return {
+        "document_url": document_url,
+        "manifest": current,
+        "restricts": restricts,
+        "datapoint_ids": datapoint_ids,
+        "chunks": chunks,
+        "to_upsert": to_upsert,
+        "upsert_chunks": [chunk_by_id[datapoint_id] for datapoint_id in to_upsert],
+        "embedded": len(to_embed),
+        "vectors": stored_vectors,
+        "removed": removed
+    }
+
+def commit_document(plan: Dict[str, Any], index_resource_name: str) -> Dict[str, Any]:
+    """
+    Upserts new chunks, removes deleted ones, writes the snapshot shard and
+    finally saves the manifest.
+
+    The manifest is saved last, so a failed run is simply redone (upserts are
+    idempotent) on the next call.
+    """
+    document_url = plan["document_url"]
+    datapoint_ids = plan["datapoint_ids"]
+    vectors = plan["vectors"]
+
+    if plan["to_upsert"]:
+        upsert_to_index(np.stack([vectors[datapoint_id] for datapoint_id in plan["to_upsert"]]), plan["upsert_chunks"], plan["to_upsert"], index_resource_name, document_url, plan["restricts"])
+
+    if plan["removed"]:
+        remove_from_index(plan["removed"], index_resource_name)
+
+    # Snapshot for the assessment API's in-process index (optional)
+    if config.LOCAL_INDEX_SNAPSHOT_URI:
+        storage_client = storage.Client()
+        if datapoint_ids:
+            write_snapshot_shard(storage_client, config.LOCAL_INDEX_SNAPSHOT_URI, document_url, datapoint_ids, np.stack([vectors[datapoint_id] for datapoint_id in datapoint_ids]), plan["restricts"], [chunk["content"] for chunk in plan["chunks"]])
+        else:
+            delete_snapshot_shard(storage_client, config.LOCAL_INDEX_SNAPSHOT_URI, document_url)
+
+    save_manifest(db, config.MANIFEST_COLLECTION, document_url, plan["manifest"], plan["restricts"], firestore.SERVER_TIMESTAMP)
+
+    return {
+        "chunks_indexed": len(plan["to_upsert"]),
+        "chunks_embedded": plan["embedded"],
+        "chunks_unchanged": len(datapoint_ids) - len(plan["to_upsert"]),
+        "chunks_removed": len(plan["removed"])
+    }
+
+def index_document(document_url: str, chunks: List[Dict[str, Any]], index_resource_name: str, restricts: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+    """
+    Incrementally indexes a chunked document against its stored manifest.
+
+    Only chunks whose content is new are embedded and upserted; datapoints for
+    chunks that no longer exist are removed.
+    """
+    return commit_document(prepare_document(document_url, chunks, restricts), index_resource_name)
+
+def list_documents(prefix_url: str) -> List[Tuple[str, str]]:
+    """
+    Lists the PDFs under a gs://bucket/prefix as (document_url, generation) pairs.
+    """
+    if not prefix_url.startswith("gs://"):
+        raise ValueError("Invalid GCS URL. Must start with gs://")
+
+    bucket_name, _, prefix = prefix_url[5:].partition("/")
+    storage_client = storage.Client()
+    return [
+        (f"gs://{bucket_name}/{blob.name}", str(blob.generation))
+        for blob in storage_client.list_blobs(bucket_name, prefix=prefix)
+        if blob.name.lower().endswith(".pdf")
+    ]
+
+class FirestoreCheckpoint:
+    """
+    Bulk job checkpoint: one document per completed source object under
+    `{JOB_COLLECTION}/{job_id}/completed`, recording the indexed generation.
+    """
+
+    def __init__(self, job_id: str):
+        self.collection = db.collection(config.JOB_COLLECTION).document(job_id).collection("completed")
+
+    def completed(self) -> Dict[str, str]:
+        return {snapshot.get("document_url"): snapshot.get("generation") for snapshot in self.collection.stream()}
+
+    def mark_done(self, document_url: str, generation: str):
+        self.collection.document(manifest_doc_id(document_url)).set({
+            "document_url": document_url,
+            "generation": generation,
+            "completed_at": firestore.SERVER_TIMESTAMP
+        })
+
+def bulk_index(prefix_url: str, job_id: str, index_resource_name: str, restricts: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Indexes every PDF under a GCS prefix with the streaming pipeline.
+
+    Stops admitting new documents once BULK_TIME_BUDGET_SECONDS have passed so
+    in-flight documents finish before the function timeout; calling again with
+    the same job_id resumes from the checkpoint.
+    """
+    deadline = time.monotonic() + config.BULK_TIME_BUDGET_SECONDS
+
+    return run_bulk_index(
+        list_documents(prefix_url),
+        FirestoreCheckpoint(job_id),
+        download=download_document,
+        extract=extract_text,
+        chunk=chunk_text,
+        embed=lambda document_url, chunks: prepare_document(document_url, chunks, restricts),
+        upsert=lambda document_url, plan: commit_document(plan, index_resource_name),
+        workers=config.BULK_WORKERS,
+        queue_size=config.BULK_QUEUE_SIZE,
+        should_continue=lambda: time.monotonic() < deadline
+    )
+
 @functions_framework.http
 def index_documents(request):
     """
@@ -216,25 +420,9 @@ def index_documents(request):
     """
     try:
         request_json = request.get_json(silent=True)
-        if not request_json or 'document_url' not in request_json:
-            return json.dumps({"error": "Missing document_url"}), 400
-        
-        document_url = request_json['document_url']
-        logger.info(f"Processing document: {document_url}")
+        if not request_json or not ('document_url' in request_json or 'prefix' in request_json):
+            return json.dumps({"error": "Missing document_url or prefix"}), 400
         
-        # 1. Download
-        pdf_content = download_document(document_url)
-        
-        # 2. Chunk
-        chunks = chunk_document(pdf_content)
-        
-        if not chunks:
-             return json.dumps({"status": "success", "chunks_indexed": 0, "message": "No text found"}), 200
-
-        # 3. Embed
-        embeddings = generate_embeddings(chunks)
-        
-        # 4. Upsert
         # We need the Index Resource Name
         index_resource_name = config.VERTEX_AI_INDEX_NAME
         if not index_resource_name:
@@ -244,11 +432,45 @@ def index_documents(request):
         if not index_resource_name:
             raise ValueError("VERTEX_AI_INDEX_NAME environment variable not set")
 
-        upsert_to_index(embeddings, chunks, index_resource_name, document_url)
+        # Optional namespace restricts (doc_type, jurisdiction, year) for query-time filtering
+        try:
+            restricts = normalize_restricts(request_json.get('restricts'))
+        except (ValueError, AttributeError) as e:
+            return json.dumps({"error": f"Invalid restricts: {e}"}), 400
+
+        # Bulk mode: index every PDF under a gs://bucket/prefix
+        if 'prefix' in request_json:
+            prefix_url = request_json['prefix']
+            job_id = request_json.get('job_id') or hashlib.sha256(prefix_url.encode('utf-8')).hexdigest()[:16]
+            logger.info(f"Bulk indexing prefix: {prefix_url} (job {job_id})")
+
+            summary = bulk_index(prefix_url, job_id, index_resource_name, restricts)
+            if summary["error"]:
+                status, code = "failed", 500
+            else:
+                status, code = ("success" if summary["complete"] else "partial"), 200
+            return json.dumps({
+                "status": status,
+                "job_id": job_id,
+                **summary,
+                "index_resource": index_resource_name
+            }), code
+
+        document_url = request_json['document_url']
+        logger.info(f"Processing document: {document_url}")
+
+        # 1. Download
+        pdf_content = download_document(document_url)
+        
+        # 2. Chunk
+        chunks = chunk_document(pdf_content)
+        
+        # 3. Embed and upsert changed chunks, remove deleted ones
+        result = index_document(document_url, chunks, index_resource_name, restricts)
         
         return json.dumps({
             "status": "success",
-            "chunks_indexed": len(embeddings),
+            **result,
             "index_resource": index_resource_name
         }), 200
         
@@ -0,0 +1,66 @@
+import hashlib
+import logging
+from typing import List, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+def content_hash(text: str) -> str:
+    """SHA-256 of a chunk's text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def manifest_doc_id(document_url: str) -> str:
+    """Firestore document ID of the manifest for a source document."""
+    return hashlib.sha256(document_url.encode('utf-8')).hexdigest()
+
+def build_manifest(document_url: str, chunks: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Maps content-derived datapoint IDs to chunk content hashes, in chunk order.
+
+    IDs hash the document URL, the chunk's content hash and its occurrence
+    number (for repeated identical chunks), so inserting or editing one
+    paragraph only changes the IDs of the chunks whose text changed.
+    """
+    manifest = {}
+    occurrences: Dict[str, int] = {}
+    for chunk in chunks:
+        chunk_hash = content_hash(chunk["content"])
+        occurrence = occurrences.get(chunk_hash, 0)
+        occurrences[chunk_hash] = occurrence + 1
+
+        unique_string = f"{document_url}\n{chunk_hash}\n{occurrence}"
+        datapoint_id = hashlib.sha256(unique_string.encode('utf-8')).hexdigest()
+        manifest[datapoint_id] = chunk_hash
+    return manifest
+
+def diff_manifests(previous: Dict[str, str], current: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Returns (added, unchanged, removed) datapoint IDs between two manifests.
+
+    `added` and `unchanged` follow the chunk order of `current`.
+    """
+    added = [datapoint_id for datapoint_id in current if datapoint_id not in previous]
+    unchanged = [datapoint_id for datapoint_id in current if datapoint_id in previous]
+    removed = [datapoint_id for datapoint_id in previous if datapoint_id not in current]
+    return added, unchanged, removed
+
+def load_manifest(db, collection: str, document_url: str) -> Dict[str, Any]:
+    """
+    Loads the stored manifest record for a document: `chunks` (datapoint ID ->
+    content hash) and the `restricts` the chunks were indexed with. Both are
+    empty on first index.
+    """
+    snapshot = db.collection(collection).document(manifest_doc_id(document_url)).get()
+    record = snapshot.to_dict() if snapshot.exists else {}
+    return {"chunks": record.get("chunks", {}), "restricts": record.get("restricts", {})}
+
+def save_manifest(db, collection: str, document_url: str, manifest: Dict[str, str], restricts: Dict[str, List[str]], timestamp: Any):
+    """
+    Replaces the stored manifest for a document.
+    """
+    db.collection(collection).document(manifest_doc_id(document_url)).set({
+        "document_url": document_url,
+        "chunks": manifest,
+        "restricts": restricts,
+        "updated_at": timestamp
+    })
+    logger.info(f"Saved manifest for {document_url} ({len(manifest)} chunks)")
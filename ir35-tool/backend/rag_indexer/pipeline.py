@@ -0,0 +1,209 @@
+import os
+import json
+import queue
+import logging
+import threading
+from typing import List, Dict, Any, Callable, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input; one is sent per downstream worker
+_DONE = object()
+
+class Stage:
+    """
+    One step of the indexing pipeline.
+
+    `fn(key, value)` receives the document key (its gs:// URL) and the previous
+    stage's output, and returns this stage's output. Each stage runs on its
+    own `workers` threads, so I/O-bound and API-bound stages overlap.
+    """
+
+    def __init__(self, name: str, fn: Callable[[str, Any], Any], workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+
+def run_pipeline(
+    source: Iterable[Tuple[str, Any]],
+    stages: List[Stage],
+    queue_size: int,
+    on_success: Callable[[str, Any], None],
+    on_failure: Callable[[str, str, Exception], None]
+):
+    """
+    Streams (key, value) items from `source` through `stages`.
+
+    Stages are connected by bounded queues of `queue_size` items, so a slow
+    stage applies backpressure upstream instead of buffering whole documents
+    in memory. A failing item is reported to `on_failure(key, stage_name,
+    error)` and dropped; the rest of the run continues. `on_success(key,
+    result)` is called on the caller's thread for every completed item.
+
+    If iterating `source` raises, the items already fed are still drained
+    and the exception is then re-raised to the caller.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    failure_lock = threading.Lock()
+    source_errors: List[Exception] = []
+
+    def feed():
+        try:
+            for item in source:
+                queues[0].put(item)
+        except Exception as e:
+            source_errors.append(e)
+        finally:
+            for _ in range(stages[0].workers):
+                queues[0].put(_DONE)
+
+    def work(stage: Stage, inbox: queue.Queue, outbox: queue.Queue):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            key, value = item
+            try:
+                outbox.put((key, stage.fn(key, value)))
+            except Exception as e:
+                with failure_lock:
+                    on_failure(key, stage.name, e)
+
+    def run_stage(index: int, stage: Stage):
+        threads = [
+            threading.Thread(target=work, args=(stage, queues[index], queues[index + 1]), name=f"{stage.name}-{n}", daemon=True)
+            for n in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        downstream = stages[index + 1].workers if index + 1 < len(stages) else 1
+        for _ in range(downstream):
+            queues[index + 1].put(_DONE)
+
+    threads = [threading.Thread(target=feed, name="source", daemon=True)]
+    threads += [threading.Thread(target=run_stage, args=(i, stage), daemon=True) for i, stage in enumerate(stages)]
+    for thread in threads:
+        thread.start()
+
+    while True:
+        item = queues[-1].get()
+        if item is _DONE:
+            break
+        on_success(*item)
+
+    for thread in threads:
+        thread.join()
+
+    if source_errors:
+        raise source_errors[0]
+
+class FileCheckpoint:
+    """
+    Records completed documents in a local JSON file, for local runs.
+
+    Keys are gs:// URLs and values the object generation that was indexed, so
+    objects overwritten since the last run are indexed again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._completed: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._completed = json.load(f)
+
+    def completed(self) -> Dict[str, str]:
+        return dict(self._completed)
+
+    def mark_done(self, document_url: str, generation: str):
+        with self._lock:
+            self._completed[document_url] = generation
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._completed, f)
+            os.replace(tmp_path, self.path)
+
+def pending_documents(objects: Iterable[Tuple[str, str]], completed: Dict[str, str], should_continue: Callable[[], bool]) -> Iterable[Tuple[str, str]]:
+    """
+    Yields (document_url, generation) for listed objects not yet indexed at
+    that generation, stopping early once `should_continue()` returns False.
+    """
+    for document_url, generation in objects:
+        if completed.get(document_url) == generation:
+            continue
+        if not should_continue():
+            return
+        yield document_url, generation
+
+def run_bulk_index(
+    objects: Iterable[Tuple[str, str]],
+    checkpoint,
+    download: Callable[[str], bytes],
+    extract: Callable[[bytes], str],
+    chunk: Callable[[str], List[Dict[str, Any]]],
+    embed: Callable[[str, List[Dict[str, Any]]], Any],
+    upsert: Callable[[str, Any], Dict[str, Any]],
+    workers: Dict[str, int],
+    queue_size: int,
+    should_continue: Callable[[], bool] = lambda: True
+) -> Dict[str, Any]:
+    """
+    Indexes every pending object with a download -> extract -> chunk -> embed
+    -> upsert pipeline, checkpointing each document once it is upserted.
+
+    `checkpoint` needs `completed()` and `mark_done(document_url, generation)`;
+    re-running with the same checkpoint resumes after the last completed
+    document. Returns counts plus the failed documents and, when
+    `should_continue` stopped the run early, `complete: False`. When listing
+    the objects or reading the checkpoint fails, only the documents already
+    in flight are indexed and checkpointed, and the summary has
+    `complete: False` and the `error`.
+    """
+    generations: Dict[str, str] = {}
+    stopped_early = threading.Event()
+    summary = {"documents_indexed": 0, "chunks_indexed": 0, "chunks_embedded": 0, "chunks_unchanged": 0, "chunks_removed": 0, "failed": [], "error": None}
+
+    def source():
+        def gate():
+            if should_continue():
+                return True
+            stopped_early.set()
+            return False
+
+        for document_url, generation in pending_documents(objects, checkpoint.completed(), gate):
+            generations[document_url] = generation
+            yield document_url, None
+
+    def on_success(document_url: str, result: Dict[str, Any]):
+        try:
+            checkpoint.mark_done(document_url, generations[document_url])
+        except Exception as e:
+            # The document is indexed; a resumed run just re-checks it
+            logger.warning(f"Failed to checkpoint {document_url}: {e}")
+        summary["documents_indexed"] += 1
+        for key in ("chunks_indexed", "chunks_embedded", "chunks_unchanged", "chunks_removed"):
+            summary[key] += result.get(key, 0)
+
+    def on_failure(document_url: str, stage_name: str, error: Exception):
+        logger.error(f"Failed to index {document_url} at {stage_name}: {error}")
+        summary["failed"].append({"document_url": document_url, "stage": stage_name, "error": str(error)})
+
+    stages = [
+        Stage("download", lambda url, _: download(url), workers.get("download", 1)),
+        Stage("extract", lambda url, content: extract(content), workers.get("extract", 1)),
+        Stage("chunk", lambda url, text: chunk(text), workers.get("chunk", 1)),
+        Stage("embed", embed, workers.get("embed", 1)),
+        Stage("upsert", upsert, workers.get("upsert", 1)),
+    ]
+    try:
+        run_pipeline(source(), stages, queue_size, on_success, on_failure)
+    except Exception as e:
+        logger.error(f"Bulk index source failed: {e}")
+        summary["error"] = str(e)
+
+    summary["complete"] = not stopped_early.is_set() and summary["error"] is None
+    logger.info(f"Bulk index run finished: {summary['documents_indexed']} documents, {len(summary['failed'])} failed, complete={summary['complete']}")
+    return summary
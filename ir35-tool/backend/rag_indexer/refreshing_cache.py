@@ -0,0 +1 @@
+../shared/refreshing_cache.py
\ No newline at end of file
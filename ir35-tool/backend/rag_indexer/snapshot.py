@@ -0,0 +1,92 @@
+import io
+import json
+import hashlib
+import logging
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from lexical import term_statistics
+
+logger = logging.getLogger(__name__)
+
+SHARD_SUFFIX = ".npz"
+
+def shard_object_name(snapshot_uri: str, document_url: str) -> tuple:
+    """
+    Returns the (bucket, blob name) of the snapshot shard for a document.
+
+    Each source document gets its own shard so re-indexing one document only
+    rewrites that shard instead of the whole corpus snapshot.
+    """
+    if not snapshot_uri.startswith("gs://"):
+        raise ValueError("Invalid snapshot URI. Must start with gs://")
+
+    bucket_name, _, prefix = snapshot_uri[5:].partition("/")
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+
+    shard_id = hashlib.sha256(document_url.encode('utf-8')).hexdigest()
+    return bucket_name, f"{prefix}{shard_id}{SHARD_SUFFIX}"
+
+def serialize_shard(datapoint_ids: List[str], embeddings: np.ndarray, document_url: str, restricts: Optional[Dict[str, List[str]]] = None, texts: Optional[List[str]] = None) -> bytes:
+    """
+    Serialises datapoint ids and embeddings into a compressed .npz payload.
+
+    Embeddings are stored as a float32 matrix and ids as a fixed-width unicode
+    array so the reader can load the shard without enabling pickle. The
+    document's namespace restricts are stored as JSON for local filtering,
+    and chunk term frequencies (from `texts`) as lexical_* arrays for BM25.
+    """
+    if len(datapoint_ids) != len(embeddings):
+        raise ValueError("datapoint_ids and embeddings must have the same length")
+    if texts is not None and len(texts) != len(datapoint_ids):
+        raise ValueError("texts must have one entry per datapoint")
+
+    lexical = term_statistics(texts) if texts is not None else {}
+
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        ids=np.array(datapoint_ids, dtype=np.str_),
+        embeddings=np.asarray(embeddings, dtype=np.float32),
+        source=np.array(document_url, dtype=np.str_),
+        restricts=np.array(json.dumps(restricts or {}), dtype=np.str_),
+        **{f"lexical_{name}": values for name, values in lexical.items()}
+    )
+    return buffer.getvalue()
+
+def write_snapshot_shard(storage_client, snapshot_uri: str, document_url: str, datapoint_ids: List[str], embeddings: np.ndarray, restricts: Optional[Dict[str, List[str]]] = None, texts: Optional[List[str]] = None):
+    """
+    Writes the embedding shard for a document to the local index snapshot prefix.
+    """
+    bucket_name, blob_name = shard_object_name(snapshot_uri, document_url)
+    payload = serialize_shard(datapoint_ids, embeddings, document_url, restricts, texts)
+
+    blob = storage_client.bucket(bucket_name).blob(blob_name)
+    blob.upload_from_string(payload, content_type="application/octet-stream")
+
+    logger.info(f"Wrote snapshot shard gs://{bucket_name}/{blob_name} ({len(datapoint_ids)} vectors)")
+
+def read_snapshot_shard(storage_client, snapshot_uri: str, document_url: str) -> Dict[str, np.ndarray]:
+    """
+    Returns the embeddings in a document's existing shard keyed by datapoint ID,
+    or an empty dict if the document has no shard yet.
+    """
+    bucket_name, blob_name = shard_object_name(snapshot_uri, document_url)
+    blob = storage_client.bucket(bucket_name).blob(blob_name)
+    if not blob.exists():
+        return {}
+
+    with np.load(io.BytesIO(blob.download_as_bytes()), allow_pickle=False) as shard:
+        return dict(zip(shard["ids"].tolist(), shard["embeddings"]))
+
+def delete_snapshot_shard(storage_client, snapshot_uri: str, document_url: str):
+    """
+    Removes a document's shard, e.g. when it no longer yields any chunks.
+    """
+    bucket_name, blob_name = shard_object_name(snapshot_uri, document_url)
+    blob = storage_client.bucket(bucket_name).blob(blob_name)
+    if blob.exists():
+        blob.delete()
+        logger.info(f"Deleted snapshot shard gs://{bucket_name}/{blob_name}")
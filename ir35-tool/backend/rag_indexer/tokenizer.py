@@ -0,0 +1,92 @@
+import os
+import re
+import logging
+from functools import lru_cache
+from typing import List
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Rough BPE stand-in: word pieces of up to 4 characters plus punctuation
+_APPROX_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+def _load_encoding():
+    """
+    Loads the tiktoken encoding from the bundled TOKENIZER_CACHE_DIR. Fails
+    rather than falling back to the approximation: switching counters moves
+    chunk boundaries, and the next incremental run would re-embed and
+    replace every document.
+    """
+    if config.TOKENIZER_APPROXIMATE:
+        logger.warning("TOKENIZER_APPROXIMATE is set, approximating token counts")
+        return None
+
+    if not os.path.isdir(config.TOKENIZER_CACHE_DIR) or not os.listdir(config.TOKENIZER_CACHE_DIR):
+        raise RuntimeError(f"Tokenizer encoding not bundled in {config.TOKENIZER_CACHE_DIR}; run vendor_tokenizer.py before deploying")
+    os.environ["TIKTOKEN_CACHE_DIR"] = config.TOKENIZER_CACHE_DIR
+    import tiktoken
+    return tiktoken.get_encoding(config.TOKENIZER_ENCODING)
+
+_encoding = _load_encoding()
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens in a text. Cached, since re-chunking a document counts
+    the same paragraphs and sentences again.
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(_APPROX_TOKEN_RE.findall(text))
+
+def split_tokens(text: str, max_tokens: int) -> List[str]:
+    """
+    Splits a text into consecutive pieces of at most `max_tokens` tokens.
+    """
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return [_encoding.decode(tokens[i:i + max_tokens]).strip() for i in range(0, len(tokens), max_tokens)]
+
+    pieces = []
+    current = []
+    current_tokens = 0
+    for word in text.split():
+        word_tokens = len(_APPROX_TOKEN_RE.findall(word))
+        if word_tokens > max_tokens:
+            # Unbroken run of characters (e.g. a table rule): cut it by length
+            if current:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            step = max_tokens * 4
+            pieces.extend(word[i:i + step] for i in range(0, len(word), step))
+            continue
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def tail_tokens(text: str, max_tokens: int) -> str:
+    """
+    Returns the last `max_tokens` tokens of a text.
+    """
+    if max_tokens <= 0:
+        return ""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return _encoding.decode(tokens[-max_tokens:]).strip()
+
+    words = text.split()
+    tail = []
+    tail_count = 0
+    for word in reversed(words):
+        word_tokens = len(_APPROX_TOKEN_RE.findall(word))
+        if tail_count + word_tokens > max_tokens:
+            break
+        tail.append(word)
+        tail_count += word_tokens
+    return " ".join(reversed(tail))
@@ -0,0 +1,20 @@
+"""
+Downloads the tiktoken encoding used by the tokenizer into
+TOKENIZER_CACHE_DIR, so it is bundled with the function source. Run it
+before deploying (and commit the result):
+
+    python backend/rag_indexer/vendor_tokenizer.py
+"""
+import os
+
+import config
+
+def main():
+    os.makedirs(config.TOKENIZER_CACHE_DIR, exist_ok=True)
+    os.environ["TIKTOKEN_CACHE_DIR"] = config.TOKENIZER_CACHE_DIR
+    import tiktoken
+    encoding = tiktoken.get_encoding(config.TOKENIZER_ENCODING)
+    print(f"{config.TOKENIZER_ENCODING}: {encoding.n_vocab} tokens, cached in {config.TOKENIZER_CACHE_DIR}: {os.listdir(config.TOKENIZER_CACHE_DIR)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class RefreshingCache:
+    """
+    Process-wide cache for secrets and remote config values.
+
+    Values are loaded once, then refreshed in the background
+    `refresh_ahead_seconds` before their TTL runs out, so requests keep
+    reading the cached value. Past the TTL a value is still served
+    (stale-while-revalidate) while a refresh runs, for up to
+    `max_stale_seconds`; only a cold or over-stale key is loaded inline.
+    A failed refresh keeps the old value and is retried after
+    `retry_seconds`.
+
+    Nothing runs until the first `get`: it starts the refresh thread
+    (checking every `check_seconds`) and loads `preload` keys in the
+    background, so importing a module that creates a cache costs nothing.
+
+    Shared by assessment_api and rag_indexer (symlinked into each function).
+    """
+
+    def __init__(self, loader: Callable[[str], Any], ttl_seconds: float, refresh_ahead_seconds: float, max_stale_seconds: float, retry_seconds: float = 30, preload: Iterable[str] = (), check_seconds: float = 15):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.refresh_ahead_seconds = min(refresh_ahead_seconds, ttl_seconds)
+        self.max_stale_seconds = max_stale_seconds
+        self.retry_seconds = retry_seconds
+        self.preload = list(preload)
+        self.check_seconds = check_seconds
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refreshing = set()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self, key: str) -> Any:
+        if self._thread is None:
+            self.start()
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or now - entry["loaded_at"] > self.ttl_seconds + self.max_stale_seconds:
+            return self._load(key)
+        if now >= entry["refresh_at"]:
+            self._refresh_async(key)
+        return entry["value"]
+
+    def warm(self, keys: Iterable[str]):
+        """Loads keys in the background, e.g. at cold start."""
+        for key in keys:
+            threading.Thread(target=self._try_load, args=(key,), name=f"cache-warm-{key}", daemon=True).start()
+
+    def start(self):
+        """
+        Starts a daemon thread that refreshes due keys even when no request
+        reads them, and loads the `preload` keys. Where CPU is throttled
+        between requests, `get` also triggers due refreshes.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, args=(self.check_seconds,), name="cache-refresh", daemon=True)
+            self._thread.start()
+        self.warm(self.preload)
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, check_seconds: float):
+        while not self._stop.wait(check_seconds):
+            now = time.monotonic()
+            for key, entry in list(self._entries.items()):
+                if now >= entry["refresh_at"]:
+                    self._refresh_async(key)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _store(self, key: str, value: Any):
+        loaded_at = time.monotonic()
+        self._entries[key] = {
+            "value": value,
+            "loaded_at": loaded_at,
+            "refresh_at": loaded_at + self.ttl_seconds - self.refresh_ahead_seconds
+        }
+
+    def _load(self, key: str) -> Any:
+        # Concurrent cold reads of one key wait for a single load
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry["loaded_at"] <= self.ttl_seconds + self.max_stale_seconds:
+                return entry["value"]
+            value = self.loader(key)
+            self._store(key, value)
+            return value
+
+    def _try_load(self, key: str):
+        try:
+            self._load(key)
+        except Exception as e:
+            logger.warning(f"Failed to preload {key}: {e}")
+
+    def _refresh_async(self, key: str):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key,), name=f"cache-refresh-{key}", daemon=True).start()
+
+    def _refresh(self, key: str):
+        try:
+            self._store(key, self.loader(key))
+        except Exception as e:
+            logger.warning(f"Failed to refresh {key}, serving cached value: {e}")
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = {**entry, "refresh_at": time.monotonic() + self.retry_seconds}
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+def secret_manager_loader(project_id: str) -> Callable[[str], str]:
+    """
+    Returns a loader reading the latest version of a Secret Manager secret,
+    reusing one client, created by the first load.
+    """
+    client = None
+    lock = threading.Lock()
+
+    def load(secret_name: str) -> str:
+        nonlocal client
+        with lock:
+            if client is None:
+                from google.cloud import secretmanager
+                client = secretmanager.SecretManagerServiceClient()
+        name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
+        response = client.access_secret_version(request={"name": name})
+        return response.payload.data.decode("UTF-8")
+
+    return load
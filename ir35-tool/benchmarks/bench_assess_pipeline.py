@@ -0,0 +1,141 @@
+"""
+Benchmark: end-to-end assess_engagement latency, serial vs. overlapped.
+
+Backends are stubbed with sleeps shaped like the real calls (model loading,
+query embedding, vector search, chunk hydration, Gemini, Firestore audit
+write). Several clients send requests at once against one simulated
+function instance:
+
+    serial        the previous handler: models loaded per request, each step
+                  in turn, audit write on the response path, one request
+                  per instance at a time
+    serial x N    the same handler with N concurrent requests per instance
+    overlapped    assessment.run_assessment with cached models, retrieval
+                  overlapping model loading, and the audit write through
+                  the AuditQueue (still waited for before responding)
+
+Usage:
+    python benchmarks/bench_assess_pipeline.py --clients 8 --requests 200
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "assessment_api"))
+
+from models import AssessmentRequest  # noqa: E402
+from audit import AuditQueue  # noqa: E402
+from assessment import run_assessment, build_prompt_scaffold, complete_prompt, build_response  # noqa: E402
+
+class StubBackends:
+    def __init__(self, scale: float, seed: int):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sleep(self, ms: float, jitter: float = 0.2):
+        with self.lock:
+            factor = self.rng.lognormvariate(0, jitter)
+        time.sleep(ms * factor * self.scale / 1000)
+
+    def load_embedding_model(self):
+        self.sleep(150) # TextEmbeddingModel.from_pretrained
+
+    def load_generative_model(self):
+        self.sleep(20) # vertexai.init + GenerativeModel
+        return "model"
+
+    def retrieve(self, query_text, restricts):
+        self.sleep(60)  # query embedding
+        self.sleep(40)  # vector search
+        self.sleep(20)  # chunk hydration
+        return [], {"total": 120.0}
+
+    def generate(self, model, prompt):
+        self.sleep(900, jitter=0.35)
+        return {"determination": "Outside IR35", "confidence_score": 0.8, "reasoning": "stub"}
+
+    def write_audit(self, doc_id, record):
+        self.sleep(60)
+
+def serial_assess(backends: StubBackends, data: AssessmentRequest):
+    backends.load_embedding_model()
+    references, latency = backends.retrieve(data.role_details, data.restricts)
+    model = backends.load_generative_model()
+    ai_result = backends.generate(model, complete_prompt(build_prompt_scaffold(data), references))
+    response = build_response(data, ai_result, references, latency)
+    backends.write_audit(data.engagement_id, {"request": data.model_dump(), "response": response.model_dump()})
+    return response
+
+def run_clients(handler, clients: int, requests: int, instance_concurrency: int):
+    slots = threading.Semaphore(instance_concurrency)
+    latencies = []
+    lock = threading.Lock()
+
+    def client(worker: int):
+        for i in range(worker, requests, clients):
+            data = AssessmentRequest(engagement_id=f"eng-{i}", role_details="Senior Python Developer", answers={"control": "client sets hours"})
+            t0 = time.perf_counter()
+            with slots:
+                handler(data)
+            with lock:
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--scale", type=float, default=0.1, help="Multiplier on stub latencies (1.0 = realistic)")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.requests} requests, stub latencies x{args.scale} (reported ms are unscaled)")
+    print(f"{'handler':<16}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+
+    def report(label, latencies, elapsed):
+        p50, p99 = np.percentile(latencies, 50) / args.scale, np.percentile(latencies, 99) / args.scale
+        print(f"{label:<16}{p50:>10.0f}{p99:>10.0f}{len(latencies) / elapsed * args.scale:>9.1f}")
+
+    backends = StubBackends(args.scale, args.seed)
+    report("serial", *run_clients(lambda d: serial_assess(backends, d), args.clients, args.requests, 1))
+    report(f"serial x{args.clients}", *run_clients(lambda d: serial_assess(backends, d), args.clients, args.requests, args.clients))
+
+    audit_queue = AuditQueue(backends.write_audit, max_retries=3)
+    executor = ThreadPoolExecutor(max_workers=args.clients * 2)
+    load_model = lru_cache(maxsize=1)(backends.load_generative_model)
+
+    def overlapped(data):
+        response, written = run_assessment(
+            data,
+            retrieve=backends.retrieve,
+            load_model=load_model,
+            generate=backends.generate,
+            record_audit=lambda d, r: audit_queue.submit(d.engagement_id, {"request": d.model_dump(), "response": r.model_dump()}),
+            executor=executor
+        )
+        body = response.model_dump_json()
+        written.result()
+        return body
+
+    backends.load_embedding_model() # once per instance, at first use
+    report("overlapped", *run_clients(overlapped, args.clients, args.requests, args.clients))
+    audit_queue.flush(timeout=30)
+    executor.shutdown()
+
+if __name__ == "__main__":
+    main()
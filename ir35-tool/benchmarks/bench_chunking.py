@@ -0,0 +1,107 @@
+"""
+Benchmark: chunk-size distribution and throughput of the rag_indexer chunker.
+
+Compares the previous word-count chunker (words / 1.3, split on blank lines
+only) with chunking.chunk_text on a large document. By default the document
+is synthetic and shaped like pypdf output: each page is one block of lines
+with no blank lines inside it. Pass --pdf to use a real PDF instead.
+
+Token counts use tokenizer.count_tokens for both chunkers: tiktoken with the
+bundled encoding (backend/rag_indexer/vendor_tokenizer.py), or the built-in
+approximation with TOKENIZER_APPROXIMATE=1.
+
+Usage:
+    python benchmarks/bench_chunking.py --pages 400
+    python benchmarks/bench_chunking.py --pdf /path/to/handbook.pdf
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "rag_indexer"))
+
+import config  # noqa: E402
+from chunking import chunk_text, extract_text  # noqa: E402
+from tokenizer import count_tokens  # noqa: E402
+
+def legacy_chunk_text(text: str):
+    """The chunker before token-aware splitting, kept for comparison."""
+    chunks = []
+    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+    current_chunk_words = []
+    current_chunk_word_count = 0
+    target_word_count = int(config.CHUNK_SIZE / 1.3)
+    overlap_word_count = int(config.CHUNK_OVERLAP / 1.3)
+    for paragraph in paragraphs:
+        words = paragraph.split()
+        if current_chunk_word_count + len(words) > target_word_count and current_chunk_words:
+            chunks.append({"content": " ".join(current_chunk_words)})
+            overlap = current_chunk_words[-overlap_word_count:] if len(current_chunk_words) > overlap_word_count else current_chunk_words
+            current_chunk_words = overlap + words
+            current_chunk_word_count = len(current_chunk_words)
+        else:
+            current_chunk_words.extend(words)
+            current_chunk_word_count += len(words)
+    if current_chunk_words:
+        chunks.append({"content": " ".join(current_chunk_words)})
+    return chunks
+
+def synthetic_document(pages: int, seed: int) -> str:
+    rng = random.Random(seed)
+    vocabulary = ["contractor", "client", "substitution", "control", "mutuality", "obligation", "engagement",
+                  "tribunal", "HMRC", "determination", "employment", "status", "the", "of", "and", "to", "in",
+                  "Ready", "Mixed", "Concrete", "v.", "Minister", "Pensions", "s.", "49", "ITEPA", "2003"]
+    page_texts = []
+    for _ in range(pages):
+        sentences = [" ".join(rng.choices(vocabulary, k=rng.randint(8, 40))).capitalize() + "." for _ in range(rng.randint(20, 45))]
+        # Lines of ~12 words, no blank lines inside the page
+        words = " ".join(sentences).split()
+        page_texts.append("\n".join(" ".join(words[i:i + 12]) for i in range(0, len(words), 12)))
+    return "\n\n".join(page_texts)
+
+def describe(label: str, chunker, text: str):
+    t0 = time.perf_counter()
+    chunks = chunker(text)
+    elapsed = time.perf_counter() - t0
+    count_tokens.cache_clear()
+    sizes = np.array([count_tokens(c["content"]) for c in chunks])
+    over = (sizes > config.CHUNK_SIZE).mean() * 100
+    mb_per_s = len(text.encode("utf-8")) / 1e6 / elapsed
+    print(f"{label:<10}{len(chunks):>8}{sizes.min():>7}{np.percentile(sizes, 50):>7.0f}{np.percentile(sizes, 95):>7.0f}{sizes.max():>7}{over:>9.1f}%{mb_per_s:>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--pdf", help="Chunk the text of this PDF instead of a synthetic document")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            text = extract_text(f.read())
+    else:
+        text = synthetic_document(args.pages, args.seed)
+
+    print(f"document: {len(text) / 1e6:.2f} MB, CHUNK_SIZE={config.CHUNK_SIZE}, CHUNK_OVERLAP={config.CHUNK_OVERLAP}")
+    print(f"{'chunker':<10}{'chunks':>8}{'min':>7}{'p50':>7}{'p95':>7}{'max':>7}{'> limit':>10}{'MB/s':>9}")
+    describe("legacy", legacy_chunk_text, text)
+    count_tokens.cache_clear()
+    describe("token", chunk_text, text)
+
+    # Linear scaling check: throughput should stay flat as the document grows
+    if not args.pdf:
+        print("\nscaling (token chunker, cold cache):")
+        for factor in (1, 2, 4):
+            doc = synthetic_document(args.pages * factor // 4, args.seed)
+            count_tokens.cache_clear()
+            t0 = time.perf_counter()
+            chunk_text(doc)
+            elapsed = time.perf_counter() - t0
+            print(f"  {len(doc) / 1e6:>6.2f} MB  {elapsed * 1000:>8.1f} ms  {len(doc) / 1e6 / elapsed:>6.2f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: vector-only vs. hybrid (BM25 + vector, RRF, rerank) retrieval.
+
+Builds a synthetic corpus of topical chunks whose embeddings are noisy topic
+centroids. A few "citation" chunks per topic quote a case name; queries
+mention one case name alongside generic topic wording, and their embedding
+is only topic-level, as with a real query embedding. The benchmark reports
+how often the cited chunk reaches the context, the context size sent to the
+prompt, and per-stage latency of the local retrieval steps.
+
+Usage:
+    python benchmarks/bench_hybrid_retrieval.py --chunks 20000 --queries 200
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "assessment_api"))
+
+from lexical import analyze, BM25Index  # noqa: E402
+from local_index import LocalVectorIndex, LocalSnapshot  # noqa: E402
+from retrieval import reciprocal_rank_fusion, rerank  # noqa: E402
+
+VECTOR_K = 5       # MAX_NEIGHBORS
+CANDIDATES = 20    # HYBRID_CANDIDATES
+RERANK_TOP_K = 4
+
+TOPICS = ["substitution", "control", "mutuality", "financial risk", "equipment", "integration", "termination", "holiday pay"]
+FILLER = ["contractor", "client", "engagement", "worker", "agreement", "tribunal", "determination", "status",
+          "services", "hours", "project", "payment", "notice", "duties", "role", "judgment", "evidence"]
+
+def case_name(rng: random.Random) -> str:
+    parties = ["Ready Mixed Concrete", "Autoclenz", "Uber", "Pimlico Plumbers", "Atholl House", "Kickabout",
+               "Hall", "Usetech", "Dragonfly", "Christa Ackroyd", "Talentcore", "Netherlands Ltd", "Sherburn"]
+    return f"{rng.choice(parties)} {rng.randint(1, 999)} v {rng.choice(['HMRC', 'Belcher', 'Smith', 'Minister of Pensions'])}"
+
+def synthetic_corpus(chunks: int, dims: int, citations_per_topic: int, seed: int):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    centroids = np_rng.standard_normal((len(TOPICS), dims)).astype(np.float32)
+
+    texts, topics, cases = [], [], {}
+    for i in range(chunks):
+        topic = i % len(TOPICS)
+        words = [TOPICS[topic]] * 3 + rng.choices(FILLER, k=rng.randint(60, 120))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+        topics.append(topic)
+    for topic in range(len(TOPICS)):
+        for _ in range(citations_per_topic):
+            i = rng.randrange(topic, chunks, len(TOPICS))
+            name = case_name(rng)
+            texts[i] = f"In {name} the tribunal considered {TOPICS[topic]}. " + texts[i]
+            cases[name] = i
+
+    embeddings = centroids[topics] + 0.8 * np_rng.standard_normal((chunks, dims)).astype(np.float32)
+    return texts, embeddings, centroids, cases
+
+def build_snapshot(ids, embeddings, texts) -> LocalSnapshot:
+    """Same arrays rag_indexer writes to a shard, built in memory."""
+    vocabulary, rows, term_ids, counts, lengths = {}, [], [], [], []
+    for row, text in enumerate(texts):
+        terms = analyze(text)
+        lengths.append(len(terms))
+        for term in set(terms):
+            rows.append(row)
+            term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(terms.count(term))
+    lexical = BM25Index(ids, list(vocabulary), np.array(rows), np.array(term_ids), np.array(counts), np.array(lengths))
+    return LocalSnapshot(LocalVectorIndex(ids, embeddings), lexical)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--citations-per-topic", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    texts, embeddings, centroids, cases = synthetic_corpus(args.chunks, args.dims, args.citations_per_topic, args.seed)
+    ids = [f"chunk-{i}" for i in range(args.chunks)]
+    t0 = time.perf_counter()
+    snapshot = build_snapshot(ids, embeddings, texts)
+    print(f"corpus: {args.chunks} chunks, {len(snapshot.lexical.vocabulary)} terms, built in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    rng = random.Random(args.seed + 1)
+    np_rng = np.random.default_rng(args.seed + 1)
+    names = sorted(cases)
+    vector_hits = hybrid_hits = 0
+    vector_chars = hybrid_chars = 0
+    stages = {"vector": [], "lexical": [], "fusion": [], "rerank": []}
+
+    for _ in range(args.queries):
+        name = rng.choice(names)
+        target = ids[cases[name]]
+        topic = int(cases[name]) % len(TOPICS)
+        query_text = f"Contractor engagement where {TOPICS[topic]} is disputed, similar to {name}"
+        embedding = centroids[topic] + 0.5 * np_rng.standard_normal(args.dims).astype(np.float32)
+
+        t = time.perf_counter()
+        vector = snapshot.vectors.query([embedding], num_neighbors=CANDIDATES)[0]
+        stages["vector"].append((time.perf_counter() - t) * 1000)
+        vector_ids = [datapoint_id for datapoint_id, _, _ in vector]
+        vector_hits += target in vector_ids[:VECTOR_K]
+        vector_chars += sum(len(texts[int(i.split("-")[1])]) for i in vector_ids[:VECTOR_K])
+
+        query_terms = analyze(query_text)
+        t = time.perf_counter()
+        lexical = snapshot.lexical.query(query_terms, CANDIDATES)
+        stages["lexical"].append((time.perf_counter() - t) * 1000)
+
+        t = time.perf_counter()
+        fused = reciprocal_rank_fusion([vector_ids, [datapoint_id for datapoint_id, _ in lexical]])[:CANDIDATES]
+        stages["fusion"].append((time.perf_counter() - t) * 1000)
+
+        t = time.perf_counter()
+        ranked = rerank(query_terms, [(i, texts[int(i.split("-")[1])], score) for i, score in fused],
+                        snapshot.lexical.term_idf, RERANK_TOP_K, 0.5, 0.3, 0.2)
+        stages["rerank"].append((time.perf_counter() - t) * 1000)
+        hybrid_hits += target in [datapoint_id for datapoint_id, _ in ranked]
+        hybrid_chars += sum(len(texts[int(i.split("-")[1])]) for i, _ in ranked)
+
+    print(f"\n{'retrieval':<22}{'cited chunk found':>18}{'context chars':>15}")
+    print(f"{'vector top-' + str(VECTOR_K):<22}{vector_hits / args.queries:>17.1%}{vector_chars / args.queries:>15.0f}")
+    print(f"{'hybrid top-' + str(RERANK_TOP_K):<22}{hybrid_hits / args.queries:>17.1%}{hybrid_chars / args.queries:>15.0f}")
+
+    print(f"\n{'stage':<10}{'p50 ms':>9}{'p99 ms':>9}")
+    for stage, latencies in stages.items():
+        print(f"{stage:<10}{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 99):>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: in-process vector index vs. the remote Matching Engine index.
+
+Builds a synthetic clustered corpus (sized like the CEST guidance + case law
+corpus), then reports recall@5 against exact float64 search and per-query
+latency for the float32 and int8 local indexes. When --endpoint is given the
+same query vectors are also sent to the deployed index to measure the remote
+round trip (recall is not meaningful there, the corpus is synthetic).
+
+Usage:
+    python benchmarks/bench_local_index.py --vectors 20000 --queries 200
+    python benchmarks/bench_local_index.py --endpoint projects/.../indexEndpoints/... --deployed-index-id ir35_cest_deployed
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "assessment_api"))
+
+from local_index import LocalVectorIndex  # noqa: E402
+
+K = 5
+
+def synthetic_corpus(n: int, dims: int, clusters: int, seed: int):
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dims)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=n)
+    vectors = centroids[assignment] + 0.6 * rng.standard_normal((n, dims)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def synthetic_queries(corpus: np.ndarray, count: int, seed: int):
+    rng = np.random.default_rng(seed + 1)
+    picks = corpus[rng.integers(0, len(corpus), size=count)]
+    queries = picks + 0.3 * rng.standard_normal(picks.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int):
+    scores = queries.astype(np.float64) @ corpus.astype(np.float64).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def recall_at_k(index: LocalVectorIndex, queries: np.ndarray, truth: np.ndarray, k: int) -> float:
+    results = index.query(queries, num_neighbors=k)
+    hits = 0
+    for row, expected in zip(results, truth):
+        hits += len({int(i) for i, _, _ in row} & set(expected.tolist()))
+    return hits / (len(queries) * k)
+
+def time_queries(index: LocalVectorIndex, queries: np.ndarray, k: int, batch: int):
+    latencies = []
+    for start in range(0, len(queries), batch):
+        chunk = queries[start:start + batch]
+        t0 = time.perf_counter()
+        index.query(chunk, num_neighbors=k)
+        latencies.append((time.perf_counter() - t0) * 1000 / len(chunk))
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def time_remote(endpoint: str, deployed_index_id: str, queries: np.ndarray, k: int):
+    from google.cloud import aiplatform
+
+    index_endpoint = aiplatform.MatchingEngineIndexEndpoint(index_endpoint_name=endpoint.split('/')[-1])
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        index_endpoint.find_neighbors(deployed_index_id=deployed_index_id, queries=[query.tolist()], num_neighbors=k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--endpoint", help="Index endpoint resource name to time remote queries against")
+    parser.add_argument("--deployed-index-id", default="ir35_cest_deployed")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.vectors, args.dims, args.clusters, args.seed)
+    queries = synthetic_queries(corpus, args.queries, args.seed)
+    ids = [str(i) for i in range(len(corpus))]
+    truth = exact_top_k(corpus, queries, K)
+
+    print(f"corpus={args.vectors}x{args.dims} queries={args.queries} k={K}")
+    print(f"{'index':<16}{'memory MB':>10}{'recall@5':>10}{'p50 ms/q':>10}{'p99 ms/q':>10}{'batch p50':>11}")
+
+    for label, quantize in (("local float32", False), ("local int8", True)):
+        t0 = time.perf_counter()
+        index = LocalVectorIndex(ids, corpus, quantize=quantize)
+        build_ms = (time.perf_counter() - t0) * 1000
+        recall = recall_at_k(index, queries, truth, K)
+        p50, p99 = time_queries(index, queries, K, batch=1)
+        batch_p50, _ = time_queries(index, queries, K, batch=32)
+        print(f"{label:<16}{index.nbytes / 1e6:>10.1f}{recall:>10.3f}{p50:>10.2f}{p99:>10.2f}{batch_p50:>11.3f}  (build {build_ms:.0f} ms)")
+
+    if args.endpoint:
+        p50, p99 = time_remote(args.endpoint, args.deployed_index_id, queries, K)
+        print(f"{'remote':<16}{'-':>10}{'-':>10}{p50:>10.2f}{p99:>10.2f}{'-':>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: secret lookups through RefreshingCache vs. a Secret Manager call
+per lookup.
+
+The Secret Manager round trip is stubbed with a sleep. Reader threads look
+up a few secrets in a loop for several TTLs, so the cache goes through
+background refreshes (and a failing refresh, with --fail-every) while
+being read. Reports lookup latency and how many loader calls were made.
+
+Usage:
+    python benchmarks/bench_refreshing_cache.py --seconds 6 --ttl 1
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "shared"))
+
+from refreshing_cache import RefreshingCache  # noqa: E402
+
+SECRETS = ["pdf-service-key", "n8n-webhook-token", "gemini-config"]
+
+class StubSecretManager:
+    def __init__(self, latency_ms: float, fail_every: int):
+        self.latency = latency_ms / 1000
+        self.fail_every = fail_every
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def load(self, name: str) -> str:
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.latency)
+        if self.fail_every and call % self.fail_every == 0:
+            raise RuntimeError("stub Secret Manager error")
+        return f"{name}-v{call}"
+
+def run_readers(lookup, readers: int, seconds: float):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader(worker: int):
+        local = []
+        i = worker
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            lookup(SECRETS[i % len(SECRETS)])
+            local.append((time.perf_counter() - t0) * 1000)
+            i += 1
+            time.sleep(0.005)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=reader, args=(w,)) for w in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=6)
+    parser.add_argument("--ttl", type=float, default=1, help="Cache TTL in seconds")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--fail-every", type=int, default=7, help="Fail every Nth Secret Manager call (0 = never)")
+    args = parser.parse_args()
+
+    print(f"{'lookup':<18}{'lookups':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'loader calls':>14}")
+
+    uncached = StubSecretManager(args.latency_ms, 0)
+    latencies = run_readers(uncached.load, args.readers, args.seconds / 3)
+    print(f"{'uncached':<18}{len(latencies):>9}{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 99):>9.2f}{max(latencies):>9.2f}{uncached.calls:>14}")
+
+    stub = StubSecretManager(args.latency_ms, args.fail_every)
+    cache = RefreshingCache(stub.load, ttl_seconds=args.ttl, refresh_ahead_seconds=args.ttl / 4, max_stale_seconds=args.ttl * 10, retry_seconds=args.ttl / 10, preload=SECRETS, check_seconds=args.ttl / 10)
+    cache.start()
+    time.sleep(args.latency_ms * 2 / 1000)
+    latencies = run_readers(cache.get, args.readers, args.seconds)
+    cache.stop()
+    print(f"{'RefreshingCache':<18}{len(latencies):>9}{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 99):>9.3f}{max(latencies):>9.3f}{stub.calls:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: time to first byte of assess_engagement, buffered vs. streamed.
+
+Gemini is stubbed as a token stream: a first-token delay, then the JSON
+assessment in small chunks. The buffered handler (assessment.run_assessment)
+sends nothing until the whole response is ready; the streamed handler
+(assessment.stream_assessment) is timed to each server-sent event.
+
+Usage:
+    python benchmarks/bench_streaming.py --requests 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "assessment_api"))
+
+from models import AssessmentRequest  # noqa: E402
+from assessment import run_assessment, stream_assessment, parse_assessment  # noqa: E402
+from streaming import format_sse  # noqa: E402
+
+ANSWER = json.dumps({
+    "determination": "Outside IR35",
+    "confidence_score": 0.78,
+    "reasoning": " ".join(["The contractor has a genuine right of substitution and controls how the work is done."] * 12)
+})
+
+class StubGemini:
+    def __init__(self, first_token_ms: float, chunk_ms: float, chunk_chars: int, retrieval_ms: float):
+        self.first_token = first_token_ms / 1000
+        self.chunk = chunk_ms / 1000
+        self.chunk_chars = chunk_chars
+        self.retrieval = retrieval_ms / 1000
+
+    def retrieve(self, query_text, restricts):
+        time.sleep(self.retrieval)
+        return [], {"total": self.retrieval * 1000}
+
+    def stream(self, model, prompt):
+        time.sleep(self.first_token)
+        for i in range(0, len(ANSWER), self.chunk_chars):
+            time.sleep(self.chunk)
+            yield ANSWER[i:i + self.chunk_chars]
+
+    def generate(self, model, prompt):
+        return parse_assessment("".join(self.stream(model, prompt)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--first-token-ms", type=float, default=600)
+    parser.add_argument("--chunk-ms", type=float, default=25)
+    parser.add_argument("--chunk-chars", type=int, default=24)
+    parser.add_argument("--retrieval-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    gemini = StubGemini(args.first_token_ms, args.chunk_ms, args.chunk_chars, args.retrieval_ms)
+    executor = ThreadPoolExecutor(max_workers=4)
+    data = AssessmentRequest(engagement_id="eng-1", role_details="Senior Python Developer", answers={})
+    written = Future()
+    written.set_result(True)
+    common = dict(retrieve=gemini.retrieve, load_model=lambda: "model", record_audit=lambda d, r: written, executor=executor)
+
+    buffered = []
+    for _ in range(args.requests):
+        t0 = time.perf_counter()
+        run_assessment(data, generate=gemini.generate, **common)[0].model_dump_json()
+        buffered.append((time.perf_counter() - t0) * 1000)
+
+    marks = {"first byte": [], "references": [], "determination": [], "first reasoning": [], "result": []}
+    for _ in range(args.requests):
+        t0 = time.perf_counter()
+        seen = set()
+        for event, payload in stream_assessment(data, generate_stream=gemini.stream, wait_for_audits=lambda futures: None, **common):
+            format_sse(event, payload)
+            elapsed = (time.perf_counter() - t0) * 1000
+            mark = {"accepted": "first byte", "reasoning": "first reasoning"}.get(event, event)
+            if mark in marks and mark not in seen:
+                seen.add(mark)
+                marks[mark].append(elapsed)
+
+    print(f"{'':<28}{'p50 ms':>9}{'p99 ms':>9}")
+    print(f"{'buffered: first byte':<28}{np.percentile(buffered, 50):>9.1f}{np.percentile(buffered, 99):>9.1f}")
+    for mark, values in marks.items():
+        print(f"{'streamed: ' + mark:<28}{np.percentile(values, 50):>9.1f}{np.percentile(values, 99):>9.1f}")
+    executor.shutdown()
+
+if __name__ == "__main__":
+    main()
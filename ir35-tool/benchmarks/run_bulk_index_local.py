@@ -0,0 +1,128 @@
+"""
+Local run of the rag_indexer bulk pipeline against fake storage and a stub
+embedding model / vector index, for testing without GCP.
+
+Fake "PDFs" are plain-text documents served from memory with per-object
+download latency. Use --crash-after to kill the process after N checkpointed
+documents, then run again with the same --checkpoint to see it resume.
+
+Usage:
+    python benchmarks/run_bulk_index_local.py --documents 50
+    python benchmarks/run_bulk_index_local.py --documents 50 --checkpoint /tmp/ckpt.json --crash-after 20
+    python benchmarks/run_bulk_index_local.py --documents 50 --checkpoint /tmp/ckpt.json
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "rag_indexer"))
+
+from chunking import chunk_text  # noqa: E402
+from embedding import embed_texts  # noqa: E402
+from manifest import build_manifest, diff_manifests  # noqa: E402
+from pipeline import run_bulk_index, FileCheckpoint  # noqa: E402
+
+class FakeStorage:
+    def __init__(self, documents: int, paragraphs: int, latency_ms: float, seed: int):
+        rng = random.Random(seed)
+        vocabulary = [f"term{i}" for i in range(2000)]
+        self.latency = latency_ms / 1000
+        self.objects = {}
+        for d in range(documents):
+            text = "\n\n".join(" ".join(rng.choices(vocabulary, k=rng.randint(40, 160))) for _ in range(paragraphs))
+            self.objects[f"gs://fake-bucket/guidance/doc-{d:04d}.pdf"] = text.encode("utf-8")
+
+    def list(self):
+        return [(url, "1") for url in sorted(self.objects)]
+
+    def download(self, url: str) -> bytes:
+        time.sleep(self.latency)
+        return self.objects[url]
+
+class StubIndex:
+    """Stands in for the embedding model, Matching Engine index and manifest store."""
+
+    def __init__(self, rtt_ms: float):
+        self.rtt = rtt_ms / 1000
+        self.datapoints = {}
+        self.manifests = {}
+        self.embed_requests = 0
+        self.lock = threading.Lock()
+
+    def embed_batch(self, texts):
+        with self.lock:
+            self.embed_requests += 1
+        time.sleep(self.rtt)
+        return [[float(len(t) % 13)] * 8 for t in texts]
+
+    def prepare(self, document_url, chunks):
+        current = build_manifest(document_url, chunks)
+        added, _, removed = diff_manifests(self.manifests.get(document_url, {}), current)
+        by_id = dict(zip(current, chunks))
+        embeddings = embed_texts(
+            self.embed_batch, [by_id[i]["content"] for i in added],
+            max_instances=250, max_tokens=20000, concurrency=4, requests_per_minute=6000, max_retries=3
+        ) if added else []
+        return {"document_url": document_url, "manifest": current, "added": added, "embeddings": embeddings, "removed": removed}
+
+    def commit(self, document_url, plan):
+        time.sleep(self.rtt)
+        with self.lock:
+            self.datapoints.update(zip(plan["added"], plan["embeddings"]))
+            for datapoint_id in plan["removed"]:
+                self.datapoints.pop(datapoint_id, None)
+            self.manifests[document_url] = plan["manifest"]
+        return {"chunks_indexed": len(plan["added"]), "chunks_unchanged": len(plan["manifest"]) - len(plan["added"]), "chunks_removed": len(plan["removed"])}
+
+class CrashingCheckpoint(FileCheckpoint):
+    def __init__(self, path: str, crash_after: int):
+        super().__init__(path)
+        self.crash_after = crash_after
+        self.marked = 0
+
+    def mark_done(self, document_url: str, generation: str):
+        super().mark_done(document_url, generation)
+        self.marked += 1
+        if self.crash_after and self.marked >= self.crash_after:
+            print(f"simulated crash after {self.marked} documents")
+            os._exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=60)
+    parser.add_argument("--download-ms", type=float, default=80)
+    parser.add_argument("--rtt-ms", type=float, default=100)
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: fresh temporary file)")
+    parser.add_argument("--crash-after", type=int, default=0)
+    parser.add_argument("--sequential", action="store_true", help="One worker per stage, for comparison")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or os.path.join(os.environ.get("TMPDIR", "/tmp"), f"bulk-index-{os.getpid()}.json")
+    storage = FakeStorage(args.documents, args.paragraphs, args.download_ms, seed=1)
+    index = StubIndex(args.rtt_ms)
+    workers = {"download": 1, "extract": 1, "chunk": 1, "embed": 1, "upsert": 1} if args.sequential else {"download": 4, "extract": 2, "chunk": 1, "embed": 2, "upsert": 2}
+
+    t0 = time.perf_counter()
+    summary = run_bulk_index(
+        storage.list(),
+        CrashingCheckpoint(checkpoint_path, args.crash_after),
+        download=storage.download,
+        extract=lambda content: content.decode("utf-8"),
+        chunk=chunk_text,
+        embed=index.prepare,
+        upsert=index.commit,
+        workers=workers,
+        queue_size=4
+    )
+    elapsed = time.perf_counter() - t0
+
+    print(f"checkpoint={checkpoint_path}")
+    print(f"documents indexed={summary['documents_indexed']} failed={len(summary['failed'])} chunks={summary['chunks_indexed']}")
+    print(f"embedding requests={index.embed_requests} elapsed={elapsed:.2f}s ({summary['documents_indexed'] / elapsed:.1f} docs/s)")
+
+if __name__ == "__main__":
+    main()
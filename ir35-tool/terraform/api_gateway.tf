@@ -39,7 +39,8 @@ resource "google_api_gateway_api_config" "ir35_api_config" {
       contents = base64encode(templatefile("${path.module}/../security/openapi-spec.yaml", {
         PROJECT_ID         = var.project_id
         REGION             = var.region
-        ASSESSMENT_API_URL = google_cloudfunctions2_function.assessment_api.service_config[0].uri
+        ASSESSMENT_API_URL       = google_cloudfunctions2_function.assessment_api.service_config[0].uri
+        ASSESSMENT_BATCH_API_URL = google_cloudfunctions2_function.assessment_batch_api.service_config[0].uri
       }))
     }
   }
@@ -89,3 +90,12 @@ resource "google_cloud_run_service_iam_member" "gateway_invoker" {
   role     = "roles/run.invoker"
   member   = "serviceAccount:${google_service_account.api_gateway_sa.email}"
 }
+
+# Allow Gateway SA to invoke the Batch Assessment Cloud Function
+resource "google_cloud_run_service_iam_member" "gateway_batch_invoker" {
+  project  = var.project_id
+  location = var.region
+  service  = google_cloudfunctions2_function.assessment_batch_api.name
+  role     = "roles/run.invoker"
+  member   = "serviceAccount:${google_service_account.api_gateway_sa.email}"
+}
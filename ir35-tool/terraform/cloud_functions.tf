@@ -13,6 +13,8 @@ resource "google_storage_bucket" "function_source_bucket" {
 # RAG Indexer Function
 # ------------------------------------------------------------------------------
 
+# Modules in backend/shared are symlinked into each function directory; the
+# archive follows the links, so each zip carries its own copy.
 data "archive_file" "rag_indexer_source" {
   type        = "zip"
   source_dir  = "${path.module}/../backend/rag_indexer"
@@ -43,17 +45,18 @@ resource "google_cloudfunctions2_function" "rag_indexer" {
 
   service_config {
     max_instance_count = 3
-    available_memory   = "512M"
+    available_memory   = "1024M" # Bulk mode buffers several documents between pipeline stages
     timeout_seconds    = 540
     vpc_connector      = google_vpc_access_connector.connector.id # Added VPC connector
 
     service_account_email = local.sa_email
 
     environment_variables = {
-      PROJECT_ID           = var.project_id
-      REGION               = var.region
-      VERTEX_AI_ENDPOINT   = google_vertex_ai_index_endpoint.endpoint.name
-      VERTEX_AI_INDEX_NAME = google_vertex_ai_index.index.name
+      PROJECT_ID               = var.project_id
+      REGION                   = var.region
+      VERTEX_AI_ENDPOINT       = google_vertex_ai_index_endpoint.endpoint.name
+      VERTEX_AI_INDEX_NAME     = google_vertex_ai_index.index.name
+      LOCAL_INDEX_SNAPSHOT_URI = "gs://${google_storage_bucket.data_bucket.name}/vector-snapshots/"
     }
   }
 
@@ -96,19 +99,66 @@ resource "google_cloudfunctions2_function" "assessment_api" {
   }
 
   service_config {
-    max_instance_count = 10
-    available_memory   = "1024M" # Gemini needs more memory
-    timeout_seconds    = 60
+    max_instance_count               = 10
+    available_memory                 = "1024M" # Gemini needs more memory
+    available_cpu                    = "1"     # Required for request concurrency above 1
+    max_instance_request_concurrency = 8       # Requests mostly wait on Vertex AI, so one instance serves several
+    timeout_seconds                  = 60
     ingress_settings   = "ALLOW_INTERNAL_AND_GCLB"                # API Gateway only
     vpc_connector      = google_vpc_access_connector.connector.id # Added VPC connector
 
     service_account_email = local.sa_email
 
     environment_variables = {
-      PROJECT_ID           = var.project_id
-      REGION               = var.region
-      VERTEX_AI_ENDPOINT   = google_vertex_ai_index_endpoint.endpoint.name
-      VERTEX_AI_INDEX_NAME = google_vertex_ai_index.index.name
+      PROJECT_ID               = var.project_id
+      REGION                   = var.region
+      VERTEX_AI_ENDPOINT       = google_vertex_ai_index_endpoint.endpoint.name
+      VERTEX_AI_INDEX_NAME     = google_vertex_ai_index.index.name
+      LOCAL_INDEX_SNAPSHOT_URI = "gs://${google_storage_bucket.data_bucket.name}/vector-snapshots/"
+      PIPELINE_WORKERS         = "16"
+    }
+  }
+
+  labels = {
+    environment = var.environment
+    component   = "assessment-api"
+  }
+}
+
+# Batch endpoint for bulk reassessment: same source as the Assessment API,
+# one batch per instance with a longer timeout.
+resource "google_cloudfunctions2_function" "assessment_batch_api" {
+  name        = "assessment-batch-api"
+  location    = var.region
+  description = "Batch Assessment API for bulk IR35 reassessment"
+
+  build_config {
+    runtime     = "python311"
+    entry_point = "assess_engagements_batch"
+    source {
+      storage_source {
+        bucket = google_storage_bucket.function_source_bucket.name
+        object = google_storage_bucket_object.assessment_api_zip.name
+      }
+    }
+  }
+
+  service_config {
+    max_instance_count = 3
+    available_memory   = "1024M"
+    timeout_seconds    = 540
+    ingress_settings   = "ALLOW_INTERNAL_AND_GCLB"                # API Gateway only
+    vpc_connector      = google_vpc_access_connector.connector.id
+
+    service_account_email = local.sa_email
+
+    environment_variables = {
+      PROJECT_ID                   = var.project_id
+      REGION                       = var.region
+      VERTEX_AI_ENDPOINT           = google_vertex_ai_index_endpoint.endpoint.name
+      VERTEX_AI_INDEX_NAME         = google_vertex_ai_index.index.name
+      LOCAL_INDEX_SNAPSHOT_URI     = "gs://${google_storage_bucket.data_bucket.name}/vector-snapshots/"
+      BATCH_GENERATION_CONCURRENCY = "8"
     }
   }
 
@@ -136,6 +186,13 @@ resource "google_storage_bucket_iam_member" "sa_data_bucket_access" {
   member = "serviceAccount:${local.sa_email}"
 }
 
+# Allow SA to write local vector index snapshots to the data bucket
+resource "google_storage_bucket_iam_member" "sa_data_bucket_writer" {
+  bucket = google_storage_bucket.data_bucket.name
+  role   = "roles/storage.objectUser"
+  member = "serviceAccount:${local.sa_email}"
+}
+
 # Allow SA to write to Firestore (Datastore User)
 resource "google_project_iam_member" "sa_firestore_user" {
   project = var.project_id
@@ -0,0 +1,100 @@
+"""
+Benchmark: a burst of proposal requests answered synchronously vs. through
+the async job mode (POST /generate/proposal?async=true + GET /jobs/{id}).
+
+Cloud Run admits --concurrency requests per instance; the rest wait for a
+slot. Synchronously, a request holds its slot until the signed URL is
+ready. In job mode it only holds it for the submission, and JobManager
+workers do the work. The pipeline (Gemini, render, upload) is stubbed with
+a fixed latency. Reports how long clients wait for an HTTP response and
+for their URL, and the time for the whole burst.
+
+Usage:
+    python benchmarks/bench_async_jobs.py --requests 64 --concurrency 8 --work-ms 1500
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.jobs import JobManager  # noqa: E402
+
+class StubPipeline:
+    def __init__(self, work_ms: float):
+        self.work = work_ms / 1000
+
+    async def build(self, client_id: str) -> str:
+        await asyncio.sleep(self.work)
+        return f"https://storage.example/{client_id}"
+
+    async def run_job(self, client_id: str, job_id: str):
+        return {"url": await self.build(client_id)}
+
+async def run_sync(pipeline: StubPipeline, requests: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+    responses = []
+
+    async def client(i: int):
+        t0 = time.perf_counter()
+        async with slots:
+            await pipeline.build(f"client-{i}")
+        responses.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client(i) for i in range(requests)])
+    return responses, responses, (time.perf_counter() - t0) * 1000
+
+async def run_jobs(pipeline: StubPipeline, requests: int, concurrency: int, workers: int, poll_ms: float):
+    slots = asyncio.Semaphore(concurrency)
+    manager = JobManager(pipeline.run_job, workers=workers, queue_size=requests, ttl_seconds=3600)
+    manager.start()
+    responses, results = [], []
+
+    async def client(i: int):
+        t0 = time.perf_counter()
+        async with slots:
+            job = manager.submit(f"client-{i}")
+        responses.append((time.perf_counter() - t0) * 1000)
+        while True:
+            await asyncio.sleep(poll_ms / 1000)
+            async with slots:
+                job = await manager.get(job["job_id"])
+            if job["status"] == "succeeded":
+                break
+        results.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client(i) for i in range(requests)])
+    elapsed = (time.perf_counter() - t0) * 1000
+    await manager.shutdown()
+    return responses, results, elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8, help="Request slots per instance")
+    parser.add_argument("--workers", type=int, default=8, help="JobManager workers")
+    parser.add_argument("--work-ms", type=float, default=1500)
+    parser.add_argument("--poll-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    # Per-job log lines would drown the table
+    logging.getLogger().setLevel(logging.WARNING)
+    pipeline = StubPipeline(args.work_ms)
+    print(f"{'mode':<8}{'response p50':>14}{'response p99':>14}{'url p50':>10}{'url p99':>10}{'burst ms':>10}")
+    for label, run in (
+        ("sync", run_sync(pipeline, args.requests, args.concurrency)),
+        ("jobs", run_jobs(pipeline, args.requests, args.concurrency, args.workers, args.poll_ms))
+    ):
+        responses, results, elapsed = await run
+        print(f"{label:<8}{np.percentile(responses, 50):>14.1f}{np.percentile(responses, 99):>14.1f}"
+              f"{np.percentile(results, 50):>10.0f}{np.percentile(results, 99):>10.0f}{elapsed:>10.0f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Benchmark: generating proposals for many clients by calling
+/generate/proposal in a loop (what sales ops did) vs. one
+/generate/proposals/batch request, with and without "zip": true.
+
+Gemini and GCS are stubbed with fixed latencies and the content cache is
+in memory only, emptied before each mode, so every distinct generation is
+a Gemini call. DOCX proposals are rendered for
+real from a generated template; the batch renders them on a render pool
+of --workers processes, so its throughput should grow with the cores
+available. --duplicates repeats each client's request that many times
+within the list; the content cache generates each client's request once,
+with concurrent repeats waiting for it (only requests from the same client
+can share a generation).
+
+Usage:
+    python benchmarks/bench_batch.py --clients 48 --workers 4 --gemini-ms 800 --upload-ms 120
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+
+from docx import Document
+
+# Render workers are spawned processes (which re-import this module); they
+# find the template through the inherited environment
+if "TEMPLATE_DIR" not in os.environ:
+    os.environ["TEMPLATE_DIR"] = tempfile.mkdtemp(prefix="bench-batch-")
+TEMPLATE_DIR = os.environ["TEMPLATE_DIR"]
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.api import routes  # noqa: E402
+from src.schemas.requests import BatchProposalRequest, ProposalRequest  # noqa: E402
+from src.services.render_pool import RenderPool  # noqa: E402
+from src.services.content_cache import SectionCache  # noqa: E402
+from src.services.signing import FakeUrlSigner  # noqa: E402
+from src.services.storage import storage_service  # noqa: E402
+from src.services.templates import template_registry  # noqa: E402
+
+SECTION = json.dumps({
+    "title": "Digital Transformation Proposal",
+    "content": "A phased programme moving core workloads to the cloud. " * 6,
+    "key_points": ["Reduced run cost", "Faster delivery", "Lower risk"]
+})
+
+class StubResponse:
+    text = SECTION
+
+class StubGemini:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return StubResponse()
+
+class StubBlob:
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+
+    def upload_from_file(self, file_obj, size=None, content_type=None, if_generation_match=None):
+        file_obj.read()
+        time.sleep(self.latency)
+
+class StubGcs:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name, chunk_size=None):
+        return StubBlob(name, self.latency)
+
+def build_template(path: str):
+    doc = Document()
+    doc.add_heading("Proposal for {{ client_id }}", 0)
+    doc.add_heading("{{ title }}", 1)
+    for i in range(30):
+        doc.add_paragraph(f"Section {i}: {{{{ content }}}}")
+    doc.save(path)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=48)
+    parser.add_argument("--duplicates", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--gemini-ms", type=float, default=800)
+    parser.add_argument("--upload-ms", type=float, default=120)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    build_template(os.path.join(TEMPLATE_DIR, template_registry.template_name("v1", ".docx")))
+
+    gemini = StubGemini(args.gemini_ms)
+    routes.content_generator.model = gemini
+    storage_service.client = StubGcs(args.upload_ms)
+    storage_service.bucket_name = "bench"
+    storage_service.signer = FakeUrlSigner()
+
+    pool = RenderPool(workers=args.workers, queue_size=args.workers * 2, timeout_seconds=60)
+    pool.start()
+    routes.pdf_render_pool = pool
+
+    requests = [
+        ProposalRequest(client_id=f"client-{i}", domain_profile="consulting", project_scope=["Cloud Migration"], financial_data={"budget": "500000"}, output_format="docx")
+        for i in range(args.clients)
+        for _ in range(args.duplicates)
+    ]
+
+    async def loop():
+        for request in requests:
+            await routes.generate_proposal(request, async_mode=False)
+
+    async def batch(zip_outputs: bool):
+        response = await routes.generate_proposals_batch(BatchProposalRequest(proposals=requests, zip=zip_outputs), async_mode=False)
+        assert response["failed"] == 0, response
+
+    print(f"{'mode':<12}{'proposals':>10}{'seconds':>9}{'per min':>9}{'gemini calls':>14}")
+    for label, run in (("loop", loop), ("batch", lambda: batch(False)), ("batch zip", lambda: batch(True))):
+        gemini.calls = 0
+        routes.content_generator.cache = SectionCache(max_entries=len(requests), ttl_seconds=3600)
+        t0 = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - t0
+        print(f"{label:<12}{len(requests):>10}{elapsed:>9.1f}{len(requests) / elapsed * 60:>9.0f}{gemini.calls:>14}")
+
+    pool.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Benchmark: generate_section_async latency on a cache miss (stubbed Gemini
+call), a memory hit, and a persistent-store hit (a fresh instance's first
+lookup, backed by DiskSectionStore).
+
+Usage:
+    python benchmarks/bench_content_cache.py --requests 200 --gemini-ms 800
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.content import ContentGenerator  # noqa: E402
+from src.services.content_cache import SectionCache, DiskSectionStore  # noqa: E402
+
+SECTION = json.dumps({"title": "Scope", "content": "A phased cloud migration.", "key_points": ["One", "Two"]})
+
+class StubResponse:
+    text = SECTION
+
+class StubGemini:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return StubResponse()
+
+async def timed(coro):
+    t0 = time.perf_counter()
+    await coro
+    return (time.perf_counter() - t0) * 1000
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--gemini-ms", type=float, default=800)
+    parser.add_argument("--misses", type=int, default=5)
+    args = parser.parse_args()
+
+    store_dir = tempfile.mkdtemp(prefix="bench-content-cache-")
+    stub = StubGemini(args.gemini_ms)
+
+    def generator():
+        g = ContentGenerator(cache=SectionCache(1024, 3600, DiskSectionStore(store_dir)))
+        g.model = stub
+        return g
+
+    prompts = [f"Create a proposal for client-{i} with scope: Cloud Migration." for i in range(args.requests)]
+    warm = generator()
+    misses = [await timed(warm.generate_section_async(p, "consulting")) for p in prompts[:args.misses]]
+    await asyncio.gather(*[warm.generate_section_async(p, "consulting") for p in prompts[args.misses:]])
+    await asyncio.sleep(0.2)  # let background store writes finish
+
+    # Same prompt with different whitespace: normalized to the same key
+    memory_hits = [await timed(warm.generate_section_async("  " + p.replace(" ", "  \n"), "consulting")) for p in prompts]
+    cold = generator()
+    store_hits = [await timed(cold.generate_section_async(p, "consulting")) for p in prompts]
+    bypass = await timed(cold.generate_section_async(prompts[0], "consulting", bypass_cache=True))
+    shutil.rmtree(store_dir)
+
+    print(f"{'lookup':<20}{'p50 ms':>10}{'max ms':>10}")
+    for label, latencies in (("miss (Gemini)", misses), ("memory hit", memory_hits), ("disk store hit", store_hits)):
+        print(f"{label:<20}{statistics.median(latencies):>10.3f}{max(latencies):>10.3f}")
+    print(f"{'bypass_cache':<20}{bypass:>10.3f}")
+    print(f"Gemini calls: {stub.calls} for {args.requests * 3 + 1} lookups")
+
+if __name__ == "__main__":
+    asyncio.run(main())
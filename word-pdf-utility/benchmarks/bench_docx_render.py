@@ -0,0 +1,83 @@
+"""
+Benchmark: DOCX render time per request, loading DocxTemplate from disk on
+every request (the previous render_docx) vs. DocxTemplateCache.
+
+Builds a proposal-shaped .docx template (--paragraphs body paragraphs with
+Jinja2 tags) in a temporary directory, so no template file is needed.
+
+Usage:
+    python benchmarks/bench_docx_render.py --requests 100 --paragraphs 40
+"""
+import os
+import io
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from docx import Document  # noqa: E402
+from docxtpl import DocxTemplate  # noqa: E402
+from src.services.word_factory import DocxTemplateCache  # noqa: E402
+
+DATA = {
+    "client_id": "acme-corp-001",
+    "title": "Digital Transformation Proposal",
+    "content": "A phased programme moving core workloads to the cloud. " * 4,
+    "key_points": [f"Key point {i}" for i in range(8)]
+}
+
+def build_template(path: str, paragraphs: int):
+    doc = Document()
+    doc.add_heading("Proposal for {{ client_id }}", 0)
+    doc.add_heading("{{ title }}", 1)
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Section {i}: {{{{ content }}}}")
+    doc.add_paragraph("{% for point in key_points %}")
+    doc.add_paragraph("{{ point }}", style="List Bullet")
+    doc.add_paragraph("{% endfor %}")
+    doc.save(path)
+
+def time_ms(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    args = parser.parse_args()
+
+    template_dir = tempfile.mkdtemp(prefix="bench-docx-")
+    build_template(os.path.join(template_dir, "proposal.docx"), args.paragraphs)
+
+    def from_disk():
+        doc = DocxTemplate(os.path.join(template_dir, "proposal.docx"))
+        doc.render(DATA)
+        doc.save(io.BytesIO())
+
+    results = {"DocxTemplate(path)": [time_ms(from_disk) for _ in range(args.requests)]}
+
+    for label, auto_reload in (("cache (prod)", False), ("cache (dev reload)", True)):
+        cache = DocxTemplateCache(template_dir, auto_reload=auto_reload)
+
+        def cached():
+            doc = cache.new_template("proposal.docx")
+            doc.render(DATA, cache.jinja_env)
+            doc.save(io.BytesIO())
+
+        cached()
+        results[label] = [time_ms(cached) for _ in range(args.requests)]
+    shutil.rmtree(template_dir)
+
+    print(f"{'render':<22}{'p50 ms':>9}{'p99 ms':>9}")
+    for label, latencies in results.items():
+        latencies = sorted(latencies)
+        print(f"{label:<22}{statistics.median(latencies):>9.2f}{latencies[int(len(latencies) * 0.99) - 1]:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: CPU time per WeasyPrint render with the stylesheet inlined and a
+new FontConfiguration per render (the previous template) vs. the parsed
+stylesheets and shared FontConfiguration cached in each render worker.
+
+Runs in one process, as a render worker would; needs WeasyPrint and its
+system libraries (Pango).
+
+Usage:
+    python benchmarks/bench_pdf_stylesheets.py --renders 50
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.templates import template_registry  # noqa: E402
+from src.services.pdf_factory import render_pdf_sync, get_stylesheets  # noqa: E402
+
+DATA = {
+    "client_id": "acme-corp-001",
+    "title": "Digital Transformation Proposal",
+    "content": "A phased programme moving core workloads to the cloud. " * 20,
+    "key_points": [f"Key point {i}" for i in range(8)]
+}
+
+def render_inline(html_content: str, css: str) -> bytes:
+    from weasyprint import HTML
+    from weasyprint.text.fonts import FontConfiguration
+    inlined = html_content.replace("<head>", f"<head><style>{css}</style>", 1)
+    return HTML(string=inlined).write_pdf(font_config=FontConfiguration())
+
+def cpu_ms(fn, renders: int):
+    samples = []
+    for _ in range(renders):
+        t0 = time.process_time()
+        fn()
+        samples.append((time.process_time() - t0) * 1000)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=50)
+    parser.add_argument("--template-version", default="v1")
+    args = parser.parse_args()
+
+    html_content = template_registry.render(args.template_version, DATA)
+    css = "".join(open(path).read() for path in template_registry.stylesheet_paths(args.template_version))
+
+    # Warm up WeasyPrint, Pango and the worker caches
+    render_inline(html_content, css)
+    get_stylesheets(args.template_version)
+    render_pdf_sync(html_content, args.template_version)
+
+    results = {
+        "inline CSS": cpu_ms(lambda: render_inline(html_content, css), args.renders),
+        "cached CSS + fonts": cpu_ms(lambda: render_pdf_sync(html_content, args.template_version), args.renders)
+    }
+
+    print(f"{'render':<22}{'CPU p50 ms':>12}{'CPU mean ms':>13}")
+    for label, samples in results.items():
+        print(f"{label:<22}{statistics.median(samples):>12.1f}{statistics.mean(samples):>13.1f}")
+    saved = statistics.mean(results["inline CSS"]) - statistics.mean(results["cached CSS + fonts"])
+    print(f"CPU saved per render: {saved:.1f} ms")
+
+if __name__ == "__main__":
+    main()
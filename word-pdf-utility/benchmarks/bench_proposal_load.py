@@ -0,0 +1,128 @@
+"""
+Load test: concurrent /generate/proposal requests with blocking Gemini and
+GCS calls in the async handler (the previous route) vs. the async
+ContentGenerator and StorageService methods.
+
+Gemini and GCS are stubbed with fixed latencies; the DOCX path is rendered
+for real from a generated template. Requests call the route handler
+directly, --requests at a time for each concurrency level, so throughput
+should grow with concurrency until rendering saturates the CPU.
+
+Usage:
+    python benchmarks/bench_proposal_load.py --requests 64 --gemini-ms 800 --upload-ms 120
+"""
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from docx import Document  # noqa: E402
+from src.api import routes  # noqa: E402
+from src.schemas.requests import ProposalRequest  # noqa: E402
+from src.services.storage import storage_service  # noqa: E402
+from src.services.signing import FakeUrlSigner  # noqa: E402
+from src.services.templates import template_registry  # noqa: E402
+from src.services.word_factory import docx_template_cache, render_docx_sync  # noqa: E402
+
+SECTION = json.dumps({
+    "title": "Digital Transformation Proposal",
+    "content": "A phased programme moving core workloads to the cloud. " * 6,
+    "key_points": ["Reduced run cost", "Faster delivery", "Lower risk"]
+})
+
+class StubResponse:
+    text = SECTION
+
+class StubGemini:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def generate_content(self, prompt, generation_config=None):
+        time.sleep(self.latency)
+        return StubResponse()
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        await asyncio.sleep(self.latency)
+        return StubResponse()
+
+class StubBlob:
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+
+    def upload_from_file(self, file_obj, size=None, content_type=None, if_generation_match=None):
+        file_obj.read()
+        time.sleep(self.latency)
+
+class StubGcs:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name, chunk_size=None):
+        return StubBlob(name, self.latency)
+
+async def blocking_handler(request: ProposalRequest):
+    """The previous generate_proposal: blocking calls inside async def."""
+    prompt = f"Create a proposal for {request.client_id} with scope: {', '.join(request.project_scope)}."
+    section = routes.content_generator.generate_section(prompt, request.domain_profile)
+    data = {**section.model_dump(), "client_id": request.client_id}
+    sink = io.BytesIO()
+    render_docx_sync(data, template_registry.template_name(request.template_version, ".docx"), sink)
+    return storage_service.upload_and_sign(sink, f"proposal_{request.client_id}.docx", "application/octet-stream")
+
+async def load(handler, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        request = ProposalRequest(client_id=f"client-{i}", domain_profile="consulting", project_scope=["Cloud Migration"], financial_data={"budget": "500000"}, output_format="docx")
+        async with semaphore:
+            t0 = time.perf_counter()
+            await handler(request)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    return requests / (time.perf_counter() - t0), statistics.median(latencies)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--gemini-ms", type=float, default=800)
+    parser.add_argument("--upload-ms", type=float, default=120)
+    args = parser.parse_args()
+
+    template_dir = tempfile.mkdtemp(prefix="bench-load-")
+    doc = Document()
+    doc.add_heading("Proposal for {{ client_id }}", 0)
+    doc.add_paragraph("{{ content }}")
+    doc.save(os.path.join(template_dir, template_registry.template_name("v1", ".docx")))
+    docx_template_cache.template_dir = template_dir
+
+    routes.content_generator.model = StubGemini(args.gemini_ms)
+    storage_service.client = StubGcs(args.upload_ms)
+    storage_service.bucket_name = "bench"
+    storage_service.signer = FakeUrlSigner()
+
+    print(f"{'handler':<10}{'concurrency':>12}{'req/s':>9}{'p50 ms':>10}")
+    async def async_handler(request: ProposalRequest):
+        return await routes.generate_proposal(request, async_mode=False)
+
+    for label, handler in (("blocking", blocking_handler), ("async", async_handler)):
+        for concurrency in args.concurrency:
+            throughput, p50 = await load(handler, args.requests, concurrency)
+            print(f"{label:<10}{concurrency:>12}{throughput:>9.1f}{p50:>10.0f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
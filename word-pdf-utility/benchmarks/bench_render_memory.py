@@ -0,0 +1,126 @@
+"""
+Benchmark: peak Python memory of one DOCX render + upload, rendering to
+bytes and uploading with upload_from_string (the previous path) vs.
+rendering into a spool and streaming it with upload_from_file.
+
+The template embeds an incompressible image of --image-mb so the document
+is large. GCS is stubbed: a multipart upload (<= 8 MB) joins the body into
+one buffer like the real client; a resumable upload reads chunk_size at a
+time. Memory is measured with tracemalloc (Python allocations only).
+
+Usage:
+    python benchmarks/bench_render_memory.py --image-mb 24
+"""
+import io
+import os
+import sys
+import zlib
+import struct
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from docx import Document  # noqa: E402
+from src.core.config import settings  # noqa: E402
+from src.services.spool import new_spool  # noqa: E402
+from src.services.storage import StorageService  # noqa: E402
+from src.services.signing import FakeUrlSigner  # noqa: E402
+from src.services.word_factory import DocxTemplateCache  # noqa: E402
+from src.services import word_factory  # noqa: E402
+
+MULTIPART_LIMIT = 8 * 1024 * 1024
+
+def noise_png(path: str, megabytes: int):
+    width = 1024
+    height = megabytes * 1024 * 1024 // (width * 3)
+    raw = b"".join(b"\x00" + os.urandom(width * 3) for _ in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 1)))
+        f.write(chunk(b"IEND", b""))
+
+class StubBlob:
+    def __init__(self, name, chunk_size):
+        self.name = name
+        self.chunk_size = chunk_size
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        body = b"".join([b"--boundary\r\n", data, b"\r\n--boundary--"])
+        del body
+
+    def upload_from_file(self, file_obj, size=None, content_type=None, if_generation_match=None):
+        if size <= MULTIPART_LIMIT:
+            self.upload_from_string(file_obj.read())
+            return
+        while file_obj.read(self.chunk_size):
+            pass
+
+class StubGcs:
+    def bucket(self, name):
+        return self
+
+    def blob(self, name, chunk_size=None):
+        return StubBlob(name, chunk_size)
+
+def measure(fn):
+    """Peak MB while rendering, and peak MB from the end of rendering through the upload."""
+    tracemalloc.start()
+    marks = []
+    fn(lambda: (marks.append(tracemalloc.get_traced_memory()[1]), tracemalloc.reset_peak()))
+    _, upload_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return marks[0] / 1024 / 1024, upload_peak / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image-mb", type=int, default=24)
+    args = parser.parse_args()
+
+    template_dir = tempfile.mkdtemp(prefix="bench-memory-")
+    image_path = os.path.join(template_dir, "noise.png")
+    noise_png(image_path, args.image_mb)
+    doc = Document()
+    doc.add_heading("Proposal for {{ client_id }}", 0)
+    doc.add_picture(image_path)
+    doc.save(os.path.join(template_dir, "large.docx"))
+    os.remove(image_path)
+
+    word_factory.docx_template_cache = DocxTemplateCache(template_dir, auto_reload=False)
+    word_factory.docx_template_cache.new_template("large.docx")
+    data = {"client_id": "acme-corp-001"}
+
+    storage = StorageService()
+    storage.client = StubGcs()
+    storage.bucket_name = "bench"
+    storage.signer = FakeUrlSigner()
+
+    def previous(rendered):
+        stream = io.BytesIO()
+        word_factory.render_docx_sync(data, "large.docx", stream)
+        file_bytes = stream.getvalue()
+        rendered()
+        blob = storage.client.blob("proposal.docx")
+        blob.upload_from_string(file_bytes, content_type="application/octet-stream")
+
+    def spooled(rendered):
+        with new_spool() as sink:
+            word_factory.render_docx_sync(data, "large.docx", sink)
+            rendered()
+            storage.upload_and_sign(sink, "proposal.docx", "application/octet-stream")
+
+    size = os.path.getsize(os.path.join(template_dir, "large.docx")) / 1024 / 1024
+    print(f"{size:.1f} MB document, spool in memory up to {settings.SPOOL_MAX_MEMORY_BYTES // 1024 // 1024} MB, upload chunks of {settings.UPLOAD_CHUNK_SIZE // 1024 // 1024} MB")
+    print(f"{'path':<28}{'render peak MB':>16}{'upload peak MB':>16}")
+    for label, fn in (("bytes + upload_from_string", previous), ("spool + upload_from_file", spooled)):
+        render_peak, upload_peak = measure(fn)
+        print(f"{label:<28}{render_peak:>16.1f}{upload_peak:>16.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: throughput of N concurrent PDF renders, asyncio.to_thread (the
+previous render_pdf) vs. the RenderPool worker processes.
+
+Renders the default proposal template with WeasyPrint, or with --stub-cpu-ms
+a pure-Python CPU burn of that length (no WeasyPrint needed; it holds the
+GIL the same way). Also reports event loop lag while rendering, and how many
+of an over-capacity burst are rejected rather than queued.
+
+Run it on a box with several cores, e.g.:
+    python benchmarks/bench_render_pool.py --renders 64 --concurrency 16 --workers 4
+    python benchmarks/bench_render_pool.py --stub-cpu-ms 120 --workers 4
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.render_pool import RenderPool, RenderPoolSaturated  # noqa: E402
+
+DATA = {
+    "client_id": "acme-corp-001",
+    "title": "Digital Transformation Proposal",
+    "content": "A phased programme moving core workloads to the cloud. " * 40,
+    "key_points": [f"Key point {i}" for i in range(12)]
+}
+
+def burn_cpu(ms: float) -> bytes:
+    deadline = time.thread_time() + ms / 1000
+    x = 0
+    while time.thread_time() < deadline:
+        x += 1
+    return b"%PDF-stub"
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append((time.perf_counter() - t0 - 0.01) * 1000)
+
+async def run(render, renders: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, lags = [], []
+
+    async def one():
+        async with semaphore:
+            t0 = time.perf_counter()
+            await render()
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lags))
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(renders)])
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await lag_task
+    return renders / elapsed, latencies, lags
+
+def report(label, throughput, latencies, lags):
+    latencies = sorted(latencies)
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"{label:<16}{throughput:>12.1f}{statistics.median(latencies):>10.0f}{p99:>10.0f}{max(lags):>14.1f}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--queue-size", type=int, default=16, help="Raised to fit --concurrency for the throughput run")
+    parser.add_argument("--stub-cpu-ms", type=float, default=0, help="Burn CPU instead of rendering with WeasyPrint")
+    args = parser.parse_args()
+
+    if args.stub_cpu_ms:
+        fn, arg, initializer = burn_cpu, args.stub_cpu_ms, None
+    else:
+        from src.services.templates import template_registry
+        from src.services.pdf_factory import render_pdf_sync, warm_pdf_worker
+        fn, arg, initializer = render_pdf_sync, template_registry.render("v1", DATA), warm_pdf_worker
+        fn(arg)
+
+    print(f"{os.cpu_count()} cores, {args.renders} renders, {args.concurrency} concurrent")
+    print(f"{'renderer':<16}{'renders/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'max lag ms':>14}")
+
+    report("to_thread", *await run(lambda: asyncio.to_thread(fn, arg), args.renders, args.concurrency))
+
+    pool = RenderPool(args.workers, max(args.queue_size, args.concurrency - args.workers), timeout_seconds=60, initializer=initializer)
+    pool.start()
+    report(f"pool x{args.workers}", *await run(lambda: pool.run(fn, arg), args.renders, args.concurrency))
+
+    async def admit():
+        try:
+            await pool.run(fn, arg)
+            return True
+        except RenderPoolSaturated:
+            return False
+
+    burst = pool.capacity * 2
+    admitted = await asyncio.gather(*[admit() for _ in range(burst)])
+    print(f"burst of {burst}: {sum(admitted)} rendered, {burst - sum(admitted)} rejected with 503")
+    pool.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark: end-to-end content latency of a multi-section proposal plan,
+generating sections one after another vs. ContentGenerator.generate_sections.
+
+Gemini is stubbed: each call takes a random latency in
+[--min-ms, --max-ms] and fails (invalid JSON) with probability --fail-rate,
+so the parallel path also exercises per-section retries.
+
+Usage:
+    python benchmarks/bench_section_generation.py --sections 4 --runs 10
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.content import ContentGenerator  # noqa: E402
+
+SECTION_NAMES = ["Executive Summary", "Scope", "Pricing", "Risks", "Timeline", "Team", "Governance", "Assumptions"]
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class StubGemini:
+    def __init__(self, min_ms: float, max_ms: float, fail_rate: float):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.fail_rate = fail_rate
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        await asyncio.sleep(random.uniform(self.min_ms, self.max_ms) / 1000)
+        if random.random() < self.fail_rate:
+            return StubResponse("{\"title\": \"truncated")
+        return StubResponse(json.dumps({"title": prompt.rsplit("\"", 2)[-2], "content": "Generated text.", "key_points": ["One", "Two"]}))
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--min-ms", type=float, default=400)
+    parser.add_argument("--max-ms", type=float, default=1200)
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    sections = (SECTION_NAMES * 4)[:args.sections]
+    generator = ContentGenerator()
+    stub = StubGemini(args.min_ms, args.max_ms, args.fail_rate)
+    generator.model = stub
+    prompt = "Create a proposal for acme-corp-001 with scope: Cloud Migration."
+
+    async def serial():
+        results = []
+        for section in sections:
+            section_prompt = f"{prompt}\n\nWrite only the \"{section}\" section of the proposal."
+            for attempt in range(3):
+                try:
+                    results.append(await generator.generate_section_async(section_prompt, "consulting"))
+                    break
+                except Exception:
+                    if attempt == 2:
+                        raise
+        return results
+
+    async def parallel():
+        return await generator.generate_sections(prompt, sections, "consulting", max_concurrency=args.concurrency, max_retries=2, retry_backoff_seconds=0)
+
+    print(f"{args.sections} sections, {args.min_ms:.0f}-{args.max_ms:.0f} ms per call, fail rate {args.fail_rate}")
+    print(f"{'plan':<12}{'p50 ms':>9}{'max ms':>9}{'calls/run':>11}")
+    for label, run in (("serial", serial), ("parallel", parallel)):
+        stub.calls = 0
+        latencies = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            results = await run()
+            latencies.append((time.perf_counter() - t0) * 1000)
+            assert [r.title for r in results] == sections
+        print(f"{label:<12}{statistics.median(latencies):>9.0f}{max(latencies):>9.0f}{stub.calls / args.runs:>11.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
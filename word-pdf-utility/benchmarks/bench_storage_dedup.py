@@ -0,0 +1,97 @@
+"""
+Benchmark: upload_and_sign for repeat renders of the same file. The first
+call uploads and signs; repeats within a signed URL's validity cost a hash
+and a cache lookup. Also times a second instance (cold caches) storing the
+same file, which is rejected by the if_generation_match=0 precondition
+instead of overwriting.
+
+GCS is stubbed: uploads take --upload-ms plus --mb-per-s transfer time;
+FakeUrlSigner takes --sign-ms per signature.
+
+Usage:
+    python benchmarks/bench_storage_dedup.py --size-kb 400 --repeats 50
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from google.api_core.exceptions import PreconditionFailed  # noqa: E402
+from src.services.storage import StorageService  # noqa: E402
+from src.services.signing import FakeUrlSigner  # noqa: E402
+
+class StubGcs:
+    def __init__(self, upload_ms: float, mb_per_s: float):
+        self.upload = upload_ms / 1000
+        self.bytes_per_s = mb_per_s * 1024 * 1024
+        self.objects = {}
+        self.uploads = 0
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name, chunk_size=None):
+        return StubBlob(self, name)
+
+class StubBlob:
+    def __init__(self, gcs: StubGcs, name: str):
+        self.gcs = gcs
+        self.name = name
+        self.time_created = None
+
+    def upload_from_file(self, file_obj, size=None, content_type=None, if_generation_match=None):
+        data = file_obj.read()
+        self.gcs.uploads += 1
+        time.sleep(self.gcs.upload + len(data) / self.gcs.bytes_per_s)
+        if if_generation_match == 0 and self.name in self.gcs.objects:
+            raise PreconditionFailed("object exists")
+        self.gcs.objects[self.name] = (data, datetime.datetime.now(datetime.timezone.utc))
+
+    def reload(self):
+        time.sleep(self.gcs.upload)
+        self.time_created = self.gcs.objects[self.name][1]
+
+def time_ms(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=400)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--upload-ms", type=float, default=80)
+    parser.add_argument("--mb-per-s", type=float, default=20)
+    parser.add_argument("--sign-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    gcs = StubGcs(args.upload_ms, args.mb_per_s)
+    file_bytes = os.urandom(args.size_kb * 1024)
+
+    def instance():
+        service = StorageService()
+        service.client = gcs
+        service.bucket_name = "bench"
+        service.signer = FakeUrlSigner(latency_ms=args.sign_ms)
+        return service
+
+    first = instance()
+    upload = lambda: first.upload_and_sign(file_bytes, "proposal_acme.pdf", "application/pdf")  # noqa: E731
+    results = {"first render": [time_ms(upload)]}
+    results["repeat render"] = [time_ms(upload) for _ in range(args.repeats)]
+    results["other download name"] = [time_ms(lambda: first.upload_and_sign(file_bytes, "proposal_other.pdf", "application/pdf"))]
+    second = instance()
+    results["new instance"] = [time_ms(lambda: second.upload_and_sign(file_bytes, "proposal_acme.pdf", "application/pdf"))]
+
+    print(f"{args.size_kb} KB file")
+    print(f"{'upload_and_sign':<22}{'p50 ms':>10}")
+    for label, latencies in results.items():
+        print(f"{label:<22}{statistics.median(latencies):>10.3f}")
+    print(f"uploads: {gcs.uploads}, objects stored: {len(gcs.objects)}")
+
+if __name__ == "__main__":
+    main()
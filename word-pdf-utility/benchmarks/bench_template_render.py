@@ -0,0 +1,80 @@
+"""
+Benchmark: Jinja2 render time per request, with a new Environment per
+request (the previous render_pdf) vs. the shared TemplateRegistry.
+
+Only the HTML render is timed; WeasyPrint is not involved. The registry is
+measured cold (first render compiles, bytecode cache empty), from the
+bytecode cache (a fresh registry in a new process), and warm.
+
+Usage:
+    python benchmarks/bench_template_render.py --requests 2000
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jinja2 import Environment, FileSystemLoader  # noqa: E402
+from src.core.config import settings  # noqa: E402
+from src.services.templates import TemplateRegistry  # noqa: E402
+
+DATA = {
+    "client_id": "acme-corp-001",
+    "title": "Digital Transformation Proposal",
+    "content": "A phased programme moving core workloads to the cloud. " * 20,
+    "key_points": [f"Key point {i}" for i in range(8)]
+}
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+def time_ms(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--template-version", default="v1")
+    args = parser.parse_args()
+
+    template_dir = os.path.join(os.path.dirname(__file__), "..", settings.TEMPLATE_DIR)
+    template_name = settings.TEMPLATE_VERSIONS[args.template_version] + ".html"
+    bytecode_dir = tempfile.mkdtemp(prefix="bench-jinja-")
+
+    def per_request_env():
+        env = Environment(loader=FileSystemLoader(template_dir))
+        env.get_template(template_name).render(**DATA)
+
+    uncached = [time_ms(per_request_env) for _ in range(args.requests)]
+
+    def first_render():
+        registry = TemplateRegistry(template_dir, settings.TEMPLATE_VERSIONS, auto_reload=False, bytecode_dir=bytecode_dir)
+        return time_ms(lambda: registry.render(args.template_version, DATA))
+
+    cold = first_render()
+    from_bytecode = first_render()
+
+    results = {"new Environment": uncached}
+    for label, auto_reload in (("registry (prod)", False), ("registry (dev reload)", True)):
+        registry = TemplateRegistry(template_dir, settings.TEMPLATE_VERSIONS, auto_reload=auto_reload, bytecode_dir=bytecode_dir)
+        registry.preload()
+        results[label] = [time_ms(lambda: registry.render(args.template_version, DATA)) for _ in range(args.requests)]
+    shutil.rmtree(bytecode_dir)
+
+    print(f"{'render':<26}{'p50 ms':>9}{'p99 ms':>9}")
+    for label, latencies in results.items():
+        p50, p99 = percentiles(latencies)
+        print(f"{label:<26}{p50:>9.3f}{p99:>9.3f}")
+    print(f"{'first render, cold':<26}{cold:>9.3f}")
+    print(f"{'first render, bytecode':<26}{from_bytecode:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: time to sign one V4 download URL with each signer.
+
+"local" signs with an in-memory RSA key (generated here, standing in for
+SIGNING_CREDENTIALS_FILE); "iam" stands in for a signBlob round trip with
+a --iam-ms delay; "cached" is a repeat upload_and_sign of the same file,
+answered from the signed URL cache. Also prints the url_signing_ms
+histograms the signers recorded.
+
+Usage:
+    python benchmarks/bench_url_signing.py --signatures 200 --iam-ms 60
+"""
+import os
+import sys
+import json
+import time
+import datetime
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from google.auth import crypt  # noqa: E402
+from google.auth.credentials import AnonymousCredentials  # noqa: E402
+from google.oauth2 import service_account  # noqa: E402
+from google.cloud import storage  # noqa: E402
+from src.core.metrics import metrics  # noqa: E402
+from src.services.signing import LocalUrlSigner, FakeUrlSigner  # noqa: E402
+from src.services.storage import StorageService  # noqa: E402
+
+class StubGcs:
+    def __init__(self, bucket):
+        self._bucket = bucket
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name, chunk_size=None):
+        blob = self._bucket.blob(name)
+        blob.upload_from_file = lambda *args, **kwargs: None
+        return blob
+
+def local_credentials():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    return service_account.Credentials(
+        crypt.RSASigner.from_string(pem),
+        "sentinel-growth-sa@example.iam.gserviceaccount.com",
+        "https://oauth2.googleapis.com/token"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signatures", type=int, default=200)
+    parser.add_argument("--iam-ms", type=float, default=60)
+    args = parser.parse_args()
+
+    client = storage.Client(project="bench", credentials=AnonymousCredentials())
+    bucket = client.bucket("sentinel-growth-artifacts")
+    expiration = datetime.timedelta(minutes=15)
+    disposition = 'attachment; filename="proposal_acme-corp-001.pdf"'
+
+    results = {}
+    for label, signer, n in (("iam (stubbed)", FakeUrlSigner(latency_ms=args.iam_ms), min(args.signatures, 20)), ("local", LocalUrlSigner(local_credentials()), args.signatures)):
+        latencies = []
+        for i in range(n):
+            blob = bucket.blob(f"proposals/{i:064x}.pdf")
+            t0 = time.perf_counter()
+            signer.sign(blob, expiration, disposition)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        results[label] = latencies
+
+    service = StorageService()
+    service.client = StubGcs(bucket)
+    service.bucket_name = bucket.name
+    service.signer = LocalUrlSigner(local_credentials())
+    service.upload_and_sign(b"%PDF-1.7 proposal", "proposal_acme-corp-001.pdf", "application/pdf")
+    latencies = []
+    for _ in range(args.signatures):
+        t0 = time.perf_counter()
+        service.upload_and_sign(b"%PDF-1.7 proposal", "proposal_acme-corp-001.pdf", "application/pdf")
+        latencies.append((time.perf_counter() - t0) * 1000)
+    results["cached"] = latencies
+
+    print(f"{'signer':<16}{'p50 ms':>9}{'max ms':>9}")
+    for label, latencies in results.items():
+        print(f"{label:<16}{statistics.median(latencies):>9.3f}{max(latencies):>9.3f}")
+    for histogram in metrics.snapshot():
+        print(json.dumps(histogram))
+
+if __name__ == "__main__":
+    main()
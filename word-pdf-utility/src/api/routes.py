@@ -1,64 +1,236 @@
 import time
 import uuid
+import asyncio
+import functools
 import structlog
-from typing import Dict
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from typing import Any, BinaryIO, Dict, Tuple, Union
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
 from fastapi.responses import JSONResponse
-from src.schemas.requests import ProposalRequest
+from src.schemas.requests import BatchProposalRequest, ProposalRequest
 from src.schemas.responses import ProposalResponse
 from src.services.content import ContentGenerator
-from src.services.pdf_factory import render_pdf
+from src.services.content_cache import build_section_cache
+from src.services.pdf_factory import pdf_render_pool, render_pdf
+from src.services.render_pool import RenderPoolSaturated, RenderTimeout
 from src.services.word_factory import render_docx
 from src.services.storage import storage_service
+from src.services.jobs import JobQueueFull, build_job_manager
+from src.services.spool import SpoolArchive
+from src.services.templates import template_registry
 from src.core.config import settings
+from src.core.logging import bind_stage_labels
 
 router = APIRouter()
 logger = structlog.get_logger()
 
 # Initialize content generator
-content_generator = ContentGenerator()
+content_generator = ContentGenerator(cache=build_section_cache())
+
+# Render attempts while the render pool is saturated (async jobs, batches)
+RENDER_ATTEMPTS = 5
+RENDER_RETRY_SECONDS = 5
+
+def build_prompt(request: ProposalRequest) -> str:
+    # Financials in key order, so equal requests build equal prompts (and cache keys)
+    return f"Create a proposal for {request.client_id} with scope: {', '.join(request.project_scope)}. Financials: {dict(sorted(request.financial_data.items()))}"
+
+async def generate_content(request: ProposalRequest, log) -> Dict[str, Any]:
+    """Generates the template data for a proposal (without client_id)."""
+    prompt = build_prompt(request)
+    log.info("Generating content...")
+    if request.sections:
+        # Proposal plan: one Gemini call per section, run in parallel
+        sections = await content_generator.generate_sections(
+            prompt,
+            request.sections,
+            request.domain_profile,
+            max_concurrency=settings.SECTION_MAX_CONCURRENCY,
+            max_retries=settings.SECTION_MAX_RETRIES,
+            template_version=request.template_version,
+            bypass_cache=request.bypass_cache
+        )
+        return {"sections": [section.model_dump() for section in sections]}
+    section_content = await content_generator.generate_section_async(prompt, request.domain_profile, request.template_version, request.bypass_cache)
+    return section_content.model_dump()
+
+async def render_proposal(request: ProposalRequest, template_data: Dict[str, Any], pooled: bool = False, retry_saturated: bool = False) -> Tuple[BinaryIO, str, str]:
+    """
+    Renders a proposal, returning the rendered file (which the caller
+    closes), its download filename and content type. `pooled` renders DOCX
+    on the render pool too; `retry_saturated` waits for a free render slot
+    instead of raising RenderPoolSaturated.
+    """
+    # Download name; the object itself is named by content hash
+    filename = f"proposal_{request.client_id}"
+    if request.output_format == "pdf":
+        filename += ".pdf"
+        content_type = "application/pdf"
+        render = functools.partial(render_pdf, template_data, request.template_version)
+    elif request.output_format == "docx":
+        filename += ".docx"
+        content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        render = functools.partial(render_docx, template_data, request.template_version, pdf_render_pool if pooled else None)
+    else:
+        raise ValueError(f"Unsupported output format: {request.output_format}")
+
+    # The pool rejects a render before anything is written
+    attempts = RENDER_ATTEMPTS if retry_saturated else 1
+    for attempt in range(1, attempts + 1):
+        try:
+            return await render(), filename, content_type
+        except RenderPoolSaturated:
+            if attempt == attempts:
+                raise
+            logger.info("Render pool saturated, retrying render", client_id=request.client_id, attempt=attempt)
+            await asyncio.sleep(RENDER_RETRY_SECONDS)
+
+async def build_proposal(request: ProposalRequest, log, retry_saturated: bool = False) -> Tuple[str, str]:
+    """
+    Generates, renders and uploads one proposal, returning its object name
+    and download filename (see sign_result).
+    """
+    bind_stage_labels(output_format=request.output_format)
+
+    # 1. Generate Content
+    template_data = await generate_content(request, log)
+    
+    # Prepare data for template
+    template_data["client_id"] = request.client_id
+    
+    # 2. Render Document
+    # Into the render worker's temporary file (PDF), or a spool for DOCX
+    # (memory, or disk past SPOOL_MAX_MEMORY_BYTES), streamed to storage
+    # from there
+    rendered, filename, content_type = await render_proposal(request, template_data, retry_saturated=retry_saturated)
+    with rendered:
+        # 3. Upload
+        log.info("Uploading to storage...")
+        return await storage_service.upload_async(rendered, filename, content_type), filename
+
+async def sign_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replaces a result's `object_name` and `filename` with a signed `url`.
+    Job records keep the object name and are signed when read, so their
+    URLs don't expire before the record does.
+    """
+    result = dict(result)
+    object_name, filename = result.pop("object_name", None), result.pop("filename", None)
+    if object_name is not None:
+        result["url"] = await storage_service.sign_async(object_name, filename)
+    return result
+
+async def sign_outcome(outcome: Dict[str, Any]) -> Dict[str, Any]:
+    """sign_result for a proposal or batch outcome and each of its results."""
+    outcome = await sign_result(outcome)
+    if outcome.get("results"):
+        outcome["results"] = await asyncio.gather(*[sign_result(result) for result in outcome["results"]])
+    return outcome
+
+async def build_batch(batch: BatchProposalRequest, batch_id: str, log) -> Dict[str, Any]:
+    """
+    Generates, renders and uploads every proposal of a batch, returning
+    a result per proposal (in order) and, with `zip`, one archive of all
+    documents instead of a file per proposal. Files are returned as object
+    names for sign_outcome.
+
+    Each proposal moves through the stages on its own, so generation,
+    rendering and uploads of different proposals overlap:
+    - at most BATCH_MAX_CONCURRENCY proposals generate at once; repeated
+      sections are served (or awaited) through the content cache
+    - PDF and DOCX renders all run on the render pool, one per worker
+      at a time, so render throughput scales with RENDER_WORKERS and
+      interactive requests keep the pool's queue
+    - uploads run concurrently on the storage executor
+    """
+    generating = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+    rendering = asyncio.Semaphore(pdf_render_pool.workers)
+    archive = SpoolArchive() if batch.zip else None
+
+    async def generate(request: ProposalRequest, item_log) -> Dict[str, Any]:
+        async with generating:
+            return await generate_content(request, item_log)
+
+    async def build(request: ProposalRequest) -> Dict[str, Any]:
+        item_log = log.bind(client_id=request.client_id)
+        bind_stage_labels(output_format=request.output_format)
+        try:
+            template_data = {**await generate(request, item_log), "client_id": request.client_id}
+            async with rendering:
+                rendered, filename, content_type = await render_proposal(request, template_data, pooled=True, retry_saturated=True)
+            with rendered:
+                if archive is not None:
+                    await archive.add(filename, rendered)
+                    return {"client_id": request.client_id, "status": "success"}
+                object_name = await storage_service.upload_async(rendered, filename, content_type)
+                return {"client_id": request.client_id, "status": "success", "object_name": object_name, "filename": filename}
+        except Exception as e:
+            item_log.error("Batch proposal failed", error=str(e))
+            return {"client_id": request.client_id, "status": "failed", "error": str(e)}
+
+    try:
+        results = await asyncio.gather(*[build(request) for request in batch.proposals])
+        succeeded = sum(1 for result in results if result["status"] == "success")
+        outcome = {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+        if archive is not None and succeeded:
+            log.info("Uploading batch archive...", documents=succeeded)
+            outcome["filename"] = f"proposals_{batch_id}.zip"
+            outcome["object_name"] = await storage_service.upload_async(archive.finish(), outcome["filename"], "application/zip")
+        return outcome
+    finally:
+        if archive is not None:
+            archive.close()
+
+async def run_job(payload: Union[ProposalRequest, BatchProposalRequest], job_id: str) -> Dict[str, Any]:
+    """
+    Job handler for POST /generate/proposal?async=true and the batch
+    equivalent. Results hold object names; GET /jobs/{id} signs them.
+    """
+    log = logger.bind(job_id=job_id)
+    if isinstance(payload, BatchProposalRequest):
+        return await build_batch(payload, job_id, log)
+    # A queued job waits for render capacity rather than failing
+    object_name, filename = await build_proposal(payload, log.bind(client_id=payload.client_id), retry_saturated=True)
+    return {"object_name": object_name, "filename": filename}
+
+job_manager = build_job_manager(run_job)
+
+def validate_request(request: ProposalRequest):
+    if request.template_version not in template_registry.versions:
+        raise HTTPException(status_code=400, detail=f"Unknown template version: {request.template_version}")
+    if request.sections is not None and not 0 < len(request.sections) <= settings.MAX_SECTIONS:
+        raise HTTPException(status_code=400, detail=f"sections must list between 1 and {settings.MAX_SECTIONS} sections")
+
+def submit_job(payload: Union[ProposalRequest, BatchProposalRequest], log) -> JSONResponse:
+    """Queues `payload`, answering right away; GET /jobs/{id} reports the result."""
+    try:
+        job = job_manager.submit(payload)
+    except JobQueueFull as e:
+        log.warning("Job queue full, rejecting request", error=str(e))
+        raise HTTPException(status_code=503, detail="Too many queued jobs, retry shortly", headers={"Retry-After": "5"})
+    log.info("Job queued", job_id=job["job_id"])
+    status_url = f"/jobs/{job['job_id']}"
+    return JSONResponse(
+        status_code=202,
+        content={"status": job["status"], "job_id": job["job_id"], "status_url": status_url},
+        headers={"Location": status_url}
+    )
 
 @router.post("/generate/proposal", response_model=Dict[str, str])
-async def generate_proposal(request: ProposalRequest):
-    request_id = str(uuid.uuid4())
+async def generate_proposal(request: ProposalRequest, async_mode: bool = Query(False, alias="async")):
     start_time = time.time()
     
-    log = logger.bind(request_id=request_id, client_id=request.client_id)
-    log.info("Received proposal generation request")
+    # request_id is bound by the timing middleware
+    log = logger.bind(client_id=request.client_id)
+    log.info("Received proposal generation request", async_mode=async_mode)
+
+    validate_request(request)
+
+    if async_mode:
+        return submit_job(request, log)
 
     try:
-        # 1. Generate Content
-        prompt = f"Create a proposal for {request.client_id} with scope: {', '.join(request.project_scope)}. Financials: {request.financial_data}"
-        log.info("Generating content...")
-        section_content = content_generator.generate_section(prompt, request.domain_profile)
-        
-        # Prepare data for template
-        template_data = section_content.model_dump()
-        template_data["client_id"] = request.client_id
-        
-        # 2. Render Document
-        filename = f"proposal_{request.client_id}_{request_id}"
-        file_bytes = None
-        content_type = ""
-        
-        if request.output_format == "pdf":
-            filename += ".pdf"
-            content_type = "application/pdf"
-            # Using a default template for now
-            file_bytes = await render_pdf(template_data, "default_proposal.html")
-            
-        elif request.output_format == "docx":
-            filename += ".docx"
-            content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            # Using a default template for now
-            file_bytes = render_docx(template_data, "default_proposal.docx")
-            
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported output format")
-
-        # 3. Upload and Sign
-        log.info("Uploading to storage...")
-        signed_url = storage_service.upload_and_sign(file_bytes, filename, content_type)
+        object_name, filename = await build_proposal(request, log)
+        signed_url = await storage_service.sign_async(object_name, filename)
         
         # Calculate latency
         latency = time.time() - start_time
@@ -69,6 +241,53 @@ async def generate_proposal(request: ProposalRequest):
             "url": signed_url
         }
 
+    except RenderPoolSaturated as e:
+        log.warning("Render pool saturated, rejecting request", error=str(e))
+        raise HTTPException(status_code=503, detail="Renderer busy, retry shortly", headers={"Retry-After": "5"})
+    except RenderTimeout as e:
+        log.error("Render timed out", error=str(e))
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         log.error("Request failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/generate/proposals/batch")
+async def generate_proposals_batch(batch: BatchProposalRequest, async_mode: bool = Query(False, alias="async")):
+    batch_id = str(uuid.uuid4())
+    start_time = time.time()
+
+    log = logger.bind(batch_id=batch_id)
+    log.info("Received batch proposal request", proposals=len(batch.proposals), zip=batch.zip, async_mode=async_mode)
+
+    if not 0 < len(batch.proposals) <= settings.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"proposals must list between 1 and {settings.MAX_BATCH_SIZE} proposals")
+    for i, request in enumerate(batch.proposals):
+        try:
+            validate_request(request)
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"proposals[{i}]: {e.detail}")
+
+    if async_mode:
+        return submit_job(batch, log)
+
+    try:
+        outcome = await sign_outcome(await build_batch(batch, batch_id, log))
+    except Exception as e:
+        log.error("Batch request failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+    log.info("Batch processed", latency=time.time() - start_time, succeeded=outcome["succeeded"], failed=outcome["failed"])
+    return {"status": "success" if not outcome["failed"] else "partial", **outcome}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if job["status"] != "succeeded":
+        return job
+    try:
+        return await sign_outcome(job)
+    except Exception as e:
+        logger.error("Signing job result failed", job_id=job_id, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,3 +1,4 @@
+from typing import Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,7 +7,70 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     GOOGLE_API_KEY: str = ""
     GCS_BUCKET_NAME: str = "sentinel-growth-artifacts"
-    
+
+    # Templates
+    TEMPLATE_DIR: str = "src/templates"
+    # template_version -> template base name (".html" for PDF, ".docx" for DOCX)
+    TEMPLATE_VERSIONS: Dict[str, str] = {"v1": "default_proposal"}
+    # Compiled Jinja2 bytecode, shared by every process in the container
+    TEMPLATE_BYTECODE_DIR: str = "/tmp/sentinel-jinja-cache"
+
+    # PDF render pool (WeasyPrint worker processes)
+    RENDER_WORKERS: int = 2
+    # Renders allowed to wait for a worker before requests get a 503
+    RENDER_QUEUE_SIZE: int = 8
+    RENDER_TIMEOUT_SECONDS: float = 60
+    # Replace all workers after this many renders to bound memory growth (0 to keep them)
+    RENDER_RECYCLE_AFTER: int = 400
+
+    # Proposal plans: parallel Gemini calls per request, and retries per section
+    SECTION_MAX_CONCURRENCY: int = 4
+    SECTION_MAX_RETRIES: int = 2
+    MAX_SECTIONS: int = 12
+
+    # Batch endpoint: proposals per request, and proposals generating content at once
+    MAX_BATCH_SIZE: int = 100
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # Generated section cache: in-process LRU + TTL, optionally backed by
+    # a persistent store ("disk" or "gcs"; empty for memory only)
+    CONTENT_CACHE_ENABLED: bool = True
+    CONTENT_CACHE_MAX_ENTRIES: int = 1024
+    CONTENT_CACHE_TTL_SECONDS: float = 86400
+    CONTENT_CACHE_STORE: str = ""
+    CONTENT_CACHE_DIR: str = "/tmp/sentinel-content-cache"
+    CONTENT_CACHE_PREFIX: str = "content-cache/"
+
+    # Concurrent GCS uploads/signings per instance
+    STORAGE_MAX_WORKERS: int = 16
+    # Rendered files are stored as <OBJECT_PREFIX><sha256><ext>
+    OBJECT_PREFIX: str = "proposals/"
+    SIGNED_URL_MINUTES: int = 15
+    # Reuse a cached signed URL only while it has this long left
+    SIGNED_URL_MIN_REMAINING_SECONDS: int = 300
+    # Trust that a stored object still exists for this long (bucket lifecycle deletes after 7 days)
+    STORED_OBJECT_TTL_SECONDS: int = 86400
+    STORAGE_CACHE_SIZE: int = 4096
+    # URL signing: "auto" (local key if available, else IAM signBlob) or "fake" (offline)
+    SIGNING_MODE: str = "auto"
+    # Service account key file to sign with locally, e.g. a mounted secret
+    SIGNING_CREDENTIALS_FILE: str = ""
+    # Rendered files are spooled in memory up to this size, then on disk
+    SPOOL_MAX_MEMORY_BYTES: int = 4 * 1024 * 1024
+    SPOOL_DIR: str = ""
+    # Resumable upload chunk size for files over 8 MB (multiple of 256 KB)
+    UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024
+
+    # Asynchronous jobs (POST /generate/proposal?async=true)
+    JOB_WORKERS: int = 4
+    # Jobs allowed to wait for a worker before submissions get a 503
+    JOB_QUEUE_SIZE: int = 100
+    # Keep finished job records this long (their URLs are signed on each GET)
+    JOB_TTL_SECONDS: float = 3600
+    # Share job records across instances: "gcs", or empty for per instance
+    JOB_STORE: str = ""
+    JOB_PREFIX: str = "jobs/"
+
     model_config = SettingsConfigDict(env_file=".env")
 
 settings = Settings()
@@ -1,7 +1,20 @@
 import logging
 import sys
+import time
 import structlog
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
 from src.core.config import settings
+from src.core.metrics import metrics
+
+# Stage timings of the current request (or job), summed per stage. One
+# dict per request, shared by the tasks and threads working on it.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+# Labels bound for the whole request, for its request_ms histogram
+_request_labels: ContextVar[Optional[Dict[str, str]]] = ContextVar("request_labels", default=None)
+# Labels for the stage histograms, e.g. output_format; set per task
+_stage_labels: ContextVar[Dict[str, str]] = ContextVar("stage_labels", default={})
 
 def configure_logging():
     """
@@ -45,5 +58,47 @@ def configure_logging():
     root_logger.handlers = [handler]
     root_logger.setLevel(settings.LOG_LEVEL.upper())
 
+def start_request_timings() -> Dict[str, float]:
+    """
+    Starts collecting stage timings for a request or job and returns the
+    dict they are summed into, as `<stage>_ms`.
+    """
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    _request_labels.set({})
+    _stage_labels.set({})
+    return timings
+
+def request_labels() -> Dict[str, str]:
+    """Stage labels bound while handling the current request ("mixed" where they differed)."""
+    return _request_labels.get() or {}
+
+def bind_stage_labels(**labels: str):
+    """Labels the stage histograms recorded from here on in this task, and its log lines."""
+    _stage_labels.set({**_stage_labels.get(), **labels})
+    structlog.contextvars.bind_contextvars(**labels)
+    shared = _request_labels.get()
+    if shared is not None:
+        for name, value in labels.items():
+            shared[name] = value if shared.get(name, value) == value else "mixed"
+
+@contextmanager
+def timed_stage(stage: str):
+    """
+    Times a block as `stage`: observed in the `stage_ms` histogram
+    (labelled with the bound stage labels), added to the request's
+    timings and bound into the structlog context as `<stage>_ms`.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        metrics.observe("stage_ms", elapsed_ms, stage=stage, **_stage_labels.get())
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[f"{stage}_ms"] = round(timings.get(f"{stage}_ms", 0) + elapsed_ms, 1)
+        structlog.contextvars.bind_contextvars(**{f"{stage}_ms": round(elapsed_ms, 1)})
+
 # Apply configuration immediately
 configure_logging()
@@ -1,16 +1,82 @@
+import time
+import uuid
 import structlog
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from src.core.config import settings
-from src.core.logging import configure_logging
-from src.api.routes import router
+from src.core.logging import configure_logging, request_labels, start_request_timings
+from src.core.metrics import metrics
+from src.api.routes import router, job_manager
+from src.services.templates import template_registry
+from src.services.pdf_factory import pdf_render_pool
+from src.services.word_factory import docx_template_cache
 
 # Ensure logging is configured before app startup
 configure_logging()
 
-app = FastAPI(title=settings.APP_NAME)
+logger = structlog.get_logger()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile all templates before the first request
+    template_registry.preload()
+    docx_template_cache.preload()
+    # Start and warm the PDF workers before taking traffic
+    pdf_render_pool.start()
+    job_manager.start()
+    yield
+    await job_manager.shutdown()
+    pdf_render_pool.shutdown()
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """
+    Binds a request id (the caller's X-Request-ID, or a new one) into the
+    log context, and collects the stage timings recorded while handling
+    the request. They are logged with the total latency, returned in a
+    Server-Timing header, and the total goes into the `request_ms`
+    histogram, labelled with the request's output_format.
+    """
+    request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(request_id=request_id)
+    timings = start_request_timings()
+
+    t0 = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        latency_ms = (time.perf_counter() - t0) * 1000
+        # Route template rather than the raw path, so /jobs/{job_id} is one series
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        labels = request_labels()
+        metrics.observe("request_ms", latency_ms, method=request.method, route=path, status=str(status_code), **labels)
+        if path not in ("/health", "/metrics"):
+            logger.info("Request timings", method=request.method, route=path, status=status_code, latency_ms=round(latency_ms, 1), **labels, **timings)
+
+    response.headers["X-Request-ID"] = request_id
+    response.headers["Server-Timing"] = ", ".join(
+        [f"{key[:-3]};dur={value}" for key, value in timings.items()] + [f"total;dur={latency_ms:.1f}"]
+    )
+    return response
 
 app.include_router(router)
 
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Latency histograms (ms) since the instance started: `request_ms` per
+    route and output_format, `stage_ms` per stage (gemini, jinja,
+    weasyprint, docxtpl, upload, signing) and output_format, and
+    `url_signing_ms` per signer.
+    """
+    return {"histograms": metrics.snapshot()}
@@ -1,4 +1,4 @@
-from typing import Literal, List, Dict
+from typing import Literal, List, Dict, Optional
 from pydantic import BaseModel
 
 class ProposalRequest(BaseModel):
@@ -8,3 +8,13 @@ class ProposalRequest(BaseModel):
     financial_data: Dict[str, str]
     template_version: str = "v1"
     output_format: Literal['pdf', 'docx'] = "pdf"
+    # Proposal plan: generate these sections (e.g. "Executive Summary",
+    # "Scope", "Pricing", "Risks") in parallel instead of a single section
+    sections: Optional[List[str]] = None
+    # Regenerate content even if a cached section matches
+    bypass_cache: bool = False
+
+class BatchProposalRequest(BaseModel):
+    proposals: List[ProposalRequest]
+    # Return one signed URL for a zip of all documents instead of a URL per proposal
+    zip: bool = False
@@ -1,8 +1,10 @@
-from typing import List, Dict, Literal
+import asyncio
+from typing import List, Dict, Literal, Optional
 from pydantic import BaseModel
 import structlog
 import google.generativeai as genai
 from src.core.config import settings
+from src.core.logging import timed_stage
 
 logger = structlog.get_logger()
 
@@ -12,6 +14,8 @@ class SectionContent(BaseModel):
     key_points: List[str]
 
 class ContentGenerator:
+    MODEL_NAME = 'gemini-1.5-flash' # Using a capable model
+
     DOMAIN_PROFILES = {
         'consulting': {
             'tone': 'Professional, authoritative, and data-driven. Focus on strategic value, ROI, and scalability.',
@@ -27,18 +31,19 @@ class ContentGenerator:
         }
     }
 
-    def __init__(self):
+    def __init__(self, cache=None):
+        # Optional SectionCache (src.services.content_cache) for generate_section_async
+        self.cache = cache
+        # Cache key -> generation in progress, awaited by concurrent misses
+        self._generating: Dict[str, asyncio.Future] = {}
         if settings.GOOGLE_API_KEY:
             genai.configure(api_key=settings.GOOGLE_API_KEY)
-            self.model = genai.GenerativeModel('gemini-1.5-flash') # Using a capable model
+            self.model = genai.GenerativeModel(self.MODEL_NAME)
         else:
             logger.warning("GOOGLE_API_KEY not set. Content generation will fail if called.")
             self.model = None
 
-    def generate_section(self, prompt: str, profile_key: Literal['consulting', 'tech', 'finance']) -> SectionContent:
-        """
-        Generates a section of content based on the prompt and domain profile.
-        """
+    def _build_prompt(self, prompt: str, profile_key: str) -> str:
         if not self.model:
             raise ValueError("Google API Key not configured")
 
@@ -60,15 +65,25 @@ class ContentGenerator:
         }}
         """
 
-        full_prompt = f"{system_instruction}\n\nUser Prompt: {prompt}"
+        return f"{system_instruction}\n\nUser Prompt: {prompt}"
+
+    def _generation_config(self):
+        return genai.types.GenerationConfig(
+            response_mime_type="application/json"
+        )
+
+    def generate_section(self, prompt: str, profile_key: Literal['consulting', 'tech', 'finance']) -> SectionContent:
+        """
+        Generates a section of content based on the prompt and domain profile.
+        Blocks on the Gemini call; use generate_section_async from async code.
+        """
+        full_prompt = self._build_prompt(prompt, profile_key)
 
         try:
             logger.info("Generating content", profile=profile_key)
             response = self.model.generate_content(
                 full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    response_mime_type="application/json"
-                )
+                generation_config=self._generation_config()
             )
             
             # Parse and validate using Pydantic
@@ -81,3 +96,87 @@ class ContentGenerator:
         except Exception as e:
             logger.error("Content generation failed", error=str(e))
             raise e
+
+    async def generate_section_async(self, prompt: str, profile_key: Literal['consulting', 'tech', 'finance'], template_version: str = "v1", bypass_cache: bool = False) -> SectionContent:
+        """
+        Async variant of generate_section using the SDK's native async call,
+        so waiting on Gemini doesn't block the event loop.
+
+        With a cache configured, a section generated before for the same
+        profile, prompt, model and template version is returned without a
+        Gemini call, and concurrent misses for the same key wait for one
+        generation; `bypass_cache` skips both but still stores the fresh
+        result.
+        """
+        full_prompt = self._build_prompt(prompt, profile_key)
+
+        if self.cache is None:
+            return await self._generate(full_prompt, profile_key, None)
+
+        key = self.cache.key(profile_key, prompt, self.MODEL_NAME, template_version)
+        if bypass_cache:
+            return await self._generate(full_prompt, profile_key, key)
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.info("Content cache hit", profile=profile_key)
+            return cached
+
+        generating = self._generating.get(key)
+        if generating is None:
+            generating = asyncio.ensure_future(self._generate(full_prompt, profile_key, key))
+            self._generating[key] = generating
+            generating.add_done_callback(lambda _: self._generating.pop(key, None))
+        else:
+            logger.info("Waiting for identical generation", profile=profile_key)
+        # Shielded, so a cancelled caller doesn't cancel the others' generation
+        return await asyncio.shield(generating)
+
+    async def _generate(self, full_prompt: str, profile_key: str, key: Optional[str]) -> SectionContent:
+        try:
+            logger.info("Generating content", profile=profile_key)
+            with timed_stage("gemini"):
+                response = await self.model.generate_content_async(
+                    full_prompt,
+                    generation_config=self._generation_config()
+                )
+            section = SectionContent.model_validate_json(response.text)
+            if key is not None:
+                self.cache.put(key, section)
+            return section
+
+        except Exception as e:
+            logger.error("Content generation failed", error=str(e))
+            raise e
+
+    async def generate_sections(self, prompt: str, sections: List[str], profile_key: Literal['consulting', 'tech', 'finance'], max_concurrency: int, max_retries: int, retry_backoff_seconds: float = 0.5, template_version: str = "v1", bypass_cache: bool = False) -> List[SectionContent]:
+        """
+        Generates one SectionContent per entry in `sections`, in order.
+
+        Sections are generated concurrently, at most `max_concurrency` at a
+        time, so latency follows the slowest section rather than the sum.
+        A section whose call or validation fails is retried on its own, up
+        to `max_retries` times; if it still fails the first error is raised.
+        """
+        # Fail fast on configuration errors instead of retrying them per section
+        self._build_prompt(prompt, profile_key)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def generate(section: str) -> SectionContent:
+            section_prompt = f"{prompt}\n\nWrite only the \"{section}\" section of the proposal."
+            for attempt in range(max_retries + 1):
+                try:
+                    async with semaphore:
+                        return await self.generate_section_async(section_prompt, profile_key, template_version, bypass_cache)
+                except Exception as e:
+                    if attempt == max_retries:
+                        raise
+                    logger.warning("Section generation failed, retrying", section=section, attempt=attempt + 1, error=str(e))
+                    await asyncio.sleep(retry_backoff_seconds * 2 ** attempt)
+
+        results = await asyncio.gather(*[generate(section) for section in sections], return_exceptions=True)
+        for section, result in zip(sections, results):
+            if isinstance(result, Exception):
+                logger.error("Section generation failed", section=section, error=str(result))
+                raise result
+        return results
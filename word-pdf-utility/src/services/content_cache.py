@@ -0,0 +1,177 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import structlog
+from collections import OrderedDict
+from typing import Optional, Tuple
+from src.core.config import settings
+from src.services.content import SectionContent
+
+logger = structlog.get_logger()
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Whitespace-insensitive form of a prompt. Case is kept: the prompt
+    embeds client_id and financial data, which must not be merged.
+    """
+    return re.sub(r"\s+", " ", prompt).strip()
+
+def section_cache_key(profile_key: str, prompt: str, model_name: str, template_version: str) -> str:
+    canonical = json.dumps(
+        {"profile": profile_key, "prompt": normalize_prompt(prompt), "model": model_name, "template_version": template_version},
+        sort_keys=True
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class DiskSectionStore:
+    """Persistent cache tier: one JSON file per key in a local directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self, key: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, f"{key}.json"), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, payload: str):
+        path = os.path.join(self.directory, f"{key}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+class GcsSectionStore:
+    """
+    Persistent cache tier: JSON objects under a bucket prefix, named
+    `<key>/<period>.json` where the period is the write time divided by the
+    TTL. An entry is read without listing: the current period's object, then
+    the previous one's. Objects are never overwritten, which objectCreator
+    allows; at most one is written per key and period (a regeneration within
+    the period stays in memory), and old ones go with the bucket lifecycle
+    rule.
+    """
+
+    def __init__(self, bucket, prefix: str, ttl_seconds: float):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _name(self, key: str, period: int) -> str:
+        return f"{self.prefix}{key}/{period}.json"
+
+    def load(self, key: str) -> Optional[str]:
+        from google.api_core.exceptions import NotFound
+        period = int(time.time() // self.ttl_seconds)
+        for candidate in (period, period - 1):
+            try:
+                return self.bucket.blob(self._name(key, candidate)).download_as_text()
+            except NotFound:
+                continue
+        return None
+
+    def save(self, key: str, payload: str):
+        from google.api_core.exceptions import PreconditionFailed
+        period = int(time.time() // self.ttl_seconds)
+        try:
+            self.bucket.blob(self._name(key, period)).upload_from_string(payload, content_type="application/json", if_generation_match=0)
+        except PreconditionFailed:
+            logger.info("Content cache entry already stored for this period", key=key)
+
+class SectionCache:
+    """
+    Cache of validated SectionContent keyed by section_cache_key.
+
+    An in-process LRU (`max_entries`, `ttl_seconds`) answers repeat
+    requests without a Gemini call. An optional persistent `store`
+    (DiskSectionStore / GcsSectionStore) is shared across instances and
+    restarts; its hits are promoted into memory and its writes happen in
+    the background so they don't delay the response.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, store=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._entries: "OrderedDict[str, Tuple[float, SectionContent]]" = OrderedDict()
+        self._pending_writes = set()
+
+    def key(self, profile_key: str, prompt: str, model_name: str, template_version: str) -> str:
+        return section_cache_key(profile_key, prompt, model_name, template_version)
+
+    def _get_memory(self, key: str) -> Optional[SectionContent]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, section = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return section
+
+    def _put_memory(self, key: str, section: SectionContent, stored_at: float):
+        self._entries[key] = (stored_at, section)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[SectionContent]:
+        section = self._get_memory(key)
+        if section is not None or self.store is None:
+            return section
+
+        # A failed read or an unreadable entry is a miss
+        try:
+            payload = await asyncio.to_thread(self.store.load, key)
+            if payload is None:
+                return None
+            record = json.loads(payload)
+            if time.time() - record["stored_at"] > self.ttl_seconds:
+                return None
+            section = SectionContent.model_validate(record["section"])
+        except Exception as e:
+            logger.warning("Content cache store read failed", error=str(e))
+            return None
+        self._put_memory(key, section, record["stored_at"])
+        return section
+
+    def put(self, key: str, section: SectionContent):
+        stored_at = time.time()
+        self._put_memory(key, section, stored_at)
+        if self.store is not None:
+            payload = json.dumps({"stored_at": stored_at, "section": section.model_dump()})
+            task = asyncio.create_task(self._save(key, payload))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    async def _save(self, key: str, payload: str):
+        try:
+            await asyncio.to_thread(self.store.save, key, payload)
+        except Exception as e:
+            logger.warning("Content cache store write failed", error=str(e))
+
+def build_section_cache() -> Optional[SectionCache]:
+    """Builds the cache configured by the CONTENT_CACHE_* settings."""
+    if not settings.CONTENT_CACHE_ENABLED:
+        return None
+
+    store = None
+    if settings.CONTENT_CACHE_STORE == "disk":
+        store = DiskSectionStore(settings.CONTENT_CACHE_DIR)
+    elif settings.CONTENT_CACHE_STORE == "gcs":
+        from src.services.storage import storage_service
+        if storage_service.client is None:
+            logger.warning("Content cache GCS store unavailable, using memory only")
+        else:
+            store = GcsSectionStore(storage_service.client.bucket(settings.GCS_BUCKET_NAME), settings.CONTENT_CACHE_PREFIX, settings.CONTENT_CACHE_TTL_SECONDS)
+    elif settings.CONTENT_CACHE_STORE:
+        raise ValueError(f"Unknown CONTENT_CACHE_STORE: {settings.CONTENT_CACHE_STORE}")
+
+    return SectionCache(settings.CONTENT_CACHE_MAX_ENTRIES, settings.CONTENT_CACHE_TTL_SECONDS, store)
@@ -0,0 +1,177 @@
+import json
+import time
+import uuid
+import asyncio
+import structlog
+from typing import Any, Awaitable, Callable, Dict, Optional
+from src.core.config import settings
+from src.core.logging import start_request_timings
+
+logger = structlog.get_logger()
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while JOB_QUEUE_SIZE jobs are already waiting."""
+
+class GcsJobStore:
+    """
+    Job records shared across instances, so `GET /jobs/{id}` works on any
+    instance. Each record is written once per stage (`submitted`, `done`)
+    instead of being overwritten, which objectCreator allows.
+    """
+
+    def __init__(self, bucket, prefix: str):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def load(self, job_id: str) -> Optional[str]:
+        from google.api_core.exceptions import NotFound
+        for stage in ("done", "submitted"):
+            try:
+                return self.bucket.blob(f"{self.prefix}{job_id}/{stage}.json").download_as_text()
+            except NotFound:
+                continue
+        return None
+
+    def save(self, job_id: str, stage: str, payload: str):
+        self.bucket.blob(f"{self.prefix}{job_id}/{stage}.json").upload_from_string(payload, content_type="application/json")
+
+class JobManager:
+    """
+    In-process job queue for asynchronous proposal generation.
+
+    `submit` stores the payload and returns a job record right away;
+    `workers` tasks take jobs off a bounded queue and run
+    `handler(payload, job_id)`, whose result dict (e.g. {"object_name":
+    ...}) is merged into the record. At most `queue_size` jobs wait at once, so
+    admission stays bounded by what the workers can drain. Finished
+    records are kept for `ttl_seconds`.
+    """
+
+    def __init__(self, handler: Callable[[Any, str], Awaitable[Dict[str, Any]]], workers: int, queue_size: int, ttl_seconds: float, store=None):
+        self.handler = handler
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._queue: "asyncio.Queue" = asyncio.Queue(maxsize=queue_size)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks = []
+        self._pending_writes = set()
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info("Job workers started", workers=self.workers)
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Jobs this instance will never finish; record them as failed so
+        # clients polling another instance stop waiting
+        for job in self._jobs.values():
+            if job["status"] not in TERMINAL_STATUSES:
+                self._finish(job, "failed", {"error": "Instance shut down before the job finished, please resubmit"})
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+
+    def submit(self, payload: Any) -> Dict[str, Any]:
+        self._expire()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "created_at": time.time(),
+            "finished_at": None,
+            "url": None,
+            "error": None
+        }
+        try:
+            self._queue.put_nowait((job["job_id"], payload))
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self._queue.maxsize} jobs already queued")
+        self._jobs[job["job_id"]] = job
+        self._save(job, "submitted")
+        return dict(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+        if self.store is None:
+            return None
+
+        # Submitted on another instance (or before a restart)
+        try:
+            payload = await asyncio.to_thread(self.store.load, job_id)
+        except Exception as e:
+            logger.warning("Job store read failed", job_id=job_id, error=str(e))
+            return None
+        if payload is None:
+            return None
+        job = json.loads(payload)
+        if time.time() - job["created_at"] > self.ttl_seconds:
+            return None
+        return job
+
+    async def _worker(self, worker: int):
+        while True:
+            job_id, payload = await self._queue.get()
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            # Each job gets its own log context and stage timings
+            structlog.contextvars.clear_contextvars()
+            structlog.contextvars.bind_contextvars(job_id=job_id)
+            timings = start_request_timings()
+            log = logger.bind(worker=worker)
+            try:
+                result = await self.handler(payload, job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("Job failed", error=str(e), **timings)
+                self._finish(job, "failed", {"error": str(e)})
+            else:
+                log.info("Job succeeded", latency=time.time() - job["created_at"], **timings)
+                self._finish(job, "succeeded", result)
+            finally:
+                self._queue.task_done()
+
+    def _finish(self, job: Dict[str, Any], status: str, fields: Dict[str, Any]):
+        job.update(fields, status=status, finished_at=time.time())
+        self._save(job, "done")
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["status"] in TERMINAL_STATUSES and job["finished_at"] < cutoff]:
+            del self._jobs[job_id]
+
+    def _save(self, job: Dict[str, Any], stage: str):
+        if self.store is None:
+            return
+        task = asyncio.create_task(self._write(job["job_id"], stage, json.dumps(job)))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def _write(self, job_id: str, stage: str, payload: str):
+        try:
+            await asyncio.to_thread(self.store.save, job_id, stage, payload)
+        except Exception as e:
+            logger.warning("Job store write failed", job_id=job_id, error=str(e))
+
+def build_job_manager(handler: Callable[[Any, str], Awaitable[Dict[str, Any]]]) -> JobManager:
+    """Builds the job manager configured by the JOB_* settings."""
+    store = None
+    if settings.JOB_STORE == "gcs":
+        from src.services.storage import storage_service
+        if storage_service.client is None:
+            logger.warning("Job GCS store unavailable, job status is per instance")
+        else:
+            store = GcsJobStore(storage_service.client.bucket(settings.GCS_BUCKET_NAME), settings.JOB_PREFIX)
+    elif settings.JOB_STORE:
+        raise ValueError(f"Unknown JOB_STORE: {settings.JOB_STORE}")
+
+    return JobManager(handler, settings.JOB_WORKERS, settings.JOB_QUEUE_SIZE, settings.JOB_TTL_SECONDS, store)
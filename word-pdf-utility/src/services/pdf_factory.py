@@ -1,37 +1,99 @@
-import asyncio
+import os
 import structlog
-from weasyprint import HTML
-from jinja2 import Environment, FileSystemLoader
-from typing import Dict, Optional
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from src.core.config import settings
+from src.core.logging import timed_stage
+from src.services.templates import template_registry
+from src.services.render_pool import RenderPool
+from src.services.spool import new_spool_path, open_rendered_file
 
 logger = structlog.get_logger()
 
-def render_pdf_sync(html_content: str) -> bytes:
+# Per worker process: parsed stylesheets and the font configuration they
+# were parsed with, reused across renders
+_font_config = None
+_stylesheets: Dict[Tuple, list] = {}
+
+def _font_configuration():
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _font_config = FontConfiguration()
+    return _font_config
+
+def get_stylesheets(template_version: str) -> list:
+    """
+    Returns the parsed weasyprint.CSS objects for a template version,
+    parsing them on first use. In dev the cache key includes the files'
+    mtimes, so edited stylesheets are re-parsed.
+    """
+    from weasyprint import CSS
+
+    paths = template_registry.stylesheet_paths(template_version)
+    key: Tuple = (template_version,)
+    if template_registry.auto_reload:
+        key += tuple(os.path.getmtime(path) for path in paths)
+
+    stylesheets = _stylesheets.get(key)
+    if stylesheets is None:
+        stylesheets = [CSS(filename=path, font_config=_font_configuration()) for path in paths]
+        _stylesheets[key] = stylesheets
+    return stylesheets
+
+def render_pdf_sync(html_content: str, template_version: str = "v1", target: Optional[str] = None) -> Optional[bytes]:
     """
     Synchronous function to render PDF from HTML content using WeasyPrint.
+    Runs inside a render pool worker. Writes to the file at `target` if
+    given (returning None), otherwise returns the PDF bytes.
     """
-    return HTML(string=html_content).write_pdf()
+    from weasyprint import HTML
+    return HTML(string=html_content).write_pdf(
+        target,
+        stylesheets=get_stylesheets(template_version),
+        font_config=_font_configuration()
+    )
 
-async def render_pdf(data: dict, template_name: str, template_dir: str = "src/templates") -> bytes:
+def warm_pdf_worker():
     """
-    Renders a PDF from a Jinja2 template and data.
-    Uses asyncio.to_thread to avoid blocking the event loop during PDF generation.
+    Render pool initializer: parses every template version's stylesheets
+    and renders a throwaway document so Pango, fontconfig and WeasyPrint's
+    default stylesheets are loaded before the worker takes a request.
     """
+    for template_version in template_registry.versions:
+        get_stylesheets(template_version)
+    render_pdf_sync("<html><body><p>warm-up</p></body></html>")
+
+pdf_render_pool = RenderPool(
+    workers=settings.RENDER_WORKERS,
+    queue_size=settings.RENDER_QUEUE_SIZE,
+    timeout_seconds=settings.RENDER_TIMEOUT_SECONDS,
+    recycle_after=settings.RENDER_RECYCLE_AFTER,
+    initializer=warm_pdf_worker
+)
+
+async def render_pdf(data: dict, template_version: str) -> BinaryIO:
+    """
+    Renders a PDF from the registered template for `template_version` and
+    data, returning the rendered file (see open_rendered_file); the caller
+    closes it.
+    The HTML is rendered here; WeasyPrint runs on the PDF render pool so
+    concurrent renders use separate cores and don't block the event loop.
+    The worker writes the PDF to a temporary file rather than sending the
+    bytes back, and that file is what gets uploaded.
+    """
+    path = new_spool_path()
     try:
-        logger.info("Rendering PDF", template=template_name)
-        
-        # Setup Jinja2 environment
-        # Note: In a real app, we might want to cache the environment
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template(template_name)
-        
-        # Render HTML
-        html_content = template.render(**data)
+        logger.info("Rendering PDF", template_version=template_version)
         
-        # Generate PDF in a separate thread
-        pdf_bytes = await asyncio.to_thread(render_pdf_sync, html_content)
+        # Render HTML from the precompiled template
+        with timed_stage("jinja"):
+            html_content = template_registry.render(template_version, data)
         
-        return pdf_bytes
+        # Generate PDF in a worker process (includes waiting for a free worker)
+        with timed_stage("weasyprint"):
+            await pdf_render_pool.run(render_pdf_sync, html_content, template_version, path)
+        return open_rendered_file(path)
     except Exception as e:
         logger.error("PDF generation failed", error=str(e))
+        os.remove(path)
         raise e
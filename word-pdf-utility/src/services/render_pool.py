@@ -0,0 +1,149 @@
+import os
+import signal
+import asyncio
+import multiprocessing
+import structlog
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+class RenderPoolSaturated(Exception):
+    """Raised when every worker is busy and the queue is full."""
+
+class RenderTimeout(Exception):
+    """Raised when a render runs past its timeout."""
+
+def _raise_timeout(signum, frame):
+    raise RenderTimeout("Render timed out")
+
+def _run_with_timeout(fn: Callable[..., Any], timeout_seconds: float, *args) -> Any:
+    """
+    Runs fn in a worker process, interrupted by SIGALRM after
+    `timeout_seconds` so a runaway render frees its worker.
+    """
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+# Set in each worker by _init_worker; only used while the pool warms up
+_warmup_barrier = None
+
+def _init_worker(barrier, initializer: Optional[Callable[[], None]]):
+    global _warmup_barrier
+    _warmup_barrier = barrier
+    if initializer is not None:
+        initializer()
+
+def _ping(timeout_seconds: float) -> int:
+    # Held until every worker has answered, so each ping occupies its own
+    # process and the executor has to start all of them
+    _warmup_barrier.wait(timeout_seconds)
+    return os.getpid()
+
+class RenderPool:
+    """
+    Pool of warm worker processes for CPU-bound rendering.
+
+    WeasyPrint holds the GIL, so threads serialise renders on one core and
+    slow the event loop; each worker here is a separate process, started
+    with `initializer` (imports, fonts, stylesheets) before it takes work.
+    At most `workers + queue_size` renders are admitted at once; beyond
+    that `run` raises RenderPoolSaturated so the caller can shed load.
+
+    After `recycle_after` renders, all workers are replaced to bound memory
+    growth: a new set is started and warmed in the background, takes over,
+    and the old executor is shut down once its queued renders finish.
+    (ProcessPoolExecutor's own max_tasks_per_child can lose queued work on
+    Python 3.11.)
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout_seconds: float, recycle_after: int = 0, initializer: Optional[Callable[[], None]] = None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout_seconds = timeout_seconds
+        self.recycle_after = recycle_after
+        self.initializer = initializer
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._submitted = 0
+        self._recycling: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Starts all workers and waits until each has run its initializer."""
+        if self._executor is not None:
+            return
+        self._executor = self._start_executor()
+        self._submitted = 0
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _start_executor(self) -> ProcessPoolExecutor:
+        # spawn: don't fork the server's threads and open clients
+        context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(context.Barrier(self.workers), self.initializer)
+        )
+        try:
+            # Workers are spawned on demand; one blocking ping per worker starts them all
+            pids = {f.result() for f in [executor.submit(_ping, self.timeout_seconds) for _ in range(self.workers)]}
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        logger.info("Render workers started", workers=self.workers, started=len(pids), queue_size=self.queue_size)
+        return executor
+
+    async def _recycle(self):
+        """Swaps in a warm set of workers, then drains and shuts down the old one."""
+        try:
+            executor = await asyncio.to_thread(self._start_executor)
+            old = self._executor
+            if old is None:
+                # The pool was shut down while the new workers started
+                executor.shutdown(wait=False, cancel_futures=True)
+                return
+            self._executor = executor
+            self._submitted = 0
+            await asyncio.to_thread(old.shutdown, wait=True)
+        except Exception as e:
+            logger.error("Render worker recycling failed", error=str(e))
+        finally:
+            self._recycling = None
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Runs fn(*args) on a worker. `fn` and its arguments must be
+        picklable (module-level function, plain data).
+        """
+        if self._executor is None:
+            self.start()
+        if self.pending >= self.capacity:
+            raise RenderPoolSaturated(f"Render pool saturated ({self.pending} renders in flight)")
+
+        self.pending += 1
+        try:
+            future = self._executor.submit(_run_with_timeout, fn, self.timeout_seconds, *args)
+            self._submitted += 1
+            if self.recycle_after and self._submitted >= self.recycle_after and self._recycling is None:
+                self._recycling = asyncio.create_task(self._recycle())
+            # The worker enforces the timeout; the margin covers time queued
+            wait_seconds = self.timeout_seconds * (1 + self.pending / self.workers) + 1
+            return await asyncio.wait_for(asyncio.wrap_future(future), wait_seconds)
+        except asyncio.TimeoutError:
+            raise RenderTimeout("Render timed out waiting for a worker")
+        finally:
+            self.pending -= 1
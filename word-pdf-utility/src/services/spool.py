@@ -0,0 +1,85 @@
+import os
+import shutil
+import asyncio
+import hashlib
+import zipfile
+import tempfile
+from typing import BinaryIO, Tuple
+from src.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+def new_spool() -> tempfile.SpooledTemporaryFile:
+    """
+    File-like sink for a rendered document: held in memory up to
+    SPOOL_MAX_MEMORY_BYTES, then rolled over to a temporary file.
+    """
+    return tempfile.SpooledTemporaryFile(max_size=settings.SPOOL_MAX_MEMORY_BYTES, dir=settings.SPOOL_DIR or None)
+
+def new_spool_path() -> str:
+    """
+    Path for a file written by another process (a render worker); see
+    open_rendered_file.
+    """
+    fd, path = tempfile.mkstemp(dir=settings.SPOOL_DIR or None)
+    os.close(fd)
+    return path
+
+def open_rendered_file(path: str) -> BinaryIO:
+    """
+    Opens a file written by a render worker for reading and unlinks it, so
+    it is removed once the returned file is closed. The file is hashed and
+    uploaded from there instead of being copied into a spool first.
+    """
+    file_obj = open(path, "rb")
+    os.remove(path)
+    return file_obj
+
+def digest(file_obj: BinaryIO) -> Tuple[str, int]:
+    """SHA-256 hex digest and size of a file object, read in chunks from the start."""
+    file_obj.seek(0)
+    sha256 = hashlib.sha256()
+    size = 0
+    while chunk := file_obj.read(CHUNK_SIZE):
+        sha256.update(chunk)
+        size += len(chunk)
+    file_obj.seek(0)
+    return sha256.hexdigest(), size
+
+class SpoolArchive:
+    """
+    Zip archive written into a spool, with rendered files added as they
+    finish. Entries are stored uncompressed: PDFs and DOCX files are
+    already compressed, so deflating them again only costs CPU.
+    """
+
+    def __init__(self):
+        self.spool = new_spool()
+        self._zip = zipfile.ZipFile(self.spool, "w", zipfile.ZIP_STORED)
+        self._names = set()
+        self._lock = asyncio.Lock()
+
+    async def add(self, name: str, file_obj: BinaryIO):
+        async with self._lock:
+            base, ext = os.path.splitext(name)
+            unique, n = name, 1
+            while unique in self._names:
+                n += 1
+                unique = f"{base}_{n}{ext}"
+            self._names.add(unique)
+            await asyncio.to_thread(self._write, unique, file_obj)
+
+    def _write(self, name: str, file_obj: BinaryIO):
+        file_obj.seek(0)
+        with self._zip.open(name, "w") as entry:
+            shutil.copyfileobj(file_obj, entry, CHUNK_SIZE)
+
+    def finish(self) -> BinaryIO:
+        """Writes the zip directory and returns the spool, rewound."""
+        self._zip.close()
+        self.spool.seek(0)
+        return self.spool
+
+    def close(self):
+        self._zip.close()
+        self.spool.close()
@@ -1,46 +1,160 @@
+import io
+import os
+import time
+import asyncio
+import contextvars
 import datetime
+import threading
 import structlog
+from typing import BinaryIO, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import storage
+from google.api_core.exceptions import PreconditionFailed
 from src.core.config import settings
+from src.core.logging import timed_stage
+from src.services.spool import digest
+from src.services.signing import build_url_signer
 
 logger = structlog.get_logger()
 
 class StorageService:
     def __init__(self):
+        # google-cloud-storage has no async API; blocking calls made from
+        # async code run on this bounded pool instead of the event loop
+        self.executor = ThreadPoolExecutor(max_workers=settings.STORAGE_MAX_WORKERS, thread_name_prefix="storage")
+        # Object name -> time it was known to be stored, and
+        # (object name, filename) -> (signed URL, expiry); both LRU
+        self._stored: "OrderedDict[str, float]" = OrderedDict()
+        self._signed_urls: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
         try:
             # If credentials are not explicitly set in env, it will try to find default credentials
             self.client = storage.Client()
             self.bucket_name = settings.GCS_BUCKET_NAME
+            self.signer = build_url_signer()
             logger.info("StorageService initialized", bucket=self.bucket_name)
         except Exception as e:
             logger.error("Failed to initialize StorageService", error=str(e))
             self.client = None
 
-    def upload_and_sign(self, file_bytes: bytes, filename: str, content_type: str) -> str:
+    @staticmethod
+    def object_name(sha256: str, filename: str) -> str:
+        """Content-addressed object name: identical files share one object."""
+        extension = os.path.splitext(filename)[1]
+        return f"{settings.OBJECT_PREFIX}{sha256}{extension}"
+
+    def _cached_url(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._signed_urls.get(key)
+            if entry is None:
+                return None
+            url, expires_at = entry
+            if expires_at - time.time() < settings.SIGNED_URL_MIN_REMAINING_SECONDS:
+                del self._signed_urls[key]
+                return None
+            self._signed_urls.move_to_end(key)
+            return url
+
+    def _remember(self, cache: OrderedDict, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > settings.STORAGE_CACHE_SIZE:
+                cache.popitem(last=False)
+
+    def _is_stored(self, object_name: str) -> bool:
+        with self._lock:
+            stored_at = self._stored.get(object_name)
+        return stored_at is not None and time.time() - stored_at < settings.STORED_OBJECT_TTL_SECONDS
+
+    def upload(self, file: Union[bytes, BinaryIO], filename: str, content_type: str) -> str:
         """
-        Uploads a file to GCS and returns a V4 signed URL valid for 15 minutes.
+        Stores a file (bytes or a seekable file object, e.g. a spool) in GCS
+        under its content hash and returns the object name.
+
+        A file identical to one stored before is not uploaded again. File
+        objects are streamed; past 8 MB the client switches to a resumable
+        upload in UPLOAD_CHUNK_SIZE chunks.
         """
         if not self.client:
             raise RuntimeError("StorageService is not initialized properly")
 
+        file_obj = io.BytesIO(file) if isinstance(file, bytes) else file
+        sha256, size = digest(file_obj)
+        object_name = self.object_name(sha256, filename)
+        if self._is_stored(object_name):
+            logger.info("Identical file already stored, skipping upload", filename=filename, object_name=object_name)
+            return object_name
+
         try:
-            bucket = self.client.bucket(self.bucket_name)
-            blob = bucket.blob(filename)
-            
-            # Upload file
-            logger.info("Uploading file", filename=filename, content_type=content_type)
-            blob.upload_from_string(file_bytes, content_type=content_type)
-            
-            # Generate Signed URL
-            url = blob.generate_signed_url(
-                version="v4",
-                expiration=datetime.timedelta(minutes=15),
-                method="GET",
-            )
-            
+            blob = self.client.bucket(self.bucket_name).blob(object_name, chunk_size=settings.UPLOAD_CHUNK_SIZE)
+            logger.info("Uploading file", filename=filename, object_name=object_name, content_type=content_type, size=size)
+            try:
+                with timed_stage("upload"):
+                    blob.upload_from_file(file_obj, size=size, content_type=content_type, if_generation_match=0)
+                self._remember(self._stored, object_name, time.time())
+            except PreconditionFailed:
+                logger.info("Identical file already stored", filename=filename, object_name=object_name)
+                # The existing object may be days old and close to its
+                # lifecycle deletion, so trust it from when it was created
+                blob.reload()
+                self._remember(self._stored, object_name, blob.time_created.timestamp())
+            return object_name
+        except Exception as e:
+            logger.error("Failed to upload file", filename=filename, error=str(e))
+            raise e
+
+    def sign(self, object_name: str, filename: str) -> str:
+        """
+        Returns a V4 signed URL, valid for SIGNED_URL_MINUTES, that downloads
+        a stored object as `filename`. A still-valid signed URL for the same
+        object and filename is reused.
+        """
+        if not self.client:
+            raise RuntimeError("StorageService is not initialized properly")
+
+        url = self._cached_url((object_name, filename))
+        if url is not None:
+            logger.info("Reusing signed URL for identical file", filename=filename, object_name=object_name)
+            return url
+
+        try:
+            blob = self.client.bucket(self.bucket_name).blob(object_name)
+            download_name = filename.replace('"', '')
+            expiration = datetime.timedelta(minutes=settings.SIGNED_URL_MINUTES)
+            with timed_stage("signing"):
+                url = self.signer.sign(blob, expiration, f'attachment; filename="{download_name}"')
+            self._remember(self._signed_urls, (object_name, filename), (url, time.time() + expiration.total_seconds()))
             return url
         except Exception as e:
-            logger.error("Failed to upload and sign file", filename=filename, error=str(e))
+            logger.error("Failed to sign URL", filename=filename, object_name=object_name, error=str(e))
             raise e
 
+    def upload_and_sign(self, file: Union[bytes, BinaryIO], filename: str, content_type: str) -> str:
+        """
+        upload, then sign: a repeat render of an identical file costs a
+        hash and two lookups.
+        """
+        return self.sign(self.upload(file, filename, content_type), filename)
+
+    async def _run_async(self, fn, *args):
+        # On the storage executor, in a copy of the caller's context so logs
+        # and stage timings belong to the request
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, context.run, fn, *args)
+
+    async def upload_async(self, file: Union[bytes, BinaryIO], filename: str, content_type: str) -> str:
+        """Async variant of upload."""
+        return await self._run_async(self.upload, file, filename, content_type)
+
+    async def sign_async(self, object_name: str, filename: str) -> str:
+        """Async variant of sign."""
+        return await self._run_async(self.sign, object_name, filename)
+
+    async def upload_and_sign_async(self, file: Union[bytes, BinaryIO], filename: str, content_type: str) -> str:
+        """Async variant of upload_and_sign."""
+        return await self._run_async(self.upload_and_sign, file, filename, content_type)
+
 storage_service = StorageService()
@@ -0,0 +1,87 @@
+import os
+import structlog
+from typing import Dict, List, Optional
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+class TemplateRegistry:
+    """
+    Process-wide registry of compiled Jinja2 templates.
+
+    One Environment is shared by all requests, so each template is parsed
+    and compiled once; compiled bytecode is also written to
+    `bytecode_dir` so other processes (and restarts) skip compilation.
+    With `auto_reload` (dev only) edited templates are picked up on the
+    next render; otherwise templates are never re-checked on disk.
+    """
+
+    def __init__(self, template_dir: str, versions: Dict[str, str], auto_reload: bool, bytecode_dir: Optional[str] = None):
+        self.template_dir = template_dir
+        self.versions = versions
+        self.auto_reload = auto_reload
+
+        bytecode_cache = None
+        if bytecode_dir:
+            os.makedirs(bytecode_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
+
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            bytecode_cache=bytecode_cache,
+            auto_reload=auto_reload,
+            cache_size=-1
+        )
+        self._templates: Dict[str, Template] = {}
+
+    def template_name(self, template_version: str, extension: str = ".html") -> str:
+        """Maps a ProposalRequest.template_version to a template file name."""
+        base = self.versions.get(template_version)
+        if base is None:
+            raise ValueError(f"Unknown template version: {template_version}")
+        return base + extension
+
+    def stylesheet_paths(self, template_version: str) -> List[str]:
+        """
+        Stylesheets for a template version: styles/<base>.css in the template
+        directory, if present. They are applied by the PDF renderer rather
+        than inlined, so each worker parses them once.
+        """
+        path = os.path.join(self.template_dir, "styles", self.template_name(template_version, ".css"))
+        return [path] if os.path.exists(path) else []
+
+    def get(self, template_version: str) -> Template:
+        if self.auto_reload:
+            # The Environment checks the file's mtime and recompiles if needed
+            return self.env.get_template(self.template_name(template_version))
+
+        template = self._templates.get(template_version)
+        if template is None:
+            template = self.env.get_template(self.template_name(template_version))
+            self._templates[template_version] = template
+        return template
+
+    def render(self, template_version: str, data: dict) -> str:
+        return self.get(template_version).render(**data)
+
+    def preload(self) -> List[str]:
+        """
+        Compiles every HTML template in the template directory and resolves
+        every known version, so no request pays for compilation. Raises if
+        a version points at a missing or invalid template.
+        """
+        names = self.env.list_templates(extensions=["html"])
+        for name in names:
+            self.env.get_template(name)
+        for template_version in self.versions:
+            self.get(template_version)
+        logger.info("Templates preloaded", templates=names, versions=list(self.versions))
+        return names
+
+template_registry = TemplateRegistry(
+    settings.TEMPLATE_DIR,
+    settings.TEMPLATE_VERSIONS,
+    auto_reload=settings.ENV == "dev",
+    bytecode_dir=settings.TEMPLATE_BYTECODE_DIR
+)
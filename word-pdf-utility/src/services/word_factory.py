@@ -1,28 +1,182 @@
+import os
+import io
+import copy
+import asyncio
+import zipfile
+import threading
 import structlog
+from docx import Document
+from docx.opc.pkgwriter import PackageWriter
 from docxtpl import DocxTemplate
-from typing import Dict
-import io
+from jinja2 import Environment
+from typing import BinaryIO, Dict, List, Optional
+from src.core.config import settings
+from src.core.logging import timed_stage
+from src.services.render_pool import RenderPool
+from src.services.spool import new_spool, new_spool_path, open_rendered_file
+from src.services.templates import template_registry
 
 logger = structlog.get_logger()
 
-def render_docx(data: dict, template_name: str, template_dir: str = "src/templates") -> bytes:
+class XmlTemplateEnvironment(Environment):
+    """
+    Jinja2 environment for docxtpl that keeps the templates it compiles.
+
+    docxtpl compiles each part's patched XML with `from_string` on every
+    render; the XML only depends on the .docx template, so the compiled
+    template can be reused by the next render of the same file.
+    """
+
+    def __init__(self, max_entries: int = 256, **options):
+        super().__init__(**options)
+        self.max_entries = max_entries
+        self._compiled: Dict[str, object] = {}
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None:
+            return super().from_string(source, globals, template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            if len(self._compiled) >= self.max_entries:
+                self._compiled.clear()
+            template = super().from_string(source)
+            self._compiled[source] = template
+        return template
+
+class DocxTemplateCache:
+    """
+    Keeps each .docx template in memory, as raw bytes and as a parsed
+    python-docx Document, so a render starts from a deep copy of the parsed
+    document instead of reading and unzipping the file again.
+
+    With `auto_reload` (dev only) a template is reloaded when its file's
+    mtime changes.
+    """
+
+    def __init__(self, template_dir: str, auto_reload: bool):
+        self.template_dir = template_dir
+        self.auto_reload = auto_reload
+        self.jinja_env = XmlTemplateEnvironment()
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, template_name: str) -> dict:
+        path = os.path.join(self.template_dir, template_name)
+        entry = self._entries.get(template_name)
+        if entry is not None and not self.auto_reload:
+            return entry
+
+        mtime = os.path.getmtime(path)
+        if entry is not None and entry["mtime"] == mtime:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(template_name)
+            if entry is None or entry["mtime"] != mtime:
+                with open(path, "rb") as f:
+                    raw = f.read()
+                entry = {"mtime": mtime, "raw": raw, "document": Document(io.BytesIO(raw))}
+                self._entries[template_name] = entry
+                logger.info("DOCX template loaded", template=template_name, size=len(raw))
+        return entry
+
+    def new_template(self, template_name: str) -> DocxTemplate:
+        """Returns a DocxTemplate backed by a private copy of the cached document."""
+        entry = self._load(template_name)
+        doc = DocxTemplate(io.BytesIO(entry["raw"]))
+        doc.docx = copy.deepcopy(entry["document"])
+        return doc
+
+    def preload(self) -> List[str]:
+        """Loads the .docx template of every known template version that has one."""
+        loaded = []
+        for template_version in template_registry.versions:
+            template_name = template_registry.template_name(template_version, ".docx")
+            if os.path.exists(os.path.join(self.template_dir, template_name)):
+                self._load(template_name)
+                loaded.append(template_name)
+            else:
+                logger.warning("No DOCX template for version", template_version=template_version, template=template_name)
+        return loaded
+
+docx_template_cache = DocxTemplateCache(settings.TEMPLATE_DIR, auto_reload=settings.ENV == "dev")
+
+# python-docx stamps every zip entry with the save time; a fixed time makes
+# identical renders byte-identical, so they share one stored object
+DOCX_ENTRY_TIME = (1980, 1, 1, 0, 0, 0)
+
+class _FixedTimeZipWriter:
+    """python-docx package writer whose zip entries all carry DOCX_ENTRY_TIME."""
+
+    def __init__(self, sink: BinaryIO):
+        self._zipf = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, pack_uri, blob: bytes):
+        info = zipfile.ZipInfo(pack_uri.membername, date_time=DOCX_ENTRY_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o600 << 16
+        self._zipf.writestr(info, blob)
+
+    def close(self):
+        self._zipf.close()
+
+def save_docx(doc: DocxTemplate, sink: BinaryIO):
     """
-    Renders a DOCX file from a template and data.
+    DocxTemplate.save through _FixedTimeZipWriter. docxtpl's media and
+    zip-entry replacement (post_processing) is not used by our templates.
+    """
+    doc.pre_processing()
+    package = doc.docx.part.package
+    for part in package.parts:
+        part.before_marshal()
+    writer = _FixedTimeZipWriter(sink)
+    PackageWriter._write_content_types_stream(writer, package.parts)
+    PackageWriter._write_pkg_rels(writer, package.rels)
+    PackageWriter._write_parts(writer, package.parts)
+    writer.close()
+
+def render_docx_sync(data: dict, template_name: str, sink: BinaryIO):
+    """
+    Renders a DOCX file from a cached template and data into `sink`.
+    """
+    doc = docx_template_cache.new_template(template_name)
+    doc.render(data, docx_template_cache.jinja_env)
+    save_docx(doc, sink)
+
+def render_docx_file(data: dict, template_name: str, path: str):
+    """Renders a DOCX file into `path`; runs in a render pool worker."""
+    with open(path, "wb") as f:
+        render_docx_sync(data, template_name, f)
+
+async def render_docx(data: dict, template_version: str, pool: Optional[RenderPool] = None) -> BinaryIO:
+    """
+    Renders a DOCX file from the template for `template_version` and data,
+    returning the rendered file; the caller closes it.
+    Uses asyncio.to_thread to avoid blocking the event loop during rendering
+    (into a spool), or a worker of `pool` (into a temporary file that is
+    returned as is, like PDFs) so many renders at once use every core.
     """
     try:
+        template_name = template_registry.template_name(template_version, ".docx")
         logger.info("Rendering DOCX", template=template_name)
-        
-        template_path = f"{template_dir}/{template_name}"
-        doc = DocxTemplate(template_path)
-        
-        doc.render(data)
-        
-        # Save to memory
-        file_stream = io.BytesIO()
-        doc.save(file_stream)
-        file_stream.seek(0)
-        
-        return file_stream.getvalue()
+        if pool is None:
+            sink = new_spool()
+            try:
+                with timed_stage("docxtpl"):
+                    await asyncio.to_thread(render_docx_sync, data, template_name, sink)
+            except Exception:
+                sink.close()
+                raise
+            return sink
+
+        path = new_spool_path()
+        try:
+            with timed_stage("docxtpl"):
+                await pool.run(render_docx_file, data, template_name, path)
+        except Exception:
+            os.remove(path)
+            raise
+        return open_rendered_file(path)
     except Exception as e:
         logger.error("DOCX generation failed", error=str(e))
         raise e
@@ -63,6 +63,13 @@ resource "google_storage_bucket_iam_member" "sa_storage_creator" {
   member = "serviceAccount:${google_service_account.sentinel_sa.email}"
 }
 
+# Grant SA permission to read objects in the bucket (content cache, signed GET URLs)
+resource "google_storage_bucket_iam_member" "sa_storage_viewer" {
+  bucket = google_storage_bucket.vault.name
+  role   = "roles/storage.objectViewer"
+  member = "serviceAccount:${google_service_account.sentinel_sa.email}"
+}
+
 # Grant SA permission to sign blobs (Required for V4 Signed URLs)
 resource "google_project_iam_member" "sa_token_creator" {
   project = var.project_id
@@ -96,12 +103,27 @@ resource "google_cloud_run_service" "default" {
   }
 
   template {
+    metadata {
+      annotations = {
+        # Keep CPU allocated after the response, so async jobs keep running
+        "run.googleapis.com/cpu-throttling" = "false"
+      }
+    }
+
     spec {
       service_account_name = google_service_account.sentinel_sa.email
       containers {
         # Using a placeholder image for initial deployment definition.
         # In a real pipeline, this would be updated to the built image.
         image = "us-docker.pkg.dev/cloudrun/container/hello" 
+
+        # PDF rendering runs in one worker process per vCPU
+        resources {
+          limits = {
+            cpu    = var.cpu
+            memory = var.memory
+          }
+        }
         
         env {
           name  = "GCS_BUCKET_NAME"
@@ -111,6 +133,18 @@ resource "google_cloud_run_service" "default" {
           name  = "GOOGLE_CLOUD_PROJECT"
           value = var.project_id
         }
+        env {
+          name  = "CONTENT_CACHE_STORE"
+          value = "gcs"
+        }
+        env {
+          name  = "JOB_STORE"
+          value = "gcs"
+        }
+        env {
+          name  = "RENDER_WORKERS"
+          value = var.cpu
+        }
         env {
             name  = "GOOGLE_API_KEY"
             value = data.google_secret_manager_secret_version.google_api_key.secret_data
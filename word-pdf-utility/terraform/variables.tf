@@ -20,3 +20,16 @@ variable "bucket_name" {
   type        = string
   default     = "sentinel-growth-artifacts" 
 }
+
+
+variable "cpu" {
+  description = "vCPUs per Cloud Run instance (also the number of PDF render workers)"
+  type        = string
+  default     = "2"
+}
+
+variable "memory" {
+  description = "Memory per Cloud Run instance"
+  type        = string
+  default     = "2Gi"
+}
\ No newline at end of file